@@ -3,19 +3,24 @@ from fastapi.exceptions import HTTPException
 from app.models.userModel import registerUserModel, userOut, UserInDB
 from app.db.dbConnect import get_user_collection
 from app.utils.authUtils import (
-    hash_password,
-    verify_password,
+    hash_password_async,
+    verify_and_update_password,
     create_access_token,
     create_refresh_token,
     decode_refresh_token,
 )
 from fastapi.responses import JSONResponse
+from app.utils.json_response import FastJSONResponse
 from typing import Annotated
 from fastapi.security import  OAuth2PasswordRequestForm
 from fastapi import Depends
-from ...services.user_services import get_current_user
+from ...services.user_services import (
+    get_current_user,
+    get_token_cache_stats,
+    invalidate_user_cache,
+)
 
-router = APIRouter()
+router = APIRouter(default_response_class=FastJSONResponse)
 
 
 ############################ Register User ############################
@@ -32,7 +37,7 @@ async def register_user(payload: registerUserModel = Body(...)):
         )
 
     # Hash the password before storing
-    payload.password = hash_password(payload.password)
+    payload.password = await hash_password_async(payload.password)
 
     #  Prepare the document for insertion using the UserInDB structure
     user_db_data = UserInDB(
@@ -64,7 +69,10 @@ async def login_user(logindata: Annotated[OAuth2PasswordRequestForm, Depends()])
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Incorrect username or password"
         )
-    if not verify_password(logindata.password, user["hashed_password"]):
+    valid, updated_hash = await verify_and_update_password(
+        logindata.password, user["hashed_password"]
+    )
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Incorrect username or password"
         )
@@ -72,9 +80,12 @@ async def login_user(logindata: Annotated[OAuth2PasswordRequestForm, Depends()])
     user_id_str = str(user["_id"])
     access_token = create_access_token(data={"sub": user_id_str})
     refresh_token = create_refresh_token(data={"sub": user_id_str})
-    # save refresh token in db
+    # save refresh token in db, and rehash if the hash parameters changed
+    update = {"refresh_token": refresh_token}
+    if updated_hash:
+        update["hashed_password"] = updated_hash
     await user_collection.update_one(
-        {"email": logindata.username}, {"$set": {"refresh_token": refresh_token}}
+        {"email": logindata.username}, {"$set": update}
     )
     response = JSONResponse(
         content={"message": "Login successful", "access_token": access_token, "token_type": "bearer"}
@@ -99,6 +110,7 @@ async def logout_user(refresh_token: str = Cookie(None)):
 
     # remove refresh token
     await user_col.update_one({"email": email}, {"$unset": {"refresh_token": ""}})
+    invalidate_user_cache(decoded["sub"])
 
     return {"message": "Logged out successfully"}
 
@@ -125,6 +137,7 @@ async def refresh(refresh_token: str = Cookie(None)):
     await user_col.update_one(
         {"email": email}, {"$set": {"refresh_token": new_refresh}}
     )
+    invalidate_user_cache(decoded["sub"])
     response = JSONResponse(content={"message": "Token refreshed successfully"})
     response.set_cookie(key="access_token", value=new_access, httponly=True)
     response.set_cookie(key="refresh_token", value=new_refresh, httponly=True)
@@ -161,3 +174,8 @@ async def refresh(refresh_token: str = Cookie(None)):
 @router.get("/current-user")
 async def current_user_route(current_user=Depends(get_current_user)):
     return current_user
+
+
+@router.get("/token-cache/stats")
+async def token_cache_stats(current_user=Depends(get_current_user)):
+    return get_token_cache_stats()
@@ -0,0 +1,67 @@
+from fastapi import APIRouter, Body, Depends, HTTPException, Response, status
+from pydantic import ValidationError
+
+from app.jobs import queue
+from app.jobs.handlers import HANDLERS
+from app.models.job_model import JobSubmit
+from app.models.userModel import userOut
+from app.utils.json_response import FastJSONResponse
+from ...services.user_services import get_current_user
+
+router = APIRouter(default_response_class=FastJSONResponse)
+
+# Status polls leave out the (possibly large) payload and result
+STATUS_PROJECTION = {"payload": 0, "result": 0, "worker": 0}
+
+
+def job_status(job: dict) -> dict:
+    job["job_id"] = str(job.pop("_id"))
+    return job
+
+
+@router.post("/", status_code=status.HTTP_202_ACCEPTED, summary="Submit a background job")
+async def submit_job(payload: JobSubmit = Body(...), current_user: userOut = Depends(get_current_user)):
+    model, _ = HANDLERS[payload.type]
+    try:
+        job_payload = model.model_validate(payload.payload)
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors(include_url=False, include_context=False))
+    job_id = await queue.submit(
+        payload.type,
+        job_payload.model_dump(mode="json"),
+        current_user.id,
+        lane=payload.lane,
+        max_attempts=payload.max_attempts,
+    )
+    return {"job_id": job_id, "status": queue.QUEUED}
+
+
+@router.get("/{job_id}", summary="Job status and progress")
+async def get_job_status(job_id: str, current_user: userOut = Depends(get_current_user)):
+    job = await queue.get_job(job_id, current_user.id, STATUS_PROJECTION)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found.")
+    return FastJSONResponse(job_status(job))
+
+
+@router.get("/{job_id}/result", summary="Result of a finished job")
+async def get_job_result(job_id: str, current_user: userOut = Depends(get_current_user)):
+    job = await queue.get_job(job_id, current_user.id, {"status": 1, "result": 1, "error": 1})
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found.")
+    if job["status"] != queue.SUCCEEDED:
+        detail = f"Job is {job['status']}."
+        if job.get("error") and job["status"] == queue.FAILED:
+            detail = f"Job failed: {job['error']}"
+        raise HTTPException(status_code=409, detail=detail)
+    return FastJSONResponse({"job_id": job_id, "result": job["result"]})
+
+
+@router.delete("/{job_id}", status_code=status.HTTP_204_NO_CONTENT, summary="Cancel a queued job")
+async def cancel_job(job_id: str, current_user: userOut = Depends(get_current_user)):
+    if await queue.cancel(job_id, current_user.id):
+        return Response(status_code=status.HTTP_204_NO_CONTENT)
+    job = await queue.get_job(job_id, current_user.id, {"status": 1})
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found.")
+    raise HTTPException(status_code=409, detail=f"Job is {job['status']} and can no longer be cancelled.")
@@ -1,72 +1,245 @@
-from fastapi import APIRouter, HTTPException
+import asyncio
+from typing import Literal
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from datetime import datetime
-from bson import ObjectId
+from bson import ObjectId, encode as bson_encode
 from fastapi import Depends
 
+from app.config import settings
 from app.db.dbConnect import db, get_project_collection
-from app.models.project_model import RooftopInput, HarvestResult, ProjectCreate
+from app.models.project_model import RooftopInput, HarvestResult, ProjectCreate, ProjectBatchCreate, ScenarioSweep, SweepRange
 from app.models.userModel import userOut
-from app.services.calculations import calculate_harvest
+from app.services.project_creation import create_project, create_projects, pending_project
+from app.services.project_geo import geo_fields, nearby_projects, within_radius
+from app.services.project_stats import GROUP_FIELDS, project_stats
+from app.services.project_export import EXPORTERS, FIRST_BATCH_SIZE, MEDIA_TYPES, parquet_available
+from app.services.result_memo import attach_results, result_lookup_stages
+from app.services.scenarios import range_values, run_sweep
+from app.utils.admission import mongo_writes
+from app.utils.http_cache import cache_headers, etag_matches, make_etag, not_modified
+from app.utils.json_response import FastJSONResponse
+from app.utils.pagination import SORT, InvalidCursor, fetch_page
 from ...services.user_services import get_current_user
 
-router = APIRouter()
+router = APIRouter(default_response_class=FastJSONResponse)
 
-def objid_to_str(doc: dict) -> dict:
-    if doc and "_id" in doc:
-        doc["_id"] = str(doc["_id"])
-    return doc
+# Largest search radius for nearby and per-area queries
+MAX_RADIUS_KM = 100
+# MongoDB rejects documents larger than this
+MAX_DOCUMENT_BYTES = 16 * 1024 * 1024
 
 @router.post("/calculate", response_model=dict)
 async def calculate_and_create_project(payload: ProjectCreate, current_user: userOut = Depends(get_current_user), project_col = Depends(get_project_collection)):
-    # 1. Run calculations
-    result: HarvestResult = calculate_harvest(payload.input)
-
-    # 2. Save to MongoDB
-    project_doc = {
-        "user_id": current_user.id, 
-        "input": payload.input.model_dump(),
-        "result": result.model_dump(),
-        "created_at": datetime.utcnow(),
-    }
+    return await create_project(current_user.id, payload.input, project_col)
+
+@router.post("/calculate/batch", response_model=dict)
+async def calculate_and_create_projects_batch(payload: ProjectBatchCreate, current_user: userOut = Depends(get_current_user), project_col = Depends(get_project_collection)):
+    if any(inp.sizing_method == "simulation" for inp in payload.inputs):
+        raise HTTPException(status_code=400, detail="Simulation sizing is not supported here; submit a calculate_batch job instead.")
+    return await create_projects(current_user.id, payload.inputs, project_col)
+
+@router.post("/scenarios", response_model=dict)
+async def sweep_scenarios(payload: ScenarioSweep, current_user: userOut = Depends(get_current_user), project_col = Depends(get_project_collection)):
+    # 1. Evaluate every combination in one vectorized pass
+    try:
+        vary = {
+            field: range_values(spec.start, spec.stop, spec.step) if isinstance(spec, SweepRange) else spec
+            for field, spec in payload.vary.items()
+        }
+        sweep = run_sweep(payload.input, vary, pareto=payload.output == "pareto")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-    res = await project_col.insert_one(project_doc)
-    project_doc["_id"] = res.inserted_id
+    # 2. Optionally save the whole sweep as one project document; a full
+    #    MAX_SCENARIOS table can approach MongoDB's 16 MB document limit
+    if payload.persist:
+        doc = {
+            "user_id": current_user.id,
+            "type": "scenario",
+            "input": payload.input.model_dump(),
+            "vary": vary,
+            "output": payload.output,
+            "result": sweep,
+            "created_at": datetime.utcnow(),
+            **geo_fields(payload.input),
+        }
+        if len(bson_encode(doc)) > MAX_DOCUMENT_BYTES:
+            raise HTTPException(
+                status_code=413,
+                detail="Sweep is too large to save; narrow the ranges or use output=pareto.",
+            )
+        async with mongo_writes:
+            res = await project_col.insert_one(doc)
+        sweep["project_id"] = str(res.inserted_id)
 
-    return {
-        "project_id": str(res.inserted_id),
-        "result": result,
+    return sweep
+
+@router.get("/stats", summary="Aggregate project statistics")
+async def get_project_stats(
+    group_by: str = Query("roof_type", description="Comma-separated: user, location, roof_type, system_type"),
+    bucket: Literal["day", "week", "month", "year"] | None = None,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    location: str | None = None,
+    roof_type: str | None = None,
+    system_type: str | None = None,
+    source: Literal["auto", "live", "rollup"] = "auto",
+    current_user: userOut = Depends(get_current_user),
+):
+    fields = [f.strip() for f in group_by.split(",") if f.strip()]
+    unknown = [f for f in fields if f not in GROUP_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Cannot group by {', '.join(unknown)}.")
+    filters = {
+        name: value
+        for name, value in (("user", current_user.id), ("location", location), ("roof_type", roof_type), ("system_type", system_type))
+        if value is not None
     }
+    return await project_stats(fields, bucket, start, end, filters, source)
+
+@router.get("/nearby", summary="Projects near a location")
+async def get_nearby_projects(
+    latitude: float = Query(..., ge=-90, le=90),
+    longitude: float = Query(..., ge=-180, le=180),
+    radius_km: float = Query(5, gt=0, le=MAX_RADIUS_KM),
+    limit: int = Query(20, ge=1, le=100),
+    fields: str | None = None,
+    current_user: userOut = Depends(get_current_user),
+):
+    projection = list_projection(fields)
+    docs = await nearby_projects(current_user.id, latitude, longitude, radius_km, limit, projection)
+    result_fields = None if "result" in projection else [k.split(".", 1)[1] for k in projection if k.startswith("result.")]
+    await attach_results(docs, result_fields)
+    return FastJSONResponse({"items": docs})
+
+@router.get("/area-stats", summary="Aggregate statistics of projects within a radius")
+async def get_area_stats(
+    latitude: float = Query(..., ge=-90, le=90),
+    longitude: float = Query(..., ge=-180, le=180),
+    radius_km: float = Query(5, gt=0, le=MAX_RADIUS_KM),
+    group_by: str | None = Query(None, description="Comma-separated: user, location, roof_type, system_type"),
+    start: datetime | None = None,
+    end: datetime | None = None,
+    current_user: userOut = Depends(get_current_user),
+):
+    fields = [f.strip() for f in (group_by or "").split(",") if f.strip()]
+    unknown = [f for f in fields if f not in GROUP_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Cannot group by {', '.join(unknown)}.")
+    stats = await project_stats(
+        fields, None, start, end, {"user": current_user.id}, within=within_radius(latitude, longitude, radius_km)
+    )
+    return {"latitude": latitude, "longitude": longitude, "radius_km": radius_km, **stats}
+
+@router.get("/export", summary="Export the caller's projects")
+async def export_projects(format: Literal["ndjson", "csv", "parquet"] = "ndjson", current_user: userOut = Depends(get_current_user), project_col = Depends(get_project_collection)):
+    if format == "parquet" and not parquet_available():
+        raise HTTPException(status_code=400, detail="Parquet export requires pyarrow.")
+    # user_id is stored as the string id
+    query = {"user_id": current_user.id}
+
+    # a small first batch gets the first rows out quickly; the rest come in full batches
+    cursor = await project_col.aggregate(
+        [{"$match": query}, {"$sort": {"_id": 1}}, *result_lookup_stages()],
+        batchSize=FIRST_BATCH_SIZE,
+    )
+    cursor.batch_size(settings.export_batch_size)
+    return StreamingResponse(
+        EXPORTERS[format](cursor),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="projects.{format}"'},
+    )
 
 @router.get("/{project_id}")
-async def get_project(project_id: str, current_user: userOut = Depends(get_current_user), project_col = Depends(get_project_collection)):
+async def get_project(project_id: str, request: Request, current_user: userOut = Depends(get_current_user), project_col = Depends(get_project_collection)):
     if not ObjectId.is_valid(project_id):
         raise HTTPException(status_code=400, detail="Invalid project ID.")
 
+    # user_id is stored as the string id
     project = await project_col.find_one(
-        {"_id": ObjectId(project_id), "user_id": ObjectId(current_user.id)}
+        {"_id": ObjectId(project_id), "user_id": current_user.id}
     )
+    if not project:
+        # accepted by the write-behind buffer but not flushed yet
+        project = pending_project(ObjectId(project_id), current_user.id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found or unauthorized.")
 
-    project["_id"] = str(project["_id"])
-    project["user_id"] = str(project["user_id"])
-    return project
+    # projects are written once, and results are content-addressed by result_id
+    etag = make_etag("project", project["_id"], project.get("result_id"))
+    cache_control = f"private, max-age={settings.project_cache_max_age_seconds}"
+    if etag_matches(request, etag):
+        return not_modified(etag, cache_control, vary="Authorization")
+    await attach_results([project])
+
+    # ObjectIds and datetimes are encoded by the response class
+    return FastJSONResponse(project, headers=cache_headers(etag, cache_control, vary="Authorization"))
+
+# Listings return this summary unless heavier fields are requested with ?fields=
+SUMMARY_PROJECTION = {
+    "user_id": 1,
+    "created_at": 1,
+    "type": 1,
+    "input.location": 1,
+    "input.roof_area_m2": 1,
+    "input.roof_type": 1,
+    "input.system_type": 1,
+    "result.feasible": 1,
+    "result.harvestable_volume_m3": 1,
+    "result.recommended_tank_volume_m3": 1,
+    "result.estimated_cost": 1,
+    "result_id": 1,
+}
+OPTIONAL_FIELDS = {"input", "result", "vary"}
+
+def list_projection(fields: str | None) -> dict:
+    projection = dict(SUMMARY_PROJECTION)
+    for field in filter(None, (f.strip() for f in (fields or "").split(","))):
+        if field not in OPTIONAL_FIELDS:
+            raise HTTPException(status_code=400, detail=f"Unknown field '{field}'.")
+        # the whole sub-document replaces its summary paths
+        projection = {k: v for k, v in projection.items() if not k.startswith(field + ".")}
+        projection[field] = 1
+    return projection
+
+async def list_etag(project_col, query: dict, cursor: str | None, limit: int, projection: dict) -> str:
+    """ETag for a list page from the newest matching project and the match count.
+
+    Projects are never updated, so a page can only change when a project is
+    added. The newest one alone misses projects stored out of ``created_at``
+    order (write-behind buffers of several workers, job workers, clock skew),
+    so the count is part of the tag too. Both are index-backed; the full
+    listing uses the collection's metadata count.
+    """
+    newest_query = project_col.find(query, {"created_at": 1}).sort(SORT).limit(1).to_list(1)
+    count_query = project_col.count_documents(query) if query else project_col.estimated_document_count()
+    newest, count = await asyncio.gather(newest_query, count_query)
+    head = (newest[0]["_id"], newest[0]["created_at"]) if newest else None
+    return make_etag("projects", sorted(query.items()), cursor, limit, sorted(projection), head, count)
+
+async def list_page(request: Request, project_col, query: dict, cursor: str | None, limit: int, fields: str | None) -> FastJSONResponse:
+    projection = list_projection(fields)
+    etag = await list_etag(project_col, query, cursor, limit, projection)
+    cache_control = f"public, max-age={settings.project_list_cache_max_age_seconds}"
+    if etag_matches(request, etag):
+        return not_modified(etag, cache_control)
+    try:
+        docs, next_cursor = await fetch_page(project_col, query, cursor, limit, projection)
+    except InvalidCursor:
+        raise HTTPException(status_code=400, detail="Invalid cursor.")
+    # projects reference shared results; attach the same result fields a stored one would show
+    result_fields = None if "result" in projection else [k.split(".", 1)[1] for k in projection if k.startswith("result.")]
+    await attach_results(docs, result_fields)
+    return FastJSONResponse({"items": docs, "next_cursor": next_cursor}, headers=cache_headers(etag, cache_control))
 
 @router.get("/", summary="List all projects")
-async def list_projects(limit: int = 20, skip: int = 0, project_col = Depends(get_project_collection)):
-    cursor = project_col.find().skip(skip).limit(limit)
-    projects = []
-    async for doc in cursor:
-        projects.append(objid_to_str(doc))
-    return projects
+async def list_projects(request: Request, limit: int = Query(20, ge=1, le=100), cursor: str | None = None, fields: str | None = None, project_col = Depends(get_project_collection)):
+    return await list_page(request, project_col, {}, cursor, limit, fields)
 
 @router.get("/user/{user_id}", summary="List projects by user")
-async def list_projects_by_user(user_id: str, limit: int = 20, skip: int = 0, project_col = Depends(get_project_collection)):
+async def list_projects_by_user(user_id: str, request: Request, limit: int = Query(20, ge=1, le=100), cursor: str | None = None, fields: str | None = None, project_col = Depends(get_project_collection)):
     if not ObjectId.is_valid(user_id):
         raise HTTPException(status_code=400, detail="Invalid user ID.")
 
-    cursor = project_col.find({"user_id": user_id}).skip(skip).limit(limit)
-    projects = []
-    async for doc in cursor:
-        projects.append(objid_to_str(doc))
-    return projects
+    return await list_page(request, project_col, {"user_id": user_id}, cursor, limit, fields)
@@ -1,23 +1,67 @@
-from app.services.rainfallService import get_average_rainfall
-from fastapi import APIRouter, HTTPException, Query
-from fastapi.responses import JSONResponse
+from app.models.rainfall_model import RainfallBatchRequest
+from app.services.rainfallService import (
+    MAX_YEARS,
+    average_rainfall_version,
+    get_average_rainfall,
+    get_average_rainfall_batch,
+    get_rainfall_stats,
+    seconds_until_window_changes,
+)
+from app.config import settings
+from fastapi import APIRouter, Body, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from app.utils import admission
+from app.utils.http_cache import cache_headers, etag_matches, make_etag, not_modified
+from app.utils.json_response import FastJSONResponse, dumps
 
-router = APIRouter()
+router = APIRouter(default_response_class=FastJSONResponse)
 
 
 @router.get("/average")
 async def average_rainfall(
+    request: Request,
     latitude: float = Query(..., description="Location latitude"),
     longitude: float = Query(..., description="Location longitude"),
+    years: int = Query(5, ge=1, le=MAX_YEARS, description="Number of past years"),
 ):
     """Return average annual rainfall (mm) for the last N years at a location.
 
-    Uses the free Open-Meteo Archive API.
+    Also reports monthly climatology, dry-year rainfall and daily intensity
+    statistics. Uses the free Open-Meteo Archive API. Past years do not change,
+    so responses are cacheable until the window moves on at the new year.
     """
+    etag = make_etag("rainfall", average_rainfall_version(latitude, longitude, years))
+    max_age = min(seconds_until_window_changes(), settings.rainfall_http_max_age_seconds)
+    cache_control = f"public, max-age={max_age}"
+    if etag_matches(request, etag):
+        return not_modified(etag, cache_control)
     try:
-        result = await get_average_rainfall(latitude, longitude, 5)
-        return JSONResponse(content=result, status_code=200)
-    except HTTPException:
+        result = await get_average_rainfall(latitude, longitude, years)
+        return FastJSONResponse(content=result, status_code=200, headers=cache_headers(etag, cache_control))
+    except (HTTPException, admission.Overloaded):
+        # Overloaded is answered with 503 and Retry-After by the app
         raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/average/batch")
+async def average_rainfall_batch(payload: RainfallBatchRequest = Body(...)):
+    """Stream average annual rainfall for many locations as NDJSON.
+
+    One line per location, emitted as each site finishes; failed sites get an
+    ``error`` field instead of totals.
+    """
+    locations = [(loc.latitude, loc.longitude) for loc in payload.locations]
+
+    async def ndjson():
+        async for row in get_average_rainfall_batch(locations, payload.years):
+            yield dumps(row) + b"\n"
+
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+
+@router.get("/stats")
+async def rainfall_stats():
+    """Return cache hit/miss and coalesced-request counters."""
+    return get_rainfall_stats()
@@ -1,9 +1,99 @@
+from typing import Literal
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
     mongodb_url: str = "mongodb://localhost:27017"
     weather_api_key: str = "your_default_api_key"
     port: int = 8000
+    # Explain hot queries at startup and report collection scans
+    db_index_self_check: bool = False
+    # Open-Meteo archive grid is ~0.1 degrees; lookups are snapped to it
+    rainfall_grid_resolution_deg: float = 0.1
+    rainfall_cache_max_entries: int = 4096
+    rainfall_cache_ttl_seconds: int = 24 * 60 * 60
+    # Cached daily series are dropped after this long without a write
+    rainfall_series_retention_days: int = 400
+    # Directory of a prebuilt offline rainfall store (see rainfall_store.py)
+    rainfall_store_path: str | None = None
+    # Batch lookups: locations per archive request and parallel requests
+    rainfall_batch_chunk_size: int = 50
+    rainfall_batch_concurrency: int = 4
+    # Batch lookups: cached-series reads in flight at once
+    rainfall_batch_lookup_concurrency: int = 16
+    # Documents per MongoDB batch and per streamed chunk in exports
+    export_batch_size: int = 1000
+    # Stats windows up to this many days are aggregated live, longer ones from rollups
+    stats_live_window_days: int = 31
+    # In-process copy of stored calculation results
+    result_memo_max_entries: int = 10000
+    result_memo_ttl_seconds: int = 60 * 60
+    # Verified access tokens -> current user
+    token_cache_max_entries: int = 10000
+    token_cache_ttl_seconds: int = 60
+    # argon2 worker threads and how many extra calls may wait before 503s
+    password_hash_workers: int = 4
+    password_hash_queue_depth: int = 32
+    # Admission control: calls allowed at once per dependency, and how many
+    # more may wait before requests are shed with 503
+    upstream_max_concurrency: int = 64
+    upstream_queue_depth: int = 64
+    mongo_write_max_concurrency: int = 64
+    mongo_write_queue_depth: int = 256
+    # Per-client token buckets by route class (see app/utils/rate_limit.py):
+    # class -> (requests per minute, burst). Clients are keyed by user id when
+    # the request carries a valid access token, else by IP address
+    rate_limit_enabled: bool = True
+    rate_limits: dict[str, tuple[float, int]] = {
+        "auth": (10, 5),
+        "rainfall": (60, 20),
+        "write": (120, 30),
+        "default": (600, 100),
+    }
+    # "mongo" shares buckets between worker processes and hosts
+    rate_limit_store: Literal["memory", "mongo"] = "memory"
+    rate_limit_max_clients: int = 100000
+    # Take the client IP from X-Forwarded-For (only behind a trusted proxy)
+    rate_limit_trust_forwarded_for: bool = False
+    # Shared outbound HTTP client
+    http_max_connections: int = 100
+    http_max_keepalive_connections: int = 20
+    http_keepalive_expiry_seconds: float = 30.0
+    http_connect_timeout_seconds: float = 5.0
+    http_read_timeout_seconds: float = 60.0
+    http_write_timeout_seconds: float = 10.0
+    http_pool_timeout_seconds: float = 5.0
+    http2_enabled: bool = True
+    http_max_retries: int = 3
+    http_retry_base_delay_seconds: float = 0.5
+    http_retry_max_delay_seconds: float = 10.0
+    # Project inserts from /calculate: "direct" awaits its own insert_one,
+    # "batched" joins concurrent inserts into one insert_many and acks after it,
+    # "write_behind" answers before the insert (buffered writes are lost on a crash)
+    project_write_mode: Literal["direct", "batched", "write_behind"] = "direct"
+    project_write_batch_size: int = 500
+    project_write_flush_ms: float = 5
+    project_write_max_pending: int = 10000
+    # How long a request waits for room in a full buffer before a 503
+    project_write_wait_seconds: float = 5.0
+    # HTTP caching: projects never change, list heads do, past rainfall only at new year
+    project_cache_max_age_seconds: int = 60 * 60
+    project_list_cache_max_age_seconds: int = 10
+    rainfall_http_max_age_seconds: int = 24 * 60 * 60
+    # Background jobs: lease length, heartbeat and idle polling of workers
+    job_lease_seconds: int = 60
+    job_heartbeat_seconds: int = 15
+    job_poll_interval_seconds: float = 1.0
+    job_max_attempts: int = 3
+    job_retry_base_delay_seconds: float = 5.0
+    job_worker_concurrency: int = 4
+    # Finished jobs and their results are kept this long
+    job_retention_days: int = 7
+    # Serve Prometheus metrics at /metrics
+    metrics_enabled: bool = True
+    # Sample stacks of requests slower than this; 0 disables the profiler
+    slow_request_threshold_ms: float = 0
+    slow_request_sample_interval_ms: float = 10
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8")
 
 settings=Settings()
\ No newline at end of file
@@ -0,0 +1,211 @@
+"""Batched inserts for documents written once and never updated.
+
+``BufferedWriter`` collects documents from concurrent requests and inserts
+them with one ``insert_many(ordered=False)`` per batch, flushing when a batch
+fills up or ``flush_interval`` after the first document arrived. Ids are
+assigned on ``add`` so callers can answer before the write happens.
+
+Two durability modes share the buffer:
+
+* ``add(doc, wait=True)`` returns once the batch holding ``doc`` is stored:
+  the same guarantee as ``insert_one``, with the round trip and journal
+  commit amortized over every request in the batch.
+* ``add(doc, wait=False)`` returns immediately (write-behind). Documents
+  still buffered when the process dies are lost.
+
+When ``max_pending`` documents are waiting, ``add`` blocks until a flush
+frees room, so a slow database pushes back on callers instead of growing
+the buffer without bound.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable
+
+from bson import ObjectId
+from pymongo.errors import BulkWriteError, PyMongoError
+
+DUPLICATE_KEY = 11000
+
+
+class WriterBusy(Exception):
+    """The buffer stayed full for longer than the caller was willing to wait."""
+
+
+class _Entry:
+    __slots__ = ("doc", "context", "future")
+
+    def __init__(self, doc: dict, context: Any, future: asyncio.Future | None):
+        self.doc = doc
+        self.context = context
+        self.future = future
+
+
+class BufferedWriter:
+    def __init__(
+        self,
+        get_collection: Callable[[], Awaitable[Any]],
+        batch_size: int = 500,
+        flush_interval: float = 0.005,
+        max_pending: int = 10000,
+        on_flush: Callable[[list[tuple[dict, Any]]], Awaitable[None]] | None = None,
+        max_retries: int = 5,
+        name: str = "writer",
+    ):
+        self._get_collection = get_collection
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.on_flush = on_flush
+        self.max_retries = max_retries
+        self.name = name
+        self._buffer: list[_Entry] = []
+        # buffered and in-flight documents by id, for read-your-writes
+        self._unflushed: dict[ObjectId, dict] = {}
+        self._wakeup = asyncio.Event()
+        self._full = asyncio.Event()
+        self._space = asyncio.Condition()
+        self._task: asyncio.Task | None = None
+        self._closing = False
+        self.inserted = 0
+        self.batches = 0
+        self.failed = 0
+
+    def start(self) -> None:
+        if self._task is None:
+            self._closing = False
+            self._task = asyncio.create_task(self._run(), name=f"{self.name}-flusher")
+
+    async def close(self) -> None:
+        """Flush everything still buffered, then stop."""
+        if self._task is None:
+            return
+        self._closing = True
+        self._wakeup.set()
+        self._full.set()
+        await self._task
+        self._task = None
+
+    def __len__(self) -> int:
+        return len(self._unflushed)
+
+    def get(self, _id: ObjectId) -> dict | None:
+        doc = self._unflushed.get(_id)
+        return dict(doc) if doc is not None else None
+
+    async def add(self, doc: dict, context: Any = None, wait: bool = True, timeout: float | None = None) -> ObjectId:
+        """Queue ``doc`` for insertion and return its ``_id``.
+
+        ``context`` is handed to ``on_flush`` with the document once it is
+        stored. Raises ``WriterBusy`` if the buffer stays full for ``timeout``
+        seconds, and with ``wait=True`` re-raises a failed insert.
+        """
+        if self._task is None or self._closing:
+            raise RuntimeError(f"{self.name} is not running")
+        if len(self._unflushed) >= self.max_pending:
+            try:
+                async with self._space:
+                    await asyncio.wait_for(
+                        self._space.wait_for(lambda: len(self._unflushed) < self.max_pending), timeout
+                    )
+            except TimeoutError:
+                raise WriterBusy(f"{self.name} has {len(self._unflushed)} documents waiting")
+
+        doc.setdefault("_id", ObjectId())
+        future = asyncio.get_running_loop().create_future() if wait else None
+        self._buffer.append(_Entry(doc, context, future))
+        self._unflushed[doc["_id"]] = doc
+        self._wakeup.set()
+        if len(self._buffer) >= self.batch_size:
+            self._full.set()
+        if future is not None:
+            await future
+        return doc["_id"]
+
+    async def _run(self) -> None:
+        while True:
+            if not self._buffer:
+                if self._closing:
+                    return
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            if len(self._buffer) < self.batch_size and not self._closing:
+                # give concurrent requests a moment to join the batch
+                self._full.clear()
+                try:
+                    await asyncio.wait_for(self._full.wait(), self.flush_interval)
+                except TimeoutError:
+                    pass
+            batch = self._buffer[: self.batch_size]
+            del self._buffer[: self.batch_size]
+            try:
+                await self._write(batch)
+            except Exception as e:
+                # whatever went wrong with this batch, later ones still get flushed
+                print(f"{self.name}: flushing {len(batch)} documents failed: {e}")
+                await self._settle(batch, {i: e for i in range(len(batch))})
+
+    async def _write(self, batch: list[_Entry]) -> None:
+        errors: dict[int, Exception] = {}
+        for attempt in range(self.max_retries + 1):
+            try:
+                collection = await self._get_collection()
+                await collection.insert_many([entry.doc for entry in batch], ordered=False)
+                break
+            except BulkWriteError as e:
+                # unordered: the rest went in; a duplicate id means an earlier attempt stored it
+                errors = {
+                    err["index"]: PyMongoError(err.get("errmsg", "write error"))
+                    for err in e.details.get("writeErrors", [])
+                    if err.get("code") != DUPLICATE_KEY
+                }
+                break
+            except PyMongoError as e:
+                if attempt == self.max_retries:
+                    errors = {i: e for i in range(len(batch))}
+                    break
+                delay = min(0.1 * 2**attempt, 5.0)
+                print(f"{self.name}: insert of {len(batch)} documents failed ({e}), retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+            except Exception as e:
+                # e.g. a document BSON cannot encode; retrying will not help
+                errors = {i: e for i in range(len(batch))}
+                break
+
+        stored = await self._settle(batch, errors)
+        if stored and self.on_flush is not None:
+            try:
+                await self.on_flush(stored)
+            except Exception as e:
+                print(f"{self.name}: post-flush hook failed: {e}")
+
+    async def _settle(self, batch: list[_Entry], errors: dict[int, Exception]) -> list[tuple[dict, Any]]:
+        """Resolve the batch's waiters and free its room; return what was stored."""
+        stored = []
+        for index, entry in enumerate(batch):
+            self._unflushed.pop(entry.doc["_id"], None)
+            error = errors.get(index)
+            if error is None:
+                stored.append((entry.doc, entry.context))
+            if entry.future is not None and not entry.future.done():
+                if error is None:
+                    entry.future.set_result(None)
+                else:
+                    entry.future.set_exception(error)
+        self.batches += 1
+        self.inserted += len(stored)
+        self.failed += len(errors)
+        if errors:
+            print(f"{self.name}: {len(errors)} of {len(batch)} documents could not be stored")
+
+        async with self._space:
+            self._space.notify_all()
+        return stored
+
+    def stats(self) -> dict:
+        return {
+            "pending": len(self._unflushed),
+            "batches": self.batches,
+            "inserted": self.inserted,
+            "failed": self.failed,
+        }
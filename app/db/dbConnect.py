@@ -1,5 +1,6 @@
 from pymongo import AsyncMongoClient
 from ..config import settings
+from ..utils.metrics import MongoCommandListener
 
 client = None
 db = None
@@ -8,7 +9,7 @@ db = None
 async def connect_db():
     try:
         global client, db
-        client = AsyncMongoClient(settings.mongodb_url)
+        client = AsyncMongoClient(settings.mongodb_url, event_listeners=[MongoCommandListener()])
         db = client["rainwater-harvesting"]
         print("Connected to the database successfully")
         return True
@@ -45,3 +46,48 @@ async def get_project_collection():
         if not connected or db is None:
             raise RuntimeError("Database is not connected")
     return db.get_collection("projects")
+
+async def get_rainfall_cache_collection():
+    global db
+    if db is None:
+        # try to establish a connection if not already connected
+        connected = await connect_db()
+        if not connected or db is None:
+            raise RuntimeError("Database is not connected")
+    return db.get_collection("rainfall_cache")
+
+async def get_rollup_collection():
+    global db
+    if db is None:
+        # try to establish a connection if not already connected
+        connected = await connect_db()
+        if not connected or db is None:
+            raise RuntimeError("Database is not connected")
+    return db.get_collection("project_rollups")
+
+async def get_result_collection():
+    global db
+    if db is None:
+        # try to establish a connection if not already connected
+        connected = await connect_db()
+        if not connected or db is None:
+            raise RuntimeError("Database is not connected")
+    return db.get_collection("results")
+
+async def get_job_collection():
+    global db
+    if db is None:
+        # try to establish a connection if not already connected
+        connected = await connect_db()
+        if not connected or db is None:
+            raise RuntimeError("Database is not connected")
+    return db.get_collection("jobs")
+
+async def get_rate_limit_collection():
+    global db
+    if db is None:
+        # try to establish a connection if not already connected
+        connected = await connect_db()
+        if not connected or db is None:
+            raise RuntimeError("Database is not connected")
+    return db.get_collection("rate_limits")
@@ -0,0 +1,201 @@
+"""Index bootstrap and a query-plan self-check.
+
+``ensure_indexes`` runs in the app lifespan; creating an index that already
+exists is a no-op. ``check_query_plans`` explains the hot queries and reports
+any that would fall back to a collection scan. Both can also be run by hand:
+
+    uv run python -m app.db.indexes --check
+"""
+
+import argparse
+import asyncio
+
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING, GEOSPHERE
+from pymongo.errors import PyMongoError
+
+from ..config import settings
+from .dbConnect import (
+    connect_db,
+    disconnect_db,
+    get_job_collection,
+    get_project_collection,
+    get_rainfall_cache_collection,
+    get_rate_limit_collection,
+    get_rollup_collection,
+    get_user_collection,
+)
+
+
+# (collection getter, keys, options); every index is named so changes are visible
+INDEXES = [
+    # login / register look users up by email
+    (get_user_collection, [("email", ASCENDING)], {"name": "email_unique", "unique": True}),
+    # keyset-paginated listings, newest first: all projects and per user
+    (
+        get_project_collection,
+        [("created_at", DESCENDING), ("_id", DESCENDING)],
+        {"name": "created"},
+    ),
+    (
+        get_project_collection,
+        [("user_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+        {"name": "user_created_id"},
+    ),
+    # nearby and per-area queries over a user's projects
+    (get_project_collection, [("user_id", ASCENDING), ("geo", GEOSPHERE)], {"name": "user_geo"}),
+    # rainfall lookups reuse the summary stored on a project in the same cell
+    (
+        get_project_collection,
+        [
+            ("rainfall.cell", ASCENDING),
+            ("rainfall.revision", ASCENDING),
+            ("rainfall.start_year", ASCENDING),
+            ("rainfall.end_year", ASCENDING),
+            ("created_at", DESCENDING),
+        ],
+        {"name": "rainfall_cell_revision", "partialFilterExpression": {"rainfall.cell": {"$exists": True}}},
+    ),
+    # dashboard reads select a window of days
+    (get_rollup_collection, [("day", ASCENDING)], {"name": "day_1"}),
+    # drop cached rainfall cells once they expire
+    (get_rainfall_cache_collection, [("expires_at", ASCENDING)], {"name": "expires_at_1", "expireAfterSeconds": 0}),
+    # workers claim the oldest due job of the most urgent lane
+    (
+        get_job_collection,
+        [("status", ASCENDING), ("priority", ASCENDING), ("run_after", ASCENDING)],
+        {"name": "claim"},
+    ),
+    # expired leases are swept back into the queue
+    (get_job_collection, [("status", ASCENDING), ("lease_until", ASCENDING)], {"name": "lease"}),
+    (
+        get_job_collection,
+        [("user_id", ASCENDING), ("created_at", DESCENDING)],
+        {"name": "user_created"},
+    ),
+    # finished jobs are kept for a while, then dropped
+    (get_job_collection, [("expires_at", ASCENDING)], {"name": "expires_at_1", "expireAfterSeconds": 0}),
+]
+
+# (collection getter, name) of indexes that were replaced and only cost writes now
+RETIRED_INDEXES = [
+    # (user_id, created_at), superseded by user_created_id
+    (get_project_collection, "user_created"),
+    # geo alone, superseded by user_geo now that geo queries are per user
+    (get_project_collection, "geo"),
+    # (cell, start_year, end_year, created_at), superseded by rainfall_cell_revision
+    (get_project_collection, "rainfall_cell"),
+]
+
+
+async def ensure_indexes() -> None:
+    """Create every index, one at a time, so a conflict only skips that index."""
+    for get_collection, name in RETIRED_INDEXES:
+        try:
+            collection = await get_collection()
+            if name in await collection.index_information():
+                await collection.drop_index(name)
+                print(f"Dropped retired index {collection.name}.{name}")
+        except PyMongoError as e:
+            print(f"Could not drop index {name}: {e}")
+
+    indexes = list(INDEXES)
+    if settings.rate_limit_store == "mongo":
+        # idle buckets are full again by the time they expire
+        indexes.append(
+            (get_rate_limit_collection, [("expires_at", ASCENDING)], {"name": "expires_at_1", "expireAfterSeconds": 0})
+        )
+    for get_collection, keys, options in indexes:
+        try:
+            collection = await get_collection()
+            await collection.create_index(keys, **options)
+        except PyMongoError as e:
+            print(f"Could not create index {options['name']}: {e}")
+
+
+async def _hot_queries():
+    """(name, cursor) pairs mirroring the queries the API runs most."""
+    users = await get_user_collection()
+    projects = await get_project_collection()
+    sample_id = ObjectId()
+    return [
+        ("users by email", users.find({"email": "self-check@example.com"}).limit(1)),
+        (
+            "projects by user",
+            projects.find({"user_id": str(sample_id)})
+            .sort([("created_at", DESCENDING), ("_id", DESCENDING)])
+            .limit(20),
+        ),
+        (
+            "all projects",
+            projects.find({}).sort([("created_at", DESCENDING), ("_id", DESCENDING)]).limit(20),
+        ),
+        (
+            "projects near a point",
+            projects.find(
+                {
+                    "user_id": str(sample_id),
+                    "geo": {"$geoWithin": {"$centerSphere": [[77.59, 12.97], 5 / 6378.1]}},
+                }
+            ).limit(20),
+        ),
+        (
+            "rainfall summary by cell",
+            projects.find(
+                {
+                    "rainfall.cell": {"$eq": "12.9,77.6", "$exists": True},
+                    "rainfall.revision": 1,
+                    "rainfall.start_year": 2015,
+                    "rainfall.end_year": 2024,
+                }
+            )
+            .sort("created_at", DESCENDING)
+            .limit(1),
+        ),
+        (
+            "project by id and user",
+            projects.find({"_id": sample_id, "user_id": str(sample_id)}).limit(1),
+        ),
+    ]
+
+
+def _stages(plan: dict):
+    yield plan.get("stage")
+    for key in ("inputStage", "queryPlan"):
+        if key in plan:
+            yield from _stages(plan[key])
+    for child in plan.get("inputStages", []):
+        yield from _stages(child)
+
+
+async def check_query_plans() -> list[str]:
+    """Explain the hot queries; return the names of those doing a COLLSCAN."""
+    collscans = []
+    for name, cursor in await _hot_queries():
+        explain = await cursor.explain()
+        winning = explain.get("queryPlanner", {}).get("winningPlan", {})
+        if "COLLSCAN" in _stages(winning):
+            collscans.append(name)
+    for name in collscans:
+        print(f"Index self-check: '{name}' uses a collection scan")
+    return collscans
+
+
+async def _main(check: bool) -> int:
+    await connect_db()
+    try:
+        await ensure_indexes()
+        print("Indexes are in place")
+        if check:
+            return 1 if await check_query_plans() else 0
+        return 0
+    finally:
+        await disconnect_db()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Create MongoDB indexes")
+    parser.add_argument(
+        "--check", action="store_true", help="explain hot queries and report COLLSCANs"
+    )
+    raise SystemExit(asyncio.run(_main(parser.parse_args().check)))
@@ -0,0 +1,120 @@
+"""Job types: payload model and the coroutine that runs them.
+
+A handler receives a ``JobContext`` and its validated payload and returns a
+JSON-serializable result, which is stored on the job document. Raising
+``HTTPException`` with a 4xx status marks the input as bad and the job is
+failed without retries; any other exception is retried.
+"""
+
+import hashlib
+import time
+from typing import Any, Awaitable, Callable
+
+from bson import ObjectId
+from pydantic import BaseModel
+
+from app.db.dbConnect import get_project_collection
+from app.models.project_model import ProjectBatchCreate, ProjectCreate
+from app.models.rainfall_model import RainfallAverageRequest, RainfallBatchRequest
+from app.services.project_creation import create_project, create_projects
+from app.services.rainfallService import get_average_rainfall, get_average_rainfall_batch
+
+from . import queue
+
+# Rooftops stored per round trip in batch calculation jobs
+BATCH_CHUNK_SIZE = 1000
+
+
+class JobContext:
+    """What a running handler knows about its job; reports progress."""
+
+    def __init__(self, job: dict, worker_id: str):
+        self.job_id: ObjectId = job["_id"]
+        self.user_id: str = job["user_id"]
+        self.attempt: int = job["attempts"]
+        self.worker_id = worker_id
+        self._last_report = 0.0
+
+    async def progress(self, done: int, total: int, message: str | None = None, force: bool = False) -> None:
+        # at most one write a second; the heartbeat task keeps the lease alive meanwhile
+        now = time.monotonic()
+        if not force and now - self._last_report < 1.0 and done < total:
+            return
+        self._last_report = now
+        await queue.heartbeat(self.job_id, self.worker_id, {"done": done, "total": total, "message": message})
+
+
+Handler = Callable[[JobContext, Any], Awaitable[Any]]
+
+
+def job_project_id(job_id: ObjectId, index: int) -> ObjectId:
+    """The id of the ``index``-th project a job creates, the same on every attempt.
+
+    A retried job inserts the same ids again, so projects stored by an
+    earlier attempt are recognised as duplicates instead of created twice.
+    The job's timestamp is kept so ids still sort roughly by creation time.
+    """
+    digest = hashlib.sha256(job_id.binary + index.to_bytes(4, "big")).digest()
+    return ObjectId(job_id.binary[:4] + digest[:8])
+
+
+async def run_calculate(ctx: JobContext, payload: ProjectCreate) -> dict:
+    project_col = await get_project_collection()
+    return await create_project(ctx.user_id, payload.input, project_col, job_project_id(ctx.job_id, 0))
+
+
+async def run_calculate_batch(ctx: JobContext, payload: ProjectBatchCreate) -> dict:
+    """Vectorized rule-of-thumb rooftops in chunks, simulated ones one by one."""
+    project_col = await get_project_collection()
+    inputs = payload.inputs
+    total = len(inputs)
+    project_ids: list[str | None] = [None] * total
+    results: list[dict | None] = [None] * total
+    done = 0
+
+    simple = [i for i, inp in enumerate(inputs) if inp.sizing_method != "simulation"]
+    for start in range(0, len(simple), BATCH_CHUNK_SIZE):
+        chunk = simple[start:start + BATCH_CHUNK_SIZE]
+        created = await create_projects(
+            ctx.user_id,
+            [inputs[i] for i in chunk],
+            project_col,
+            [job_project_id(ctx.job_id, i) for i in chunk],
+        )
+        for i, project_id, result in zip(chunk, created["project_ids"], created["results"]):
+            project_ids[i], results[i] = project_id, result
+        done += len(chunk)
+        await ctx.progress(done, total)
+
+    for i, inp in enumerate(inputs):
+        if inp.sizing_method == "simulation":
+            created = await create_project(ctx.user_id, inp, project_col, job_project_id(ctx.job_id, i))
+            project_ids[i], results[i] = created["project_id"], created["result"]
+            done += 1
+            await ctx.progress(done, total)
+
+    return {"project_ids": project_ids, "results": results}
+
+
+async def run_rainfall_average(ctx: JobContext, payload: RainfallAverageRequest) -> dict:
+    return await get_average_rainfall(payload.latitude, payload.longitude, payload.years)
+
+
+async def run_rainfall_batch(ctx: JobContext, payload: RainfallBatchRequest) -> dict:
+    locations = [(loc.latitude, loc.longitude) for loc in payload.locations]
+    rows: list[dict | None] = [None] * len(locations)
+    done = 0
+    async for row in get_average_rainfall_batch(locations, payload.years):
+        rows[row["index"]] = row
+        done += 1
+        await ctx.progress(done, len(locations))
+    return {"rows": rows}
+
+
+# job type -> (payload model, handler)
+HANDLERS: dict[str, tuple[type[BaseModel], Handler]] = {
+    "calculate": (ProjectCreate, run_calculate),
+    "calculate_batch": (ProjectBatchCreate, run_calculate_batch),
+    "rainfall_average": (RainfallAverageRequest, run_rainfall_average),
+    "rainfall_batch": (RainfallBatchRequest, run_rainfall_batch),
+}
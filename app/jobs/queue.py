@@ -0,0 +1,181 @@
+"""MongoDB-backed job queue.
+
+Each job is one document in the ``jobs`` collection. A worker claims the most
+urgent due job with a single ``find_one_and_update`` that flips it from
+``queued`` to ``running`` and stamps a lease; only the lease holder may
+report progress or finish it. A worker that dies stops renewing its lease,
+and ``requeue_expired`` hands the job to another worker (or fails it once
+its attempts are used up).
+
+Status flow: queued -> running -> succeeded | failed, with failed attempts
+going back to queued after a backoff, and queued jobs cancellable.
+"""
+
+from datetime import datetime, timedelta, timezone
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import ReturnDocument
+
+from app.config import settings
+from app.db.dbConnect import get_job_collection
+from app.utils.admission import mongo_writes
+
+# Lanes map to priorities; lower runs first
+LANES = {"high": 0, "default": 1, "bulk": 2}
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED = (SUCCEEDED, FAILED, CANCELLED)
+
+
+class LeaseLost(Exception):
+    """The job was reclaimed or cancelled while this worker held it."""
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _object_id(job_id: str | ObjectId) -> ObjectId | None:
+    try:
+        return ObjectId(job_id)
+    except (InvalidId, TypeError):
+        return None
+
+
+def _finished(now: datetime) -> dict:
+    return {"finished_at": now, "expires_at": now + timedelta(days=settings.job_retention_days)}
+
+
+async def submit(job_type: str, payload: dict, user_id: str, lane: str = "default", max_attempts: int | None = None) -> str:
+    now = _now()
+    doc = {
+        "type": job_type,
+        "payload": payload,
+        "user_id": user_id,
+        "lane": lane,
+        "priority": LANES[lane],
+        "status": QUEUED,
+        "attempts": 0,
+        "max_attempts": max_attempts or settings.job_max_attempts,
+        "run_after": now,
+        "progress": None,
+        "result": None,
+        "error": None,
+        "created_at": now,
+        "updated_at": now,
+    }
+    jobs = await get_job_collection()
+    async with mongo_writes:
+        res = await jobs.insert_one(doc)
+    return str(res.inserted_id)
+
+
+async def claim(worker_id: str, lanes: list[str] | None = None) -> dict | None:
+    """Atomically take the next due job, most urgent lane first."""
+    now = _now()
+    query = {"status": QUEUED, "run_after": {"$lte": now}}
+    if lanes:
+        query["priority"] = {"$in": [LANES[lane] for lane in lanes]}
+    jobs = await get_job_collection()
+    return await jobs.find_one_and_update(
+        query,
+        {
+            "$set": {
+                "status": RUNNING,
+                "worker": worker_id,
+                "lease_until": now + timedelta(seconds=settings.job_lease_seconds),
+                "started_at": now,
+                "updated_at": now,
+            },
+            "$inc": {"attempts": 1},
+        },
+        sort=[("priority", 1), ("run_after", 1)],
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+async def _update_held(job_id: ObjectId, worker_id: str, update: dict) -> None:
+    jobs = await get_job_collection()
+    res = await jobs.update_one({"_id": job_id, "status": RUNNING, "worker": worker_id}, update)
+    if res.matched_count == 0:
+        raise LeaseLost(str(job_id))
+
+
+async def heartbeat(job_id: ObjectId, worker_id: str, progress: dict | None = None) -> None:
+    """Extend the lease, optionally recording progress; raises ``LeaseLost``."""
+    now = _now()
+    fields = {"lease_until": now + timedelta(seconds=settings.job_lease_seconds), "updated_at": now}
+    if progress is not None:
+        fields["progress"] = progress
+    await _update_held(job_id, worker_id, {"$set": fields})
+
+
+async def complete(job_id: ObjectId, worker_id: str, result) -> None:
+    now = _now()
+    await _update_held(job_id, worker_id, {
+        "$set": {"status": SUCCEEDED, "result": result, "error": None, "updated_at": now, **_finished(now)},
+        "$unset": {"lease_until": "", "worker": ""},
+    })
+
+
+async def fail(job: dict, worker_id: str, error: str, retry: bool = True) -> None:
+    """Record a failed attempt; requeue with backoff while attempts remain."""
+    now = _now()
+    if retry and job["attempts"] < job["max_attempts"]:
+        delay = settings.job_retry_base_delay_seconds * 2 ** (job["attempts"] - 1)
+        fields = {"status": QUEUED, "run_after": now + timedelta(seconds=delay)}
+    else:
+        fields = {"status": FAILED, **_finished(now)}
+    await _update_held(job["_id"], worker_id, {
+        "$set": {**fields, "error": error, "updated_at": now},
+        "$unset": {"lease_until": "", "worker": ""},
+    })
+
+
+async def requeue_expired() -> int:
+    """Return jobs whose worker stopped renewing the lease to the queue."""
+    now = _now()
+    jobs = await get_job_collection()
+    expired = {"status": RUNNING, "lease_until": {"$lt": now}}
+    exhausted = await jobs.update_many(
+        {**expired, "$expr": {"$gte": ["$attempts", "$max_attempts"]}},
+        {
+            "$set": {"status": FAILED, "error": "Worker lease expired", "updated_at": now, **_finished(now)},
+            "$unset": {"lease_until": "", "worker": ""},
+        },
+    )
+    requeued = await jobs.update_many(
+        expired,
+        {
+            "$set": {"status": QUEUED, "run_after": now, "error": "Worker lease expired", "updated_at": now},
+            "$unset": {"lease_until": "", "worker": ""},
+        },
+    )
+    return exhausted.modified_count + requeued.modified_count
+
+
+async def get_job(job_id: str, user_id: str, projection: dict | None = None) -> dict | None:
+    object_id = _object_id(job_id)
+    if object_id is None:
+        return None
+    jobs = await get_job_collection()
+    return await jobs.find_one({"_id": object_id, "user_id": user_id}, projection)
+
+
+async def cancel(job_id: str, user_id: str) -> bool:
+    """Cancel a job that has not started yet."""
+    object_id = _object_id(job_id)
+    if object_id is None:
+        return False
+    now = _now()
+    jobs = await get_job_collection()
+    res = await jobs.update_one(
+        {"_id": object_id, "user_id": user_id, "status": QUEUED},
+        {"$set": {"status": CANCELLED, "updated_at": now, **_finished(now)}},
+    )
+    return res.modified_count == 1
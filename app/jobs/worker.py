@@ -0,0 +1,181 @@
+"""Job worker processes.
+
+Each process runs an event loop that claims jobs and executes up to
+``--concurrency`` of them at a time; start several processes to use more
+cores. Workers only talk to MongoDB, so they scale independently of the API:
+
+    uv run python -m app.jobs.worker --processes 4 --concurrency 4
+    uv run python -m app.jobs.worker --lanes high          # reserved capacity
+
+Delivery is at least once: a job whose worker dies mid-run is picked up again
+once its lease expires.
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import signal
+import socket
+import time
+
+from fastapi import HTTPException
+from pydantic import ValidationError
+
+from app.config import settings
+from app.db import dbConnect
+from app.utils import http_client
+
+from . import queue
+from .handlers import HANDLERS, JobContext
+
+
+class Worker:
+    def __init__(self, worker_id: str, concurrency: int, lanes: list[str] | None = None):
+        self.worker_id = worker_id
+        self.concurrency = concurrency
+        self.lanes = lanes
+        self.processed = 0
+
+    async def run(self, stop: asyncio.Event) -> None:
+        """Claim and run jobs until ``stop`` is set, then drain running ones."""
+        slots = asyncio.Semaphore(self.concurrency)
+        running: set[asyncio.Task] = set()
+        last_sweep = 0.0
+        while not stop.is_set():
+            if time.monotonic() - last_sweep >= settings.job_heartbeat_seconds:
+                last_sweep = time.monotonic()
+                try:
+                    if requeued := await queue.requeue_expired():
+                        print(f"Requeued {requeued} job(s) with expired leases")
+                except Exception as e:
+                    print(f"Could not sweep expired job leases: {e}")
+
+            await slots.acquire()
+            job = None
+            try:
+                job = await queue.claim(self.worker_id, self.lanes)
+            except Exception as e:
+                print(f"Could not claim a job: {e}")
+            if job is None:
+                slots.release()
+                # idle: wait for the next poll unless asked to stop
+                try:
+                    await asyncio.wait_for(stop.wait(), settings.job_poll_interval_seconds)
+                except TimeoutError:
+                    pass
+                continue
+
+            task = asyncio.create_task(self.execute(job))
+            running.add(task)
+            task.add_done_callback(running.discard)
+            task.add_done_callback(lambda _: slots.release())
+
+        if running:
+            print(f"Waiting for {len(running)} running job(s) to finish")
+            await asyncio.gather(*running, return_exceptions=True)
+
+    async def execute(self, job: dict) -> None:
+        job_id = job["_id"]
+        entry = HANDLERS.get(job["type"])
+        if entry is None:
+            await self._fail(job, f"Unknown job type '{job['type']}'", retry=False)
+            return
+        model, handler = entry
+        beat = asyncio.create_task(self._keep_lease(job_id, asyncio.current_task()))
+        try:
+            result = await handler(JobContext(job, self.worker_id), model.model_validate(job["payload"]))
+            await queue.complete(job_id, self.worker_id, result)
+            self.processed += 1
+        except queue.LeaseLost:
+            print(f"Lost the lease on job {job_id}; another worker owns it now")
+        except asyncio.CancelledError:
+            if beat.done() and isinstance(beat.exception(), queue.LeaseLost):
+                print(f"Lost the lease on job {job_id}; another worker owns it now")
+                return
+            raise
+        except ValidationError as e:
+            await self._fail(job, str(e), retry=False)
+        except HTTPException as e:
+            await self._fail(job, str(e.detail), retry=e.status_code >= 500)
+        except Exception as e:
+            await self._fail(job, f"{type(e).__name__}: {e}", retry=True)
+        finally:
+            beat.cancel()
+
+    async def _keep_lease(self, job_id, runner: asyncio.Task) -> None:
+        while True:
+            await asyncio.sleep(settings.job_heartbeat_seconds)
+            try:
+                await queue.heartbeat(job_id, self.worker_id)
+            except queue.LeaseLost:
+                # someone else holds the job now; stop doing the work twice
+                runner.cancel()
+                raise
+            except Exception as e:
+                print(f"Heartbeat for job {job_id} failed: {e}")
+
+    async def _fail(self, job: dict, error: str, retry: bool) -> None:
+        print(f"Job {job['_id']} ({job['type']}) attempt {job['attempts']} failed: {error}")
+        try:
+            await queue.fail(job, self.worker_id, error, retry=retry)
+        except queue.LeaseLost:
+            pass
+
+
+async def serve(concurrency: int, lanes: list[str] | None) -> None:
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    await dbConnect.connect_db()
+    await http_client.start_http_client()
+    worker = Worker(f"{socket.gethostname()}:{os.getpid()}", concurrency, lanes)
+    print(f"Worker {worker.worker_id} started (concurrency {concurrency}, lanes {lanes or 'all'})")
+    try:
+        await worker.run(stop)
+    finally:
+        await http_client.close_http_client()
+        await dbConnect.disconnect_db()
+        print(f"Worker {worker.worker_id} stopped after {worker.processed} job(s)")
+
+
+def _process_main(concurrency: int, lanes: list[str] | None) -> None:
+    asyncio.run(serve(concurrency, lanes))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run background job workers")
+    parser.add_argument("--processes", type=int, default=1, help="worker processes to start")
+    parser.add_argument("--concurrency", type=int, default=settings.job_worker_concurrency, help="jobs run at once per process")
+    parser.add_argument("--lanes", type=lambda v: v.split(","), default=None, help=f"comma-separated subset of {', '.join(queue.LANES)}")
+    args = parser.parse_args()
+    if args.lanes and set(args.lanes) - queue.LANES.keys():
+        parser.error(f"lanes must be among {', '.join(queue.LANES)}")
+
+    if args.processes == 1:
+        _process_main(args.concurrency, args.lanes)
+        return
+
+    ctx = multiprocessing.get_context("spawn")
+    procs = [
+        ctx.Process(target=_process_main, args=(args.concurrency, args.lanes), name=f"job-worker-{i}")
+        for i in range(args.processes)
+    ]
+    for proc in procs:
+        proc.start()
+
+    def forward(signum, frame):
+        for proc in procs:
+            if proc.is_alive():
+                os.kill(proc.pid, signal.SIGTERM)
+
+    signal.signal(signal.SIGTERM, forward)
+    signal.signal(signal.SIGINT, forward)
+    for proc in procs:
+        proc.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -2,21 +2,48 @@ from functools import lru_cache
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from .api.v1 import auth, rainfall, project_routes
-from .db import dbConnect
+from fastapi.responses import PlainTextResponse
+from .api.v1 import auth, rainfall, project_routes, job_routes
+from .db import dbConnect, indexes
+from .services import project_creation
+from .utils import admission, http_client, metrics
+from .utils.rate_limit import RateLimitMiddleware
+from .utils.request_metrics import MetricsMiddleware, SlowRequestProfiler
 from . import config
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup: Connect to the database
     await dbConnect.connect_db()
+    try:
+        await indexes.ensure_indexes()
+        if config.settings.db_index_self_check:
+            await indexes.check_query_plans()
+    except Exception as e:
+        print(f"Could not create database indexes: {e}")
+    # Shared pooled client for upstream APIs
+    await http_client.start_http_client()
+    # Batched project inserts, if enabled
+    await project_creation.start_project_writer()
     yield
-    # Shutdown: Disconnect from the database
+    # Shutdown: Store buffered projects, close upstream connections and disconnect from the database
+    await project_creation.stop_project_writer()
+    await http_client.close_http_client()
     await dbConnect.disconnect_db()
 
 
 app = FastAPI(title="Rainwater Harvesting API", version="1.0.0", lifespan=lifespan)
 
+
+@app.exception_handler(admission.Overloaded)
+async def overloaded_handler(request, exc: admission.Overloaded):
+    return admission.overloaded_response(exc)
+
+
+# Inside CORS, so 429s carry CORS headers and preflights are never limited
+if config.settings.rate_limit_enabled:
+    app.add_middleware(RateLimitMiddleware)
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -26,6 +53,20 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Added last so it wraps everything, including CORS preflights
+if config.settings.metrics_enabled:
+    profiler = None
+    if config.settings.slow_request_threshold_ms > 0:
+        profiler = SlowRequestProfiler(
+            threshold=config.settings.slow_request_threshold_ms / 1000,
+            interval=config.settings.slow_request_sample_interval_ms / 1000,
+        )
+    app.add_middleware(MetricsMiddleware, profiler=profiler)
+
+    @app.get("/metrics", include_in_schema=False)
+    async def prometheus_metrics():
+        return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 @lru_cache
 def get_settings():
     return config.Settings()
@@ -33,3 +74,4 @@ def get_settings():
 app.include_router(auth.router, prefix="/api/v1/auth")
 app.include_router(rainfall.router, prefix="/api/v1/rainfall")
 app.include_router(project_routes.router, prefix="/api/v1/projects")
+app.include_router(job_routes.router, prefix="/api/v1/jobs")
@@ -0,0 +1,13 @@
+from typing import Literal
+
+from pydantic import BaseModel, Field
+
+JobType = Literal["calculate", "calculate_batch", "rainfall_average", "rainfall_batch"]
+
+
+class JobSubmit(BaseModel):
+    type: JobType
+    # validated against the job type's own model on submit
+    payload: dict
+    lane: Literal["high", "default", "bulk"] = "default"
+    max_attempts: int | None = Field(default=None, ge=1, le=10)
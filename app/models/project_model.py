@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 from datetime import datetime
 from typing import Literal, Optional
 
@@ -11,6 +11,19 @@ class RooftopInput(BaseModel):
     num_occupants: int = Field(gt=0)
     system_type: Literal["storage", "recharge", "hybrid"] = "storage"
     soil_type: Optional[Literal["sand", "loam", "clay"]] = None
+    # "simulation" sizes the tank with a daily water balance over the
+    # location's rainfall series and needs coordinates
+    sizing_method: Literal["rule_of_thumb", "simulation"] = "rule_of_thumb"
+    latitude: Optional[float] = Field(default=None, ge=-90, le=90)
+    longitude: Optional[float] = Field(default=None, ge=-180, le=180)
+
+    @model_validator(mode="after")
+    def check_simulation_coordinates(self):
+        if self.sizing_method == "simulation" and (
+            self.latitude is None or self.longitude is None
+        ):
+            raise ValueError("latitude and longitude are required for simulation sizing")
+        return self
 
 class HarvestResult(BaseModel):
     feasible: bool
@@ -20,13 +33,35 @@ class HarvestResult(BaseModel):
     recharge_pit_details: dict | None = None
     estimated_cost: float
     guidelines: list[str]
+    # Filled in by simulation sizing
+    reliability: float | None = None
+    optimal_tank_volume_m3: float | None = None
+    tank_sizing: dict | None = None
 
 class ProjectCreate(BaseModel):
     input: RooftopInput
 
+class ProjectBatchCreate(BaseModel):
+    inputs: list[RooftopInput] = Field(min_length=1, max_length=10000)
+
 class Project(BaseModel):
     id: str = Field(alias="_id")
     user_id: str
     input: RooftopInput
     result: HarvestResult
     created_at: datetime
+
+class SweepRange(BaseModel):
+    start: float
+    stop: float
+    step: float = Field(gt=0)
+
+class ScenarioSweep(BaseModel):
+    input: RooftopInput
+    # Values (or an inclusive range) to try per field; every combination is evaluated
+    vary: dict[
+        Literal["roof_area_m2", "annual_rainfall_mm", "num_occupants", "roof_type", "system_type"],
+        list[float | str] | SweepRange,
+    ] = Field(min_length=1)
+    output: Literal["table", "pareto"] = "table"
+    persist: bool = False
@@ -0,0 +1,18 @@
+from pydantic import BaseModel, Field
+
+
+class Coordinate(BaseModel):
+    # Range is checked per site so one bad row doesn't reject the batch
+    latitude: float
+    longitude: float
+
+
+class RainfallBatchRequest(BaseModel):
+    locations: list[Coordinate] = Field(min_length=1, max_length=1000)
+    years: int = Field(default=5, ge=1, le=50)
+
+
+class RainfallAverageRequest(BaseModel):
+    latitude: float = Field(ge=-90, le=90)
+    longitude: float = Field(ge=-180, le=180)
+    years: int = Field(default=5, ge=1, le=50)
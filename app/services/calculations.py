@@ -1,4 +1,10 @@
+import math
+
+import numpy as np
+
 from app.models.project_model import RooftopInput, HarvestResult
+from app.services.tank_simulation import size_tank
+from app.utils.metrics import span
 
 ROOF_RUNOFF_COEFF = {
     "RCC": 0.85,
@@ -11,7 +17,39 @@ COST_PER_M3_TANK = 3000  # rupees per m3 (example, tune later)
 COST_PER_M3_RECHARGE = 1500
 FIXED_INSTALLATION_COST = 5000
 
-def calculate_harvest(input_data: RooftopInput) -> HarvestResult:
+# assume one pit, diameter 2m, depth 3m
+RECHARGE_PIT_DIAMETER_M = 2.0
+RECHARGE_PIT_DEPTH_M = 3.0
+RECHARGE_PIT_VOLUME_M3 = (
+    math.pi * (RECHARGE_PIT_DIAMETER_M / 2) ** 2 * RECHARGE_PIT_DEPTH_M
+)
+
+SYSTEM_GUIDELINES = [
+    "Provide first-flush arrangement and filtration unit.",
+    "Clean the rooftop and gutters before monsoon.",
+    "Ensure overflow is directed safely away from building foundation.",
+]
+RECHARGE_GUIDELINE = "Recharge pit should be at least 10 m away from septic tanks."
+
+
+def _recharge_pit_details() -> dict:
+    return {
+        "diameter_m": RECHARGE_PIT_DIAMETER_M,
+        "depth_m": RECHARGE_PIT_DEPTH_M,
+        "volume_m3": RECHARGE_PIT_VOLUME_M3,
+        "note": "Dimensions can be refined based on soil percolation tests."
+    }
+
+@span("calculate_harvest")
+def calculate_harvest(
+    input_data: RooftopInput, daily_rainfall_mm: np.ndarray | None = None
+) -> HarvestResult:
+    """Size a rooftop harvesting system.
+
+    When ``daily_rainfall_mm`` is given and the input asks for simulation
+    sizing, the tank is sized by a daily water-balance simulation instead of
+    the 0.25 * V / 30-day-demand rule.
+    """
     # 1. Runoff coefficient
     C = ROOF_RUNOFF_COEFF.get(input_data.roof_type, 0.7)
 
@@ -43,22 +81,16 @@ def calculate_harvest(input_data: RooftopInput) -> HarvestResult:
     daily_demand_m3 = (input_data.num_occupants * 70) / 1000.0
     demand_30_days = daily_demand_m3 * 30
 
+    sizing = None
     if input_data.system_type in ("storage", "hybrid"):
         recommended_tank = min(0.25 * V, demand_30_days)
+        if input_data.sizing_method == "simulation" and daily_rainfall_mm is not None:
+            sizing = size_tank(daily_rainfall_mm, input_data.roof_area_m2, C, daily_demand_m3)
+            recommended_tank = sizing["optimal_tank_volume_m3"]
 
     # 5. Recharge pit sizing (very simplified)
     if input_data.system_type in ("recharge", "hybrid"):
-        # assume one pit, diameter 2m, depth 3m
-        import math
-        diameter = 2.0
-        depth = 3.0
-        pit_volume = math.pi * (diameter / 2) ** 2 * depth
-        recharge_details = {
-            "diameter_m": diameter,
-            "depth_m": depth,
-            "volume_m3": pit_volume,
-            "note": "Dimensions can be refined based on soil percolation tests."
-        }
+        recharge_details = _recharge_pit_details()
 
     # 6. Cost estimation
     cost = FIXED_INSTALLATION_COST
@@ -69,13 +101,9 @@ def calculate_harvest(input_data: RooftopInput) -> HarvestResult:
         cost += recharge_details["volume_m3"] * COST_PER_M3_RECHARGE
 
     # 7. Guidelines
-    guidelines = [
-        "Provide first-flush arrangement and filtration unit.",
-        "Clean the rooftop and gutters before monsoon.",
-        "Ensure overflow is directed safely away from building foundation.",
-    ]
+    guidelines = list(SYSTEM_GUIDELINES)
     if input_data.system_type in ("recharge", "hybrid"):
-        guidelines.append("Recharge pit should be at least 10 m away from septic tanks.")
+        guidelines.append(RECHARGE_GUIDELINE)
 
     return HarvestResult(
         feasible=feasible,
@@ -87,4 +115,123 @@ def calculate_harvest(input_data: RooftopInput) -> HarvestResult:
         recharge_pit_details=recharge_details,
         estimated_cost=round(cost, 2),
         guidelines=guidelines,
+        reliability=round(sizing["reliability"], 4) if sizing else None,
+        optimal_tank_volume_m3=(
+            round(sizing["optimal_tank_volume_m3"], 2) if sizing else None
+        ),
+        tank_sizing=(
+            {"simulated_days": sizing["simulated_days"], **sizing["curves"]}
+            if sizing
+            else None
+        ),
+    )
+
+
+def harvest_columns(
+    roof_area_m2: np.ndarray,
+    annual_rainfall_mm: np.ndarray,
+    runoff_coeff: np.ndarray,
+    num_occupants: np.ndarray,
+    has_tank: np.ndarray,
+    has_recharge: np.ndarray,
+) -> dict[str, np.ndarray]:
+    """Columnar core of ``calculate_harvest`` for N rooftops at once.
+
+    Arithmetic is done in the same order as the scalar function, so every
+    value is bit-identical before rounding. Returns unrounded columns:
+    ``harvestable_volume_m3``, ``recommended_tank_volume_m3`` (0 where there
+    is no tank), ``estimated_cost``, ``area_ok``, ``rainfall_ok``, ``feasible``.
+    """
+    R_m = annual_rainfall_mm / 1000.0
+    V = roof_area_m2 * R_m * runoff_coeff
+
+    area_ok = roof_area_m2 >= 20
+    rainfall_ok = annual_rainfall_mm >= 300
+
+    daily_demand_m3 = (num_occupants * 70) / 1000.0
+    demand_30_days = daily_demand_m3 * 30
+    tank = np.where(has_tank, np.minimum(0.25 * V, demand_30_days), 0.0)
+
+    cost = (
+        FIXED_INSTALLATION_COST
+        + np.where(tank != 0, tank * COST_PER_M3_TANK, 0.0)
+        + np.where(has_recharge, RECHARGE_PIT_VOLUME_M3 * COST_PER_M3_RECHARGE, 0.0)
     )
+    return {
+        "harvestable_volume_m3": V,
+        "recommended_tank_volume_m3": tank,
+        "estimated_cost": cost,
+        "area_ok": area_ok,
+        "rainfall_ok": rainfall_ok,
+        "feasible": area_ok & rainfall_ok,
+    }
+
+
+@span("calculate_harvest", "batch")
+def calculate_harvest_batch(inputs: list[RooftopInput]) -> list[dict]:
+    """Vectorized ``calculate_harvest`` for many rooftops.
+
+    Returns plain dicts shaped like ``HarvestResult.model_dump()`` without
+    building a pydantic model per row; values match the scalar function
+    exactly. Tanks are always sized with the rule of thumb.
+    """
+    if not inputs:
+        return []
+    cols = harvest_columns(
+        np.array([i.roof_area_m2 for i in inputs], dtype=np.float64),
+        np.array([i.annual_rainfall_mm for i in inputs], dtype=np.float64),
+        np.array(
+            [ROOF_RUNOFF_COEFF.get(i.roof_type, 0.7) for i in inputs], dtype=np.float64
+        ),
+        np.array([i.num_occupants for i in inputs], dtype=np.int64),
+        np.array([i.system_type in ("storage", "hybrid") for i in inputs]),
+        np.array([i.system_type in ("recharge", "hybrid") for i in inputs]),
+    )
+    return [
+        _result_row(inp, *row)
+        for inp, row in zip(
+            inputs,
+            zip(
+                cols["harvestable_volume_m3"].tolist(),
+                cols["recommended_tank_volume_m3"].tolist(),
+                cols["estimated_cost"].tolist(),
+                cols["area_ok"].tolist(),
+                cols["rainfall_ok"].tolist(),
+            ),
+        )
+    ]
+
+
+def _result_row(
+    input_data: RooftopInput,
+    V: float,
+    tank: float,
+    cost: float,
+    area_ok: bool,
+    rainfall_ok: bool,
+) -> dict:
+    reasons = []
+    if not area_ok:
+        reasons.append("Roof area is less than 20 m².")
+    if not rainfall_ok:
+        reasons.append("Annual rainfall is very low (< 300 mm).")
+    if area_ok and rainfall_ok:
+        reasons.append("Rooftop area and rainfall are adequate for RTRWH.")
+
+    recharge = input_data.system_type in ("recharge", "hybrid")
+    guidelines = list(SYSTEM_GUIDELINES)
+    if recharge:
+        guidelines.append(RECHARGE_GUIDELINE)
+
+    return {
+        "feasible": area_ok and rainfall_ok,
+        "feasibility_reasons": reasons,
+        "harvestable_volume_m3": round(V, 2),
+        "recommended_tank_volume_m3": round(tank, 2) if tank else None,
+        "recharge_pit_details": _recharge_pit_details() if recharge else None,
+        "estimated_cost": round(cost, 2),
+        "guidelines": guidelines,
+        "reliability": None,
+        "optimal_tank_volume_m3": None,
+        "tank_sizing": None,
+    }
@@ -0,0 +1,179 @@
+"""Calculate and store projects; shared by the API routes and job workers.
+
+Single-project inserts go through ``project_writer`` when the app runs with
+``project_write_mode`` "batched" or "write_behind" (see
+``app/db/buffered_writer.py``); job workers and scripts insert directly.
+
+Callers that may repeat a creation (job retries) pass the project ids
+themselves; projects whose id is already stored are taken as created
+earlier and are not inserted or counted in the rollups again.
+"""
+
+from datetime import datetime
+
+from bson import ObjectId
+from fastapi import HTTPException, status
+from pymongo.errors import BulkWriteError
+
+from app.config import settings
+from app.db.buffered_writer import DUPLICATE_KEY, BufferedWriter, WriterBusy
+from app.db.dbConnect import get_project_collection
+from app.models.project_model import RooftopInput
+from app.services.calculations import calculate_harvest, calculate_harvest_batch
+from app.services.project_geo import geo_fields
+from app.services.project_stats import record_projects
+from app.services.rainfallService import get_daily_rainfall, rainfall_snapshot
+from app.services.result_memo import get_result, result_key, store_results
+from app.services.tank_simulation import SIMULATION_YEARS
+from app.utils.admission import mongo_writes
+
+
+project_writer: BufferedWriter | None = None
+
+
+async def _record_flushed(stored: list[tuple[dict, dict]]) -> None:
+    # rollups are updated once per flushed batch rather than per request
+    await record_projects([{**doc, "result": result} for doc, result in stored])
+
+
+async def start_project_writer() -> None:
+    global project_writer
+    if settings.project_write_mode == "direct" or project_writer is not None:
+        return
+    project_writer = BufferedWriter(
+        get_project_collection,
+        batch_size=settings.project_write_batch_size,
+        flush_interval=settings.project_write_flush_ms / 1000,
+        max_pending=settings.project_write_max_pending,
+        on_flush=_record_flushed,
+        name="project-writer",
+    )
+    project_writer.start()
+
+
+async def stop_project_writer() -> None:
+    global project_writer
+    if project_writer is not None:
+        await project_writer.close()
+        project_writer = None
+
+
+async def _insert_new(project_col, docs: list[dict]) -> list[dict]:
+    """Insert ``docs``; return those that were not stored already."""
+    try:
+        async with mongo_writes:
+            await project_col.insert_many(docs, ordered=False)
+    except BulkWriteError as e:
+        errors = e.details.get("writeErrors", [])
+        if any(err.get("code") != DUPLICATE_KEY for err in errors):
+            raise
+        existing = {err["index"] for err in errors}
+        return [doc for i, doc in enumerate(docs) if i not in existing]
+    return docs
+
+
+def pending_project(project_id: ObjectId, user_id: str) -> dict | None:
+    """A project accepted by the writer but not stored yet."""
+    if project_writer is None:
+        return None
+    doc = project_writer.get(project_id)
+    return doc if doc is not None and doc["user_id"] == user_id else None
+
+
+async def create_project(
+    user_id: str, rooftop: RooftopInput, project_col, project_id: ObjectId | None = None
+) -> dict:
+    # 1. Reuse the stored result for an identical input, else run calculations
+    #    (with the daily series when the tank is simulated)
+    result_id = result_key(rooftop)
+    result = await get_result(result_id)
+    rainfall = None
+    if result is None:
+        daily_rainfall = None
+        if rooftop.sizing_method == "simulation":
+            dates, daily_rainfall = await get_daily_rainfall(
+                rooftop.latitude, rooftop.longitude, SIMULATION_YEARS
+            )
+            # keep the cell's summary so nearby lookups can reuse it
+            rainfall = rainfall_snapshot(
+                rooftop.latitude, rooftop.longitude, SIMULATION_YEARS, dates, daily_rainfall
+            )
+        result = calculate_harvest(rooftop, daily_rainfall).model_dump()
+        await store_results({result_id: (rooftop, result)})
+
+    # 2. Save to MongoDB, referencing the shared result
+    project_doc = {
+        "user_id": user_id,
+        "input": rooftop.model_dump(),
+        "result_id": result_id,
+        "created_at": datetime.utcnow(),
+        **geo_fields(rooftop),
+    }
+    if rainfall is not None:
+        project_doc["rainfall"] = rainfall
+
+    if project_id is not None:
+        project_doc["_id"] = project_id
+        if await _insert_new(project_col, [project_doc]):
+            await record_projects([{**project_doc, "result": result}])
+    elif project_writer is not None:
+        try:
+            project_id = await project_writer.add(
+                project_doc,
+                result,
+                wait=settings.project_write_mode == "batched",
+                timeout=settings.project_write_wait_seconds,
+            )
+        except WriterBusy:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server is busy, please retry shortly",
+                headers={"Retry-After": "1"},
+            )
+    else:
+        async with mongo_writes:
+            res = await project_col.insert_one(project_doc)
+        project_id = project_doc["_id"] = res.inserted_id
+        await record_projects([{**project_doc, "result": result}])
+
+    return {
+        "project_id": str(project_id),
+        "result": result,
+    }
+
+
+async def create_projects(
+    user_id: str,
+    rooftops: list[RooftopInput],
+    project_col,
+    project_ids: list[ObjectId] | None = None,
+) -> dict:
+    """Rule-of-thumb sizing for many rooftops in one vectorized pass."""
+    # 1. Run calculations for every rooftop at once
+    results = calculate_harvest_batch(rooftops)
+
+    # 2. Store each distinct result once and the projects in one round trip
+    result_ids = [result_key(rooftop) for rooftop in rooftops]
+    await store_results({key: (rooftop, result) for key, rooftop, result in zip(result_ids, rooftops, results)})
+    if project_ids is None:
+        project_ids = [ObjectId() for _ in rooftops]
+    created_at = datetime.utcnow()
+    project_docs = [
+        {
+            "_id": project_id,
+            "user_id": user_id,
+            "input": rooftop.model_dump(),
+            "result_id": key,
+            "created_at": created_at,
+            **geo_fields(rooftop),
+        }
+        for project_id, rooftop, key in zip(project_ids, rooftops, result_ids)
+    ]
+    result_by_id = dict(zip(project_ids, results))
+    created = await _insert_new(project_col, project_docs)
+    await record_projects([{**doc, "result": result_by_id[doc["_id"]]} for doc in created])
+
+    return {
+        "project_ids": [str(_id) for _id in project_ids],
+        "results": results,
+    }
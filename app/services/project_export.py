@@ -0,0 +1,193 @@
+"""Streaming export of project documents as NDJSON, CSV or Parquet.
+
+Documents are read from a MongoDB cursor and encoded in small chunks, so
+memory stays flat however many projects are exported. CSV and Parquet
+flatten ``input`` and ``result`` into dotted columns.
+
+NDJSON and CSV send the first document (and the CSV header) as soon as it
+is read, then double the chunk size up to ``export_batch_size``, so the
+first byte does not wait for a full batch. The cursor should likewise open
+with a small first batch (``FIRST_BATCH_SIZE``).
+"""
+
+import csv
+import io
+import json
+from typing import AsyncIterator
+
+from app.config import settings
+from app.utils.json_response import dumps
+
+# (column, type) for the columnar formats; nested dicts/lists are JSON strings
+COLUMNS = [
+    ("_id", "str"),
+    ("user_id", "str"),
+    ("type", "str"),
+    ("created_at", "datetime"),
+    ("input.location", "str"),
+    ("input.roof_area_m2", "float"),
+    ("input.roof_type", "str"),
+    ("input.annual_rainfall_mm", "float"),
+    ("input.use_type", "str"),
+    ("input.num_occupants", "int"),
+    ("input.system_type", "str"),
+    ("input.soil_type", "str"),
+    ("input.sizing_method", "str"),
+    ("input.latitude", "float"),
+    ("input.longitude", "float"),
+    ("result.feasible", "bool"),
+    ("result.feasibility_reasons", "json"),
+    ("result.harvestable_volume_m3", "float"),
+    ("result.recommended_tank_volume_m3", "float"),
+    ("result.recharge_pit_details.diameter_m", "float"),
+    ("result.recharge_pit_details.depth_m", "float"),
+    ("result.recharge_pit_details.volume_m3", "float"),
+    ("result.estimated_cost", "float"),
+    ("result.guidelines", "json"),
+    ("result.reliability", "float"),
+    ("result.optimal_tank_volume_m3", "float"),
+]
+
+# Documents in the cursor's first batch; later batches use export_batch_size
+FIRST_BATCH_SIZE = 16
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+def _lookup(doc: dict, path: str):
+    value = doc
+    for part in path.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+def flatten(doc: dict) -> dict:
+    """One export row: every known column, ``None`` where the document lacks it."""
+    row = {}
+    for column, kind in COLUMNS:
+        value = _lookup(doc, column)
+        if value is None:
+            row[column] = None
+        elif kind == "str":
+            row[column] = str(value)
+        elif kind == "json":
+            row[column] = json.dumps(value)
+        else:
+            row[column] = value
+    return row
+
+
+def _chunk_sizes():
+    """Rows per chunk: 1, 2, 4, ... up to ``export_batch_size``."""
+    size = 1
+    while True:
+        yield size
+        size = min(size * 2, settings.export_batch_size)
+
+
+async def export_ndjson(cursor) -> AsyncIterator[bytes]:
+    sizes = _chunk_sizes()
+    limit = next(sizes)
+    lines = []
+    async for doc in cursor:
+        # same encoding as the API responses (ISO-8601 datetimes, string ids)
+        lines.append(dumps(doc))
+        if len(lines) >= limit:
+            yield b"\n".join(lines) + b"\n"
+            lines = []
+            limit = next(sizes)
+    if lines:
+        yield b"\n".join(lines) + b"\n"
+
+
+async def export_csv(cursor) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=[c for c, _ in COLUMNS])
+    writer.writeheader()
+    yield buffer.getvalue().encode()
+    buffer.seek(0)
+    buffer.truncate()
+    sizes = _chunk_sizes()
+    limit = next(sizes)
+    rows = 0
+    async for doc in cursor:
+        row = flatten(doc)
+        if row["created_at"] is not None:
+            row["created_at"] = row["created_at"].isoformat()
+        writer.writerow(row)
+        rows += 1
+        if rows >= limit:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+            rows = 0
+            limit = next(sizes)
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+class _Drain(io.RawIOBase):
+    """Write-only sink whose contents are handed out as they arrive."""
+
+    def __init__(self):
+        self.chunks: list[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def parquet_available() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+async def export_parquet(cursor) -> AsyncIterator[bytes]:
+    """Parquet with one row group per ``export_batch_size`` documents (needs pyarrow)."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    types = {
+        "str": pa.string(),
+        "json": pa.string(),
+        "float": pa.float64(),
+        "int": pa.int64(),
+        "bool": pa.bool_(),
+        "datetime": pa.timestamp("ms"),
+    }
+    schema = pa.schema([(column, types[kind]) for column, kind in COLUMNS])
+    sink = _Drain()
+    writer = pq.ParquetWriter(sink, schema)
+    rows = []
+    try:
+        async for doc in cursor:
+            rows.append(flatten(doc))
+            if len(rows) >= settings.export_batch_size:
+                writer.write_table(pa.Table.from_pylist(rows, schema=schema))
+                rows = []
+                yield sink.drain()
+        if rows:
+            writer.write_table(pa.Table.from_pylist(rows, schema=schema))
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+EXPORTERS = {"ndjson": export_ndjson, "csv": export_csv, "parquet": export_parquet}
@@ -0,0 +1,94 @@
+"""Project locations as GeoJSON points.
+
+Projects whose input carries coordinates store them as ``geo``, a GeoJSON
+point behind a ``2dsphere`` index, so nearby and per-area queries only walk
+the index cells that cover the search area. Projects created before ``geo``
+existed can be backfilled server-side with:
+
+    uv run python -m app.services.project_geo backfill
+"""
+
+import argparse
+import asyncio
+
+from app.db.dbConnect import connect_db, disconnect_db, get_project_collection
+from app.models.project_model import RooftopInput
+
+EARTH_RADIUS_KM = 6378.1
+
+
+def geo_point(rooftop: RooftopInput) -> dict | None:
+    if rooftop.latitude is None or rooftop.longitude is None:
+        return None
+    # GeoJSON order is [longitude, latitude]
+    return {"type": "Point", "coordinates": [rooftop.longitude, rooftop.latitude]}
+
+
+def geo_fields(rooftop: RooftopInput) -> dict:
+    """Fields to add to a project document for its location, if it has one."""
+    point = geo_point(rooftop)
+    return {"geo": point} if point else {}
+
+
+def within_radius(latitude: float, longitude: float, radius_km: float) -> dict:
+    return {"$geoWithin": {"$centerSphere": [[longitude, latitude], radius_km / EARTH_RADIUS_KM]}}
+
+
+async def nearby_projects(
+    user_id: str,
+    latitude: float,
+    longitude: float,
+    radius_km: float,
+    limit: int,
+    projection: dict,
+) -> list[dict]:
+    """A user's projects within ``radius_km``, nearest first, with ``distance_m``."""
+    projects = await get_project_collection()
+    cursor = await projects.aggregate([
+        {
+            "$geoNear": {
+                "near": {"type": "Point", "coordinates": [longitude, latitude]},
+                "key": "geo",
+                "distanceField": "distance_m",
+                "maxDistance": radius_km * 1000,
+                "spherical": True,
+                # scenario sweeps are stored alongside projects but are not projects
+                "query": {"user_id": user_id, "type": {"$exists": False}},
+            }
+        },
+        {"$limit": limit},
+        {"$project": {**projection, "distance_m": 1}},
+    ])
+    docs = await cursor.to_list(limit)
+    for doc in docs:
+        doc["distance_m"] = round(doc["distance_m"], 1)
+    return docs
+
+
+async def backfill_geo() -> int:
+    """Set ``geo`` on stored projects that have coordinates but no point yet."""
+    projects = await get_project_collection()
+    res = await projects.update_many(
+        {
+            "geo": {"$exists": False},
+            "input.latitude": {"$type": "number"},
+            "input.longitude": {"$type": "number"},
+        },
+        [{"$set": {"geo": {"type": "Point", "coordinates": ["$input.longitude", "$input.latitude"]}}}],
+    )
+    return res.modified_count
+
+
+async def _main() -> None:
+    await connect_db()
+    try:
+        print(f"Added locations to {await backfill_geo()} project(s)")
+    finally:
+        await disconnect_db()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Project location maintenance")
+    parser.add_argument("command", choices=["backfill"])
+    parser.parse_args()
+    asyncio.run(_main())
@@ -0,0 +1,240 @@
+"""Aggregate project statistics for dashboards.
+
+Small windows are aggregated live over the projects collection. Large
+windows read ``project_rollups``: one document per day and
+(user, location, roof type, system type) with running totals, which
+``record_projects`` increments whenever projects are inserted. Rollups for
+existing history can be rebuilt with:
+
+    uv run python -m app.services.project_stats rebuild
+"""
+
+import argparse
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from pymongo import UpdateOne
+
+from app.config import settings
+from app.services.result_memo import result_lookup_stages
+from app.db.dbConnect import (
+    connect_db,
+    disconnect_db,
+    get_project_collection,
+    get_rollup_collection,
+)
+
+# group_by name -> field in project documents / in rollup documents
+GROUP_FIELDS = {
+    "user": ("user_id", "user_id"),
+    "location": ("input.location", "location"),
+    "roof_type": ("input.roof_type", "roof_type"),
+    "system_type": ("input.system_type", "system_type"),
+}
+# Summed measures and the result field they come from
+MEASURES = {
+    "harvestable_volume_m3": "result.harvestable_volume_m3",
+    "recommended_tank_volume_m3": "result.recommended_tank_volume_m3",
+    "estimated_cost": "result.estimated_cost",
+}
+
+
+def _naive_utc(moment: datetime | None) -> datetime | None:
+    """Stored timestamps are naive UTC; bring query bounds to the same form."""
+    if moment is None or moment.tzinfo is None:
+        return moment
+    return moment.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def _day(moment: datetime) -> datetime:
+    return datetime(moment.year, moment.month, moment.day)
+
+
+def _rollup_id(day: datetime, dims: dict) -> str:
+    return "|".join([day.strftime("%Y-%m-%d"), *(str(dims[f]) for f in sorted(dims))])
+
+
+async def record_projects(docs: list[dict]) -> None:
+    """Add newly inserted project documents to the daily rollups."""
+    ops = []
+    for doc in docs:
+        day = _day(doc["created_at"])
+        dims = {
+            "user_id": doc.get("user_id"),
+            "location": doc["input"].get("location"),
+            "roof_type": doc["input"].get("roof_type"),
+            "system_type": doc["input"].get("system_type"),
+        }
+        result = doc["result"]
+        inc = {"projects": 1, "feasible": int(bool(result.get("feasible")))}
+        for measure in MEASURES:
+            inc[measure] = result.get(measure) or 0.0
+        ops.append(
+            UpdateOne(
+                {"_id": _rollup_id(day, dims)},
+                {"$inc": inc, "$setOnInsert": {"day": day, **dims}},
+                upsert=True,
+            )
+        )
+    if not ops:
+        return
+    try:
+        rollups = await get_rollup_collection()
+        await rollups.bulk_write(ops, ordered=False)
+    except Exception as e:
+        print(f"Project rollup update failed: {e}")
+
+
+def _pipeline(
+    group_by: list[str],
+    bucket: str | None,
+    match: dict,
+    source: str,
+) -> list[dict]:
+    rollup = source == "rollup"
+    time_field = "$day" if rollup else "$created_at"
+    key = {
+        name: "$" + GROUP_FIELDS[name][1 if rollup else 0] for name in group_by
+    }
+    if bucket:
+        key["bucket"] = {"$dateTrunc": {"date": time_field, "unit": bucket}}
+
+    if rollup:
+        sums = {field: {"$sum": "$" + field} for field in ("projects", "feasible", *MEASURES)}
+    else:
+        sums = {
+            "projects": {"$sum": 1},
+            "feasible": {"$sum": {"$cond": ["$result.feasible", 1, 0]}},
+            **{m: {"$sum": {"$ifNull": ["$" + path, 0]}} for m, path in MEASURES.items()},
+        }
+
+    return [
+        {"$match": match},
+        *([] if rollup else result_lookup_stages()),
+        {"$group": {"_id": key, **sums}},
+        {"$sort": {"_id": 1}},
+    ]
+
+
+async def project_stats(
+    group_by: list[str],
+    bucket: str | None = None,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    filters: dict | None = None,
+    source: str = "auto",
+    within: dict | None = None,
+) -> dict:
+    """Totals per group (and time bucket) of projects created in ``[start, end)``.
+
+    ``source="auto"`` uses the rollups unless the window is shorter than
+    ``settings.stats_live_window_days``; rollups are day-granular, so their
+    window is widened to whole days. ``within`` is a ``geo`` condition
+    (see ``project_geo.within_radius``); rollups have no location, so it
+    always aggregates live.
+    """
+    start, end = _naive_utc(start), _naive_utc(end)
+    if within is not None:
+        source = "live"
+    elif source == "auto":
+        short = start and (end or datetime.utcnow()) - start <= timedelta(
+            days=settings.stats_live_window_days
+        )
+        source = "live" if short else "rollup"
+
+    rollup = source == "rollup"
+    match: dict = {}
+    time_field = "day" if rollup else "created_at"
+    if start or end:
+        match[time_field] = {}
+        if start:
+            match[time_field]["$gte"] = _day(start) if rollup else start
+        if end:
+            match[time_field]["$lt"] = end
+    for name, value in (filters or {}).items():
+        match[GROUP_FIELDS[name][1 if rollup else 0]] = value
+    if not rollup:
+        # scenario sweeps are stored alongside projects but are not projects
+        match["type"] = {"$exists": False}
+    if within is not None:
+        match["geo"] = within
+
+    col = await (get_rollup_collection() if rollup else get_project_collection())
+    cursor = await col.aggregate(_pipeline(group_by, bucket, match, source))
+
+    groups = []
+    async for row in cursor:
+        group = dict(row.pop("_id"))
+        projects = row["projects"]
+        groups.append(
+            {
+                **group,
+                "projects": projects,
+                "feasible": row["feasible"],
+                "feasible_share": round(row["feasible"] / projects, 4) if projects else 0.0,
+                **{m: round(row[m], 2) for m in MEASURES},
+            }
+        )
+    return {"source": source, "groups": groups}
+
+
+async def rebuild_rollups() -> None:
+    """Recompute every rollup from the projects collection."""
+    projects = await get_project_collection()
+    rollups = await get_rollup_collection()
+    await rollups.delete_many({})
+    day = {"$dateTrunc": {"date": "$created_at", "unit": "day"}}
+    dims = {"user_id": "$user_id", **{f: "$input." + f for f in ("location", "roof_type", "system_type")}}
+    await (
+        await projects.aggregate(
+            [
+                {"$match": {"type": {"$exists": False}}},
+                *result_lookup_stages(),
+                {
+                    "$group": {
+                        "_id": {"day": day, **dims},
+                        "projects": {"$sum": 1},
+                        "feasible": {"$sum": {"$cond": ["$result.feasible", 1, 0]}},
+                        **{m: {"$sum": {"$ifNull": ["$" + p, 0]}} for m, p in MEASURES.items()},
+                    }
+                },
+                {
+                    "$set": {
+                        "day": "$_id.day",
+                        **{f: "$_id." + f for f in dims},
+                        "_id": {
+                            "$concat": [
+                                {"$dateToString": {"date": "$_id.day", "format": "%Y-%m-%d"}},
+                                *(
+                                    x
+                                    for f in sorted(dims)
+                                    # str(None) == "None" in record_projects
+                                    for x in (
+                                        "|",
+                                        {"$ifNull": [{"$toString": "$_id." + f}, "None"]},
+                                    )
+                                ),
+                            ]
+                        },
+                    }
+                },
+                {"$merge": {"into": "project_rollups", "whenMatched": "replace"}},
+            ]
+        )
+    ).to_list()
+
+
+async def _main(command: str):
+    await connect_db()
+    try:
+        if command == "rebuild":
+            await rebuild_rollups()
+            print("Project rollups rebuilt")
+    finally:
+        await disconnect_db()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Project statistics tools")
+    parser.add_argument("command", choices=["rebuild"])
+    asyncio.run(_main(parser.parse_args().command))
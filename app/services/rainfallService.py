@@ -1,7 +1,56 @@
 """Rainfall data service using Open-Meteo historical weather API."""
 
-from datetime import date, timedelta
-import httpx
+import asyncio
+from datetime import date, datetime, timedelta, timezone
+from typing import AsyncIterator
+
+import numpy as np
+
+from app.config import settings
+from app.db.dbConnect import get_project_collection
+from app.services import rainfall_cache, rainfall_store
+from app.services.rainfall_aggregation import (
+    join_years,
+    rainfall_statistics,
+    split_years,
+    to_arrays,
+    year_complete,
+)
+from app.utils.http_client import request_with_retry
+from app.utils.single_flight import SingleFlight
+
+ARCHIVE_URL = "https://archive-api.open-meteo.com/v1/archive"
+# The archive starts in 1940
+MAX_YEARS = 50
+# Bump when the fields or maths of the rainfall summary change
+SUMMARY_REVISION = 1
+
+# Concurrent misses for the same cell and years share one upstream fetch
+rainfall_fetches = SingleFlight()
+
+
+def _year_range(years: int) -> tuple[int, int]:
+    today = date.today()
+    # We take full calendar years ending last year (current year may be incomplete)
+    end_year = today.year - 1
+    start_year = end_year - years + 1
+    return start_year, end_year
+
+
+def average_rainfall_version(latitude: float, longitude: float, years: int) -> str:
+    """Identify what ``get_average_rainfall`` would return, without computing it.
+
+    The summary depends only on the grid cell and the year window, which
+    moves on at the turn of the year.
+    """
+    start_year, end_year = _year_range(years)
+    cell = rainfall_cache.cache_key(latitude, longitude, start_year, end_year)
+    return f"{SUMMARY_REVISION}:{cell}:{latitude}:{longitude}:{years}"
+
+
+def seconds_until_window_changes() -> int:
+    now = datetime.now()
+    return max(1, int((datetime(now.year + 1, 1, 1) - now).total_seconds()))
 
 
 async def get_average_rainfall(
@@ -14,68 +63,360 @@ async def get_average_rainfall(
     Uses the free Open-Meteo Archive API (no API key required).
     https://open-meteo.com/en/docs/historical-weather-api
 
+    Cells covered by the offline rainfall store are read locally. Otherwise
+    daily series are cached per grid cell and year, so a lookup near an
+    earlier one reuses its data and a longer or later window only fetches
+    the years that are missing. Concurrent misses for the same cell and years
+    are coalesced into a single fetch. All statistics are derived from the
+    one daily series.
+
     Args:
         latitude: Location latitude.
         longitude: Location longitude.
         years: Number of past years to consider.
 
     Returns:
-        A dict with yearly totals and the computed average, e.g.:
+        A dict with yearly totals, the computed average and sizing statistics, e.g.:
         {
             "latitude": 12.97,
             "longitude": 77.59,
             "years": 5,
             "yearly_totals_mm": {"2019": 900.2, "2020": 850.1, ...},
-            "average_annual_rainfall_mm": 870.5
+            "average_annual_rainfall_mm": 870.5,
+            "dry_year_rainfall_mm": 790.3,
+            "annual_rainfall_percentiles_mm": {"p10": 790.3, "p50": 860.0, "p90": 960.4},
+            "monthly_climatology_mm": [3.1, 8.4, ...],
+            "wet_days_per_year": 61.2,
+            "intensity": {"max_daily_mm": 120.4, "largest_events": [...], ...}
         }
     """
-    today = date.today()
-    # We take full calendar years ending last year (current year may be incomplete)
-    end_year = today.year - 1
-    start_year = end_year - years + 1
+    start_year, end_year = _year_range(years)
+
+    key = rainfall_cache.cache_key(latitude, longitude, start_year, end_year)
+    summary = rainfall_cache.get_cached_summary(key)
+    if summary is None:
+        cell = rainfall_cache.cell_key(latitude, longitude)
+        # the offline store is a local read; only ask the database without it
+        local = rainfall_store.lookup(cell, start_year, end_year)
+        if local is None:
+            summary = await _project_summary(cell, start_year, end_year)
+        expires_at = rainfall_cache.expiry_for(end_year)
+        if summary is None:
+            series = local
+            if series is None:
+                series = await _window_series(latitude, longitude, start_year, end_year)
+            summary = rainfall_statistics(*join_years(series, start_year, end_year))
+            expires_at = _summary_expiry(series, start_year, end_year)
+        rainfall_cache.set_cached_summary(key, summary, expires_at)
+
+    return {
+        "latitude": latitude,
+        "longitude": longitude,
+        "years": years,
+        **summary,
+    }
+
+
+async def get_daily_rainfall(
+    latitude: float,
+    longitude: float,
+    years: int,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Return the daily series behind ``get_average_rainfall``.
+
+    Returns ``(dates, precip_mm)`` as ``datetime64[D]`` / ``float64`` arrays
+    covering the last `years` full calendar years, NaN for missing days.
+    """
+    start_year, end_year = _year_range(years)
+    series = await _window_series(latitude, longitude, start_year, end_year)
+    return join_years(series, start_year, end_year)
+
+
+def rainfall_snapshot(
+    latitude: float, longitude: float, years: int, dates: np.ndarray, precip: np.ndarray
+) -> dict | None:
+    """Summarize a series from ``get_daily_rainfall`` for storing on a project.
+
+    Later lookups for the same cell and window reuse it instead of loading
+    and aggregating the series again. Returns None while the window's last
+    year is incomplete, since a stored summary is never refreshed.
+    """
+    start_year, end_year = _year_range(years)
+    summary = rainfall_statistics(dates, precip)
+    series = split_years(dates, precip, start_year, end_year)
+    rainfall_cache.set_cached_summary(
+        rainfall_cache.cache_key(latitude, longitude, start_year, end_year),
+        summary,
+        _summary_expiry(series, start_year, end_year),
+    )
+    if not _window_complete(series, start_year, end_year):
+        return None
+    return {
+        "cell": rainfall_cache.cell_key(latitude, longitude),
+        "revision": SUMMARY_REVISION,
+        "start_year": start_year,
+        "end_year": end_year,
+        "summary": summary,
+    }
+
+
+async def _project_summary(cell: str, start_year: int, end_year: int) -> dict | None:
+    """Summary stored on the latest project in the same cell and window.
+
+    The summary depends only on the cell's series, so every project in the
+    cell carries the same one and the latest is as good as the nearest.
+    Summaries stored by an older ``SUMMARY_REVISION`` are ignored.
+    """
+    try:
+        projects = await get_project_collection()
+        doc = await projects.find_one(
+            {
+                "rainfall.cell": {"$eq": cell, "$exists": True},
+                "rainfall.revision": SUMMARY_REVISION,
+                "rainfall.start_year": start_year,
+                "rainfall.end_year": end_year,
+            },
+            {"rainfall.summary": 1},
+            sort=[("created_at", -1)],
+        )
+    except Exception as e:
+        print(f"Project rainfall lookup failed: {e}")
+        return None
+    return doc["rainfall"]["summary"] if doc else None
+
+
+async def _window_series(
+    latitude: float, longitude: float, start_year: int, end_year: int
+) -> dict[int, np.ndarray]:
+    """Per-year daily series for the location's cell, fetching missing years."""
+    cell = rainfall_cache.cell_key(latitude, longitude)
+    series = await _known_series(cell, start_year, end_year)
+    missing = _missing_years(series, start_year, end_year)
+    if not missing:
+        return series
+
+    async def fetch_and_cache() -> dict[int, np.ndarray]:
+        fetched = (
+            await _fetch_daily_series([rainfall_cache.cell_center(cell)], *missing)
+        )[0]
+        if isinstance(fetched, Exception):
+            raise fetched
+        await rainfall_cache.add_series(cell, fetched)
+        return fetched
+
+    fetched = await rainfall_fetches.do(
+        f"{cell}:{missing[0]}-{missing[1]}", fetch_and_cache
+    )
+    return {**series, **fetched}
+
+
+async def get_average_rainfall_batch(
+    locations: list[tuple[float, float]],
+    years: int,
+) -> AsyncIterator[dict]:
+    """Yield one result row per location as soon as its data is available.
+
+    Locations are deduplicated by grid cell and their cached series are looked
+    up concurrently. Cache misses are fetched with the archive's
+    multi-coordinate form in chunks of
+    ``settings.rainfall_batch_chunk_size`` and at most
+    ``settings.rainfall_batch_concurrency`` upstream requests run at once.
+    A failing site or chunk only produces error rows for its own sites.
+
+    Rows carry the input ``index`` so callers can match them back, e.g.:
+        {"index": 3, "latitude": 12.97, "longitude": 77.59, "years": 5,
+         "yearly_totals_mm": {...}, "average_annual_rainfall_mm": 870.5, ...}
+        {"index": 4, "latitude": 123.0, "longitude": 77.59, "error": "..."}
+    """
+    start_year, end_year = _year_range(years)
+
+    def row(index: int, summary: dict) -> dict:
+        lat, lon = locations[index]
+        return {"index": index, "latitude": lat, "longitude": lon, "years": years, **summary}
+
+    def error_row(index: int, message: str) -> dict:
+        lat, lon = locations[index]
+        return {"index": index, "latitude": lat, "longitude": lon, "error": message}
+
+    # Group sites by cache key so each grid cell is fetched once
+    sites_by_key: dict[str, list[int]] = {}
+    cells: dict[str, str] = {}
+    for index, (lat, lon) in enumerate(locations):
+        if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+            yield error_row(index, "Coordinates out of range")
+            continue
+        key = rainfall_cache.cache_key(lat, lon, start_year, end_year)
+        sites_by_key.setdefault(key, []).append(index)
+        cells[key] = rainfall_cache.cell_key(lat, lon)
+
+    # Serve what the summary cache covers
+    unsummarized = []
+    for key, indexes in sites_by_key.items():
+        summary = rainfall_cache.get_cached_summary(key)
+        if summary is None:
+            unsummarized.append(key)
+            continue
+        for index in indexes:
+            yield row(index, summary)
+
+    # Look the rest up in the store and series cache concurrently; group
+    # what they lack by the years still needed
+    lookup_slots = asyncio.Semaphore(settings.rainfall_batch_lookup_concurrency)
+
+    async def lookup(key: str) -> tuple[str, dict[int, np.ndarray]]:
+        async with lookup_slots:
+            return key, await _known_series(cells[key], start_year, end_year)
+
+    cached_series: dict[str, dict[int, np.ndarray]] = {}
+    missing_by_range: dict[tuple[int, int], list[str]] = {}
+    lookups = [asyncio.ensure_future(lookup(key)) for key in unsummarized]
+    try:
+        for next_done in asyncio.as_completed(lookups):
+            key, series = await next_done
+            missing = _missing_years(series, start_year, end_year)
+            if missing:
+                cached_series[key] = series
+                missing_by_range.setdefault(missing, []).append(key)
+                continue
+            summary = rainfall_statistics(*join_years(series, start_year, end_year))
+            rainfall_cache.set_cached_summary(
+                key, summary, _summary_expiry(series, start_year, end_year)
+            )
+            for index in sites_by_key[key]:
+                yield row(index, summary)
+    finally:
+        for task in lookups:
+            task.cancel()
+
+    semaphore = asyncio.Semaphore(settings.rainfall_batch_concurrency)
+
+    async def fetch_chunk(
+        keys: list[str], missing: tuple[int, int]
+    ) -> list[tuple[str, dict | Exception]]:
+        async with semaphore:
+            try:
+                fetched = await _fetch_daily_series(
+                    [rainfall_cache.cell_center(cells[k]) for k in keys], *missing
+                )
+            except Exception as e:
+                return [(k, e) for k in keys]
+        results = []
+        for k, years_fetched in zip(keys, fetched):
+            if isinstance(years_fetched, Exception):
+                results.append((k, years_fetched))
+                continue
+            await rainfall_cache.add_series(cells[k], years_fetched)
+            series = {**cached_series[k], **years_fetched}
+            summary = rainfall_statistics(*join_years(series, start_year, end_year))
+            rainfall_cache.set_cached_summary(
+                k, summary, _summary_expiry(series, start_year, end_year)
+            )
+            results.append((k, summary))
+        return results
 
+    chunk_size = settings.rainfall_batch_chunk_size
+    tasks = [
+        asyncio.ensure_future(fetch_chunk(keys[i : i + chunk_size], missing))
+        for missing, keys in missing_by_range.items()
+        for i in range(0, len(keys), chunk_size)
+    ]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            for key, summary in await next_done:
+                for index in sites_by_key[key]:
+                    if isinstance(summary, Exception):
+                        yield error_row(index, str(summary) or type(summary).__name__)
+                    else:
+                        yield row(index, summary)
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def _known_series(
+    cell: str, start_year: int, end_year: int
+) -> dict[int, np.ndarray]:
+    """Series from the offline store if it covers the window, else the cache."""
+    local = rainfall_store.lookup(cell, start_year, end_year)
+    if local is not None:
+        return local
+    return await rainfall_cache.get_series(cell)
+
+
+def _missing_years(
+    series: dict[int, np.ndarray], start_year: int, end_year: int
+) -> tuple[int, int] | None:
+    """Smallest year range that still has to be fetched, or None.
+
+    Years the archive has not finished yet count as missing, so they are
+    fetched again until complete.
+    """
+    missing = [
+        y
+        for y in range(start_year, end_year + 1)
+        if y not in series or not year_complete(series[y])
+    ]
+    if not missing:
+        return None
+    return missing[0], missing[-1]
+
+
+def _window_complete(series: dict[int, np.ndarray], start_year: int, end_year: int) -> bool:
+    return all(year_complete(series[y]) for y in range(start_year, end_year + 1))
+
+
+def _summary_expiry(
+    series: dict[int, np.ndarray], start_year: int, end_year: int
+) -> datetime:
+    """Keep a summary until the window moves on, or briefly if a year is incomplete."""
+    if _window_complete(series, start_year, end_year):
+        return rainfall_cache.expiry_for(end_year)
+    return datetime.now(timezone.utc) + timedelta(seconds=settings.rainfall_cache_ttl_seconds)
+
+
+async def _fetch_daily_series(
+    cells: list[tuple[float, float]],
+    start_year: int,
+    end_year: int,
+) -> list[dict[int, np.ndarray] | Exception]:
+    """Fetch daily series for one or more grid cells in a single archive call.
+
+    Returns the series split by calendar year for each cell, in order; a cell
+    whose payload cannot be parsed gets the exception in its slot instead.
+    """
     start_date = date(start_year, 1, 1)
     end_date = date(end_year, 12, 31)
 
-    url = "https://archive-api.open-meteo.com/v1/archive"
     params = {
-        "latitude": latitude,
-        "longitude": longitude,
+        "latitude": ",".join(str(lat) for lat, _ in cells),
+        "longitude": ",".join(str(lon) for _, lon in cells),
         "start_date": start_date.isoformat(),
         "end_date": end_date.isoformat(),
         "daily": "precipitation_sum",
         "timezone": "auto",
     }
 
-    async with httpx.AsyncClient(timeout=60) as client:
-        resp = await client.get(url, params=params)
-        resp.raise_for_status()
-        data = resp.json()
+    resp = await request_with_retry("GET", ARCHIVE_URL, params=params)
+    data = resp.json()
+    # The archive returns a list only when several coordinates are requested
+    payloads = data if isinstance(data, list) else [data]
+    if len(payloads) != len(cells):
+        raise ValueError("Archive response does not match the requested locations")
 
-    daily = data.get("daily", {})
-    dates = daily.get("time", [])
-    precip = daily.get("precipitation_sum", [])
+    results: list[dict[int, np.ndarray] | Exception] = []
+    for payload in payloads:
+        try:
+            dates, precip = to_arrays(payload.get("daily", {}))
+            results.append(split_years(dates, precip, start_year, end_year))
+        except Exception as e:
+            results.append(e)
+    return results
 
-    # Aggregate by year
-    yearly_totals: dict[int, float] = {}
-    for d, p in zip(dates, precip):
-        if p is None:
-            continue
-        year = int(d[:4])
-        yearly_totals[year] = yearly_totals.get(year, 0.0) + p
-
-    # Round values
-    yearly_totals = {y: round(v, 2) for y, v in sorted(yearly_totals.items())}
-
-    if yearly_totals:
-        average = round(sum(yearly_totals.values()) / len(yearly_totals), 2)
-    else:
-        average = 0.0
 
+def get_rainfall_stats() -> dict:
+    """Cache and request-coalescing counters for the rainfall service."""
     return {
-        "latitude": latitude,
-        "longitude": longitude,
-        "years": years,
-        "yearly_totals_mm": {str(y): v for y, v in yearly_totals.items()},
-        "average_annual_rainfall_mm": average,
+        "series_cache": rainfall_cache.series_cache.stats(),
+        "summary_cache": rainfall_cache.summary_cache.stats(),
+        "upstream": rainfall_fetches.stats(),
     }
@@ -0,0 +1,268 @@
+"""Aggregation of Open-Meteo daily precipitation series.
+
+The archive returns parallel ``time`` / ``precipitation_sum`` lists with
+``None`` for missing days. ``aggregate_daily`` converts them to typed NumPy
+arrays once (missing days become NaN and are excluded explicitly) and computes
+every per-year and per-month statistic with grouped reductions.
+"""
+
+import numpy as np
+
+# Days with at least this much rain count as wet days (WMO convention)
+WET_DAY_THRESHOLD_MM = 1.0
+# Percentile of yearly totals reported as the design "dry year"
+DRY_YEAR_PERCENTILE = 10
+LARGEST_EVENTS = 5
+# A year with more gaps than this, or without its last day, is still being filled in
+MAX_MISSING_DAYS = 7
+
+
+def to_arrays(daily: dict) -> tuple[np.ndarray, np.ndarray]:
+    """Return ``(dates, precip)`` as ``datetime64[D]`` and ``float64`` arrays.
+
+    ``None`` values in the precipitation list become NaN.
+    """
+    times = daily.get("time", [])
+    dates = None
+    if times:
+        # The archive returns a contiguous daily range; avoid parsing every string
+        first = np.datetime64(times[0], "D")
+        last = np.datetime64(times[-1], "D")
+        if int((last - first).astype(np.int64)) + 1 == len(times):
+            dates = np.arange(first, last + np.timedelta64(1, "D"))
+    if dates is None:
+        dates = np.asarray(times, dtype="datetime64[D]")
+    precip = np.asarray(daily.get("precipitation_sum", []), dtype=np.float64)
+    n = min(len(dates), len(precip))
+    return dates[:n], precip[:n]
+
+
+def split_years(
+    dates: np.ndarray, precip: np.ndarray, start_year: int, end_year: int
+) -> dict[int, np.ndarray]:
+    """Cut a daily series into one full-length array per calendar year.
+
+    Every year in ``start_year..end_year`` gets an entry; days the archive
+    did not return are NaN.
+    """
+    years = {}
+    for year in range(start_year, end_year + 1):
+        first = np.datetime64(f"{year}-01-01")
+        days = np.arange(first, np.datetime64(f"{year + 1}-01-01"))
+        values = np.full(days.size, np.nan)
+        in_year = (dates >= first) & (dates < first + days.size)
+        values[(dates[in_year] - first).astype(np.int64)] = precip[in_year]
+        years[year] = values
+    return years
+
+
+def year_complete(values: np.ndarray) -> bool:
+    """True when the archive has finished a year from ``split_years``.
+
+    The archive lags real time by several days, so a year fetched early in
+    January ends in NaNs until the last days are published.
+    """
+    missing = np.isnan(values)
+    return not missing[-1] and int(missing.sum()) <= MAX_MISSING_DAYS
+
+
+def join_years(
+    series: dict[int, np.ndarray], start_year: int, end_year: int
+) -> tuple[np.ndarray, np.ndarray]:
+    """Inverse of ``split_years`` for a window of cached years."""
+    dates = np.arange(
+        np.datetime64(f"{start_year}-01-01"), np.datetime64(f"{end_year + 1}-01-01")
+    )
+    precip = np.concatenate([series[y] for y in range(start_year, end_year + 1)])
+    return dates, precip
+
+
+def aggregate_daily(dates: np.ndarray, precip: np.ndarray) -> dict:
+    """Group a daily series by year and month.
+
+    Sums use ``np.bincount``, which accumulates in input order, so totals are
+    bit-identical to adding the values one by one in Python.
+
+    Returns a dict of arrays:
+        years: calendar years with at least one valid day
+        yearly_totals: rainfall per year (mm)
+        wet_days: days per year with >= WET_DAY_THRESHOLD_MM
+        valid_days: days per year with data
+        annual_max: largest single-day rainfall per year (mm)
+        monthly_totals: (len(years), 12) rainfall per year and month (mm)
+    """
+    valid = ~np.isnan(precip)
+    dates = dates[valid]
+    precip = precip[valid]
+    if precip.size == 0:
+        empty = np.empty(0)
+        return {
+            "years": np.empty(0, dtype=np.int64),
+            "yearly_totals": empty,
+            "wet_days": np.empty(0, dtype=np.int64),
+            "valid_days": np.empty(0, dtype=np.int64),
+            "annual_max": empty,
+            "monthly_totals": np.empty((0, 12)),
+        }
+
+    # Map days to months through the (few) month boundaries instead of
+    # converting every day to a calendar month
+    days = dates.astype(np.int64)
+    first_month = np.datetime64(int(days.min()), "D").astype("datetime64[M]")
+    last_month = np.datetime64(int(days.max()), "D").astype("datetime64[M]")
+    month_starts = (
+        np.arange(first_month, last_month + np.timedelta64(1, "M"))
+        .astype("datetime64[D]")
+        .astype(np.int64)
+    )
+    month_index = (
+        np.searchsorted(month_starts, days, side="right") - 1
+        + first_month.astype(np.int64)
+    )
+    year_index = month_index // 12
+    first = int(year_index.min())
+    year_offset = year_index - first
+    n_years = int(year_offset.max()) + 1
+
+    valid_days = np.bincount(year_offset, minlength=n_years)
+    yearly_totals = np.bincount(year_offset, weights=precip, minlength=n_years)
+    wet_days = np.bincount(
+        year_offset[precip >= WET_DAY_THRESHOLD_MM], minlength=n_years
+    )
+    monthly_totals = np.bincount(
+        year_offset * 12 + month_index % 12, weights=precip, minlength=n_years * 12
+    ).reshape(n_years, 12)
+    annual_max = np.zeros(n_years)
+    np.maximum.at(annual_max, year_offset, precip)
+
+    present = valid_days > 0
+    return {
+        "years": (np.arange(n_years) + first + 1970)[present],
+        "yearly_totals": yearly_totals[present],
+        "wet_days": wet_days[present],
+        "valid_days": valid_days[present],
+        "annual_max": annual_max[present],
+        "monthly_totals": monthly_totals[present],
+    }
+
+
+def percentile_totals(yearly_totals: np.ndarray, percentiles: list[float]) -> list[float]:
+    """Yearly rainfall at the given percentiles (e.g. 10 for a dry year)."""
+    if yearly_totals.size == 0:
+        return [0.0 for _ in percentiles]
+    return np.percentile(yearly_totals, percentiles).tolist()
+
+
+def summarize_daily(daily: dict) -> dict:
+    """Reduce an archive ``daily`` block to yearly totals and their average."""
+    return _yearly_summary(aggregate_daily(*to_arrays(daily)))
+
+
+def _yearly_summary(agg: dict) -> dict:
+    yearly_totals = {
+        y: round(v, 2)
+        for y, v in zip(agg["years"].tolist(), agg["yearly_totals"].tolist())
+    }
+
+    if yearly_totals:
+        average = round(sum(yearly_totals.values()) / len(yearly_totals), 2)
+    else:
+        average = 0.0
+
+    return {
+        "yearly_totals_mm": {str(y): v for y, v in yearly_totals.items()},
+        "average_annual_rainfall_mm": average,
+    }
+
+
+def rainfall_statistics(dates: np.ndarray, precip: np.ndarray) -> dict:
+    """Yearly totals plus the climatology and intensity figures used for sizing.
+
+    Everything is derived from the one daily series: monthly climatology, the
+    dry-year (10th percentile) total, wet-day frequency and the largest daily
+    events, which drive gutter and first-flush sizing.
+    """
+    agg = aggregate_daily(dates, precip)
+    stats = _yearly_summary(agg)
+
+    n_years = len(agg["years"])
+    p10, p50, p90 = percentile_totals(
+        agg["yearly_totals"], [DRY_YEAR_PERCENTILE, 50, 90]
+    )
+    monthly = agg["monthly_totals"].mean(axis=0) if n_years else np.zeros(12)
+
+    stats.update(
+        {
+            "dry_year_rainfall_mm": round(p10, 2),
+            "annual_rainfall_percentiles_mm": {
+                "p10": round(p10, 2),
+                "p50": round(p50, 2),
+                "p90": round(p90, 2),
+            },
+            "monthly_climatology_mm": [round(v, 2) for v in monthly.tolist()],
+            "wet_days_per_year": (
+                round(float(agg["wet_days"].mean()), 1) if n_years else 0.0
+            ),
+            "intensity": _intensity_statistics(dates, precip, agg),
+        }
+    )
+    return stats
+
+
+def _intensity_statistics(dates: np.ndarray, precip: np.ndarray, agg: dict) -> dict:
+    valid = ~np.isnan(precip)
+    dates = dates[valid]
+    precip = precip[valid]
+    if precip.size == 0:
+        return {
+            "max_daily_mm": 0.0,
+            "mean_annual_max_daily_mm": 0.0,
+            "p95_wet_day_mm": 0.0,
+            "p99_wet_day_mm": 0.0,
+            "largest_events": [],
+        }
+
+    wet = precip[precip >= WET_DAY_THRESHOLD_MM]
+    p95, p99 = np.percentile(wet, [95, 99]).tolist() if wet.size else (0.0, 0.0)
+
+    k = min(LARGEST_EVENTS, precip.size)
+    top = np.argpartition(precip, -k)[-k:]
+    top = top[np.argsort(precip[top])[::-1]]
+
+    return {
+        "max_daily_mm": round(float(precip[top[0]]), 2),
+        "mean_annual_max_daily_mm": round(float(agg["annual_max"].mean()), 2),
+        "p95_wet_day_mm": round(p95, 2),
+        "p99_wet_day_mm": round(p99, 2),
+        "largest_events": [
+            {"date": str(d), "rainfall_mm": round(p, 2)}
+            for d, p in zip(dates[top].tolist(), precip[top].tolist())
+        ],
+    }
+
+
+def summarize_daily_loop(daily: dict) -> dict:
+    """Pure-Python reference for ``summarize_daily``, kept for benchmarks."""
+    dates = daily.get("time", [])
+    precip = daily.get("precipitation_sum", [])
+
+    # Aggregate by year
+    yearly_totals: dict[int, float] = {}
+    for d, p in zip(dates, precip):
+        if p is None:
+            continue
+        year = int(d[:4])
+        yearly_totals[year] = yearly_totals.get(year, 0.0) + p
+
+    # Round values
+    yearly_totals = {y: round(v, 2) for y, v in sorted(yearly_totals.items())}
+
+    if yearly_totals:
+        average = round(sum(yearly_totals.values()) / len(yearly_totals), 2)
+    else:
+        average = 0.0
+
+    return {
+        "yearly_totals_mm": {str(y): v for y, v in yearly_totals.items()},
+        "average_annual_rainfall_mm": average,
+    }
@@ -0,0 +1,122 @@
+"""Two-tier cache for rainfall lookups.
+
+Daily series are cached per archive grid cell and per calendar year: tier 1
+is an in-process LRU with a TTL, tier 2 is the ``rainfall_cache`` MongoDB
+collection shared by every worker. Coordinates are snapped to the archive
+grid, so nearby lookups share one entry, and a longer or later window only
+needs the years that are not cached yet.
+
+Computed summaries are additionally memoized in process, keyed by cell and
+year range, until the calendar year after the range completes.
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from app.config import settings
+from app.db.dbConnect import get_rainfall_cache_collection
+from app.utils.ttl_cache import TTLCache
+
+series_cache = TTLCache(
+    maxsize=settings.rainfall_cache_max_entries,
+    ttl=settings.rainfall_cache_ttl_seconds,
+)
+summary_cache = TTLCache(
+    maxsize=settings.rainfall_cache_max_entries,
+    ttl=settings.rainfall_cache_ttl_seconds,
+)
+
+
+def snap_to_grid(
+    latitude: float, longitude: float, resolution: float | None = None
+) -> tuple[float, float]:
+    """Snap coordinates to the centre of the archive grid cell they fall in."""
+    res = resolution or settings.rainfall_grid_resolution_deg
+    lat = round(round(latitude / res) * res, 4)
+    lon = round(round(longitude / res) * res, 4)
+    return lat, lon
+
+
+def cell_key(latitude: float, longitude: float) -> str:
+    lat, lon = snap_to_grid(latitude, longitude)
+    return f"{lat:.4f},{lon:.4f}"
+
+
+def cell_center(cell: str) -> tuple[float, float]:
+    lat, lon = cell.split(",")
+    return float(lat), float(lon)
+
+
+def cache_key(latitude: float, longitude: float, start_year: int, end_year: int) -> str:
+    return f"{cell_key(latitude, longitude)}:{start_year}-{end_year}"
+
+
+def expiry_for(end_year: int) -> datetime:
+    """Summaries stay valid until the calendar year after ``end_year`` completes."""
+    return datetime(end_year + 2, 1, 1, tzinfo=timezone.utc)
+
+
+def _seconds_until(moment: datetime) -> float:
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return (moment - datetime.now(timezone.utc)).total_seconds()
+
+
+def get_cached_summary(key: str) -> dict | None:
+    return summary_cache.get(key)
+
+
+def set_cached_summary(key: str, value: dict, expires_at: datetime) -> None:
+    summary_cache.set(key, value, ttl=_seconds_until(expires_at))
+
+
+async def get_series(cell: str) -> dict[int, np.ndarray]:
+    """Return every cached year of daily precipitation for a grid cell.
+
+    Values are ``float64`` arrays with NaN for missing days.
+    """
+    series = series_cache.get(cell)
+    if series is not None:
+        return series
+
+    try:
+        col = await get_rainfall_cache_collection()
+        doc = await col.find_one({"_id": cell})
+    except Exception as e:
+        print(f"Rainfall cache read failed: {e}")
+        return {}
+    if not doc or _seconds_until(doc["expires_at"]) <= 0:
+        return {}
+
+    series = {
+        int(year): np.asarray(values, dtype=np.float64)
+        for year, values in doc.get("series", {}).items()
+    }
+    series_cache.set(cell, series)
+    return series
+
+
+async def add_series(cell: str, years: dict[int, np.ndarray]) -> None:
+    """Merge newly fetched years into the cached series for a cell."""
+    if not years:
+        return
+    merged = dict(series_cache.get(cell) or {})
+    merged.update(years)
+    series_cache.set(cell, merged)
+
+    expires_at = datetime.now(timezone.utc) + timedelta(
+        days=settings.rainfall_series_retention_days
+    )
+    update = {
+        # NaN is stored as null, matching the archive payload
+        f"series.{year}": [None if np.isnan(v) else v for v in values.tolist()]
+        for year, values in years.items()
+    }
+    update["expires_at"] = expires_at
+    try:
+        col = await get_rainfall_cache_collection()
+        await col.update_one({"_id": cell}, {"$set": update}, upsert=True)
+    except Exception as e:
+        print(f"Rainfall cache write failed: {e}")
+
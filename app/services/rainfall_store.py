@@ -0,0 +1,185 @@
+"""Offline regional rainfall store.
+
+A store is a directory holding daily precipitation for a regular lat/lon
+grid, built once from Open-Meteo archive exports:
+
+    meta.json     grid origin, resolution, shape and first date
+    precip.npy    float32 array (n_lat, n_lon, n_days), NaN where unknown
+    covered.npy   bool array (n_lat, n_lon), cells that have data
+    span.npy      int32 array (n_lat, n_lon, 2), first and last day ingested per cell
+
+``precip.npy`` is memory-mapped, so a lookup only pages in the slice for
+one cell and window. Build a store with:
+
+    uv run python -m app.services.rainfall_store ingest STORE_DIR export.json ...
+
+and point ``RAINFALL_STORE_PATH`` at it.
+"""
+
+import argparse
+import calendar
+import json
+from pathlib import Path
+
+import numpy as np
+
+from app.config import settings
+from app.services.rainfall_aggregation import to_arrays
+from app.services.rainfall_cache import cell_center, snap_to_grid
+
+_store = None
+_store_loaded = False
+
+
+class RainfallStore:
+    def __init__(self, path: str | Path):
+        path = Path(path)
+        meta = json.loads((path / "meta.json").read_text())
+        self.lat_min = meta["lat_min"]
+        self.lon_min = meta["lon_min"]
+        self.resolution = meta["resolution"]
+        self.start_date = np.datetime64(meta["start_date"], "D")
+        self.precip = np.load(path / "precip.npy", mmap_mode="r")
+        self.covered = np.load(path / "covered.npy")
+        self.n_lat, self.n_lon, self.n_days = self.precip.shape
+        # stores built before spans were recorded only have the NaN check below
+        span_path = path / "span.npy"
+        self.span = np.load(span_path) if span_path.exists() else None
+
+    def _index(self, latitude: float, longitude: float) -> tuple[int, int] | None:
+        i = round((latitude - self.lat_min) / self.resolution)
+        j = round((longitude - self.lon_min) / self.resolution)
+        if 0 <= i < self.n_lat and 0 <= j < self.n_lon and self.covered[i, j]:
+            return i, j
+        return None
+
+    def get_years(
+        self, latitude: float, longitude: float, start_year: int, end_year: int
+    ) -> dict[int, np.ndarray] | None:
+        """Daily series per year for the cell, or None if the store lacks any of them.
+
+        A cell whose ingest does not span the whole window, or has a year
+        without a single reading, is treated as missing so the caller falls
+        back to the archive rather than averaging over fewer years.
+        """
+        index = self._index(latitude, longitude)
+        if index is None:
+            return None
+        first = int((np.datetime64(f"{start_year}-01-01") - self.start_date).astype(np.int64))
+        last = int((np.datetime64(f"{end_year + 1}-01-01") - self.start_date).astype(np.int64))
+        if first < 0 or last > self.n_days:
+            return None
+        if self.span is not None:
+            cell_first, cell_last = self.span[index[0], index[1]]
+            if first < cell_first or last - 1 > cell_last:
+                return None
+
+        window = np.asarray(self.precip[index[0], index[1], first:last], dtype=np.float64)
+        years = {}
+        offset = 0
+        for year in range(start_year, end_year + 1):
+            length = 366 if calendar.isleap(year) else 365
+            years[year] = window[offset : offset + length]
+            offset += length
+            if np.isnan(years[year]).all():
+                return None
+        return years
+
+
+def get_store() -> RainfallStore | None:
+    """The configured store, opened on first use, or None if there is none."""
+    global _store, _store_loaded
+    if not _store_loaded:
+        _store_loaded = True
+        if settings.rainfall_store_path:
+            try:
+                _store = RainfallStore(settings.rainfall_store_path)
+            except Exception as e:
+                print(f"Could not open rainfall store: {e}")
+    return _store
+
+
+def lookup(cell: str, start_year: int, end_year: int) -> dict[int, np.ndarray] | None:
+    store = get_store()
+    if store is None:
+        return None
+    return store.get_years(*cell_center(cell), start_year, end_year)
+
+
+def ingest(out_dir: str | Path, exports: list[str | Path], resolution: float) -> Path:
+    """Build a store from archive JSON exports (single or multi-location)."""
+    series = []
+    for export in exports:
+        data = json.loads(Path(export).read_text())
+        for payload in data if isinstance(data, list) else [data]:
+            lat, lon = snap_to_grid(payload["latitude"], payload["longitude"], resolution)
+            dates, precip = to_arrays(payload.get("daily", {}))
+            if dates.size:
+                series.append((lat, lon, dates, precip))
+    if not series:
+        raise ValueError("No daily series found in the given exports")
+
+    lat_min = min(s[0] for s in series)
+    lon_min = min(s[1] for s in series)
+    n_lat = round((max(s[0] for s in series) - lat_min) / resolution) + 1
+    n_lon = round((max(s[1] for s in series) - lon_min) / resolution) + 1
+    start = min(s[2].min() for s in series)
+    n_days = int((max(s[2].max() for s in series) - start).astype(np.int64)) + 1
+
+    out = Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    precip_out = np.lib.format.open_memmap(
+        out / "precip.npy", mode="w+", dtype=np.float32, shape=(n_lat, n_lon, n_days)
+    )
+    precip_out[:] = np.nan
+    covered = np.zeros((n_lat, n_lon), dtype=bool)
+    span = np.zeros((n_lat, n_lon, 2), dtype=np.int32)
+    for lat, lon, dates, precip in series:
+        i = round((lat - lat_min) / resolution)
+        j = round((lon - lon_min) / resolution)
+        days = (dates - start).astype(np.int64)
+        precip_out[i, j, days] = precip
+        # several exports may cover one cell; keep the widest span
+        if covered[i, j]:
+            span[i, j] = min(span[i, j, 0], days.min()), max(span[i, j, 1], days.max())
+        else:
+            span[i, j] = days.min(), days.max()
+        covered[i, j] = True
+    precip_out.flush()
+    del precip_out
+
+    np.save(out / "covered.npy", covered)
+    np.save(out / "span.npy", span)
+    meta = {
+        "lat_min": lat_min,
+        "lon_min": lon_min,
+        "resolution": resolution,
+        "start_date": str(start),
+        "shape": [n_lat, n_lon, n_days],
+    }
+    (out / "meta.json").write_text(json.dumps(meta, indent=2))
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline rainfall store tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("ingest", help="Build a store from archive JSON exports")
+    build.add_argument("out_dir")
+    build.add_argument("exports", nargs="+")
+    build.add_argument(
+        "--resolution", type=float, default=settings.rainfall_grid_resolution_deg
+    )
+    args = parser.parse_args()
+
+    if args.command == "ingest":
+        out = ingest(args.out_dir, args.exports, args.resolution)
+        store = RainfallStore(out)
+        print(
+            f"Wrote {out}: {int(store.covered.sum())} cells, "
+            f"{store.n_days} days from {store.start_date}"
+        )
+
+
+if __name__ == "__main__":
+    main()
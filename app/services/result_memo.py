@@ -0,0 +1,145 @@
+"""Content-addressed memoization of harvest calculation results.
+
+A result is stored once in the ``results`` collection under a hash of the
+canonical ``RooftopInput`` and ``CALC_VERSION``; project documents keep only
+that ``result_id``. ``CALC_VERSION`` is derived from the coefficient, cost
+and sizing tables, so changing any of them starts a fresh set of results.
+"""
+
+import hashlib
+import json
+from datetime import date, datetime
+
+from pymongo import UpdateOne
+
+from app.config import settings
+from app.db.dbConnect import get_result_collection
+from app.models.project_model import RooftopInput
+from app.services import calculations, tank_simulation
+from app.utils.ttl_cache import TTLCache
+
+# Bump when calculation logic changes without any table changing
+CALC_REVISION = 1
+
+
+def _calc_tables() -> dict:
+    return {
+        "revision": CALC_REVISION,
+        "roof_runoff_coeff": calculations.ROOF_RUNOFF_COEFF,
+        "cost_per_m3_tank": calculations.COST_PER_M3_TANK,
+        "cost_per_m3_recharge": calculations.COST_PER_M3_RECHARGE,
+        "fixed_installation_cost": calculations.FIXED_INSTALLATION_COST,
+        "recharge_pit": [
+            calculations.RECHARGE_PIT_DIAMETER_M,
+            calculations.RECHARGE_PIT_DEPTH_M,
+        ],
+        "guidelines": [*calculations.SYSTEM_GUIDELINES, calculations.RECHARGE_GUIDELINE],
+        "simulation": [
+            tank_simulation.FIRST_FLUSH_MM,
+            tank_simulation.TARGET_RELIABILITY,
+            tank_simulation.RELIABILITY_TOLERANCE,
+            tank_simulation.DEFAULT_CANDIDATES,
+            tank_simulation.SIMULATION_YEARS,
+        ],
+    }
+
+
+CALC_VERSION = hashlib.sha256(
+    json.dumps(_calc_tables(), sort_keys=True).encode()
+).hexdigest()[:16]
+
+memo = TTLCache(
+    maxsize=settings.result_memo_max_entries, ttl=settings.result_memo_ttl_seconds
+)
+
+
+def result_key(input_data: RooftopInput) -> str:
+    """Hash of the canonical input and the calculation version."""
+    material = {"version": CALC_VERSION, "input": input_data.model_dump(mode="json")}
+    if input_data.sizing_method == "simulation":
+        # simulated sizing also depends on which rainfall years are used
+        material["rainfall_end_year"] = date.today().year - 1
+    canonical = json.dumps(material, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+async def get_result(key: str) -> dict | None:
+    result = memo.get(key)
+    if result is not None:
+        return result
+    col = await get_result_collection()
+    doc = await col.find_one({"_id": key}, {"result": 1})
+    if doc:
+        memo.set(key, doc["result"])
+        return doc["result"]
+    return None
+
+
+async def store_results(results: dict[str, tuple[RooftopInput, dict]]) -> None:
+    """Save results not stored yet; existing documents are left untouched."""
+    now = datetime.utcnow()
+    ops = [
+        UpdateOne(
+            {"_id": key},
+            {
+                "$setOnInsert": {
+                    "calc_version": CALC_VERSION,
+                    "input": input_data.model_dump(),
+                    "result": result,
+                    "created_at": now,
+                }
+            },
+            upsert=True,
+        )
+        for key, (input_data, result) in results.items()
+        if key not in memo
+    ]
+    if ops:
+        col = await get_result_collection()
+        await col.bulk_write(ops, ordered=False)
+    for key, (_, result) in results.items():
+        memo.set(key, result)
+
+
+def result_lookup_stages() -> list[dict]:
+    """Aggregation stages that fill ``result`` from ``result_id`` where needed."""
+    return [
+        {
+            "$lookup": {
+                "from": "results",
+                "localField": "result_id",
+                "foreignField": "_id",
+                "as": "_memo",
+                "pipeline": [{"$project": {"result": 1}}],
+            }
+        },
+        {"$set": {"result": {"$ifNull": ["$result", {"$first": "$_memo.result"}]}}},
+        {"$unset": "_memo"},
+    ]
+
+
+async def attach_results(docs: list[dict], fields: list[str] | None = None) -> list[dict]:
+    """Fill ``result`` on documents that only reference it, in one query.
+
+    ``fields`` limits the attached result to those keys (for summaries).
+    """
+    missing = {doc["result_id"] for doc in docs if "result" not in doc and "result_id" in doc}
+    if not missing:
+        return docs
+
+    found = {}
+    for key in list(missing):
+        cached = memo.get(key)
+        if cached is not None:
+            found[key] = cached
+    if len(found) < len(missing):
+        col = await get_result_collection()
+        async for doc in col.find({"_id": {"$in": list(missing - found.keys())}}, {"result": 1}):
+            found[doc["_id"]] = doc["result"]
+            memo.set(doc["_id"], doc["result"])
+
+    for doc in docs:
+        result = found.get(doc.get("result_id")) if "result" not in doc else None
+        if result is not None:
+            doc["result"] = {f: result.get(f) for f in fields} if fields else result
+    return docs
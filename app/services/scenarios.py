@@ -0,0 +1,122 @@
+"""Scenario sweeps over ``calculate_harvest`` inputs.
+
+A sweep takes one base ``RooftopInput`` and value lists for some of its
+fields, and evaluates the whole cartesian product with the columnar
+harvest engine in one pass.
+"""
+
+import numpy as np
+
+from app.models.project_model import RooftopInput
+from app.services.calculations import ROOF_RUNOFF_COEFF, harvest_columns
+
+MAX_SCENARIOS = 100_000
+
+NUMERIC_FIELDS = ("roof_area_m2", "annual_rainfall_mm", "num_occupants")
+CATEGORICAL_FIELDS = {
+    "roof_type": ("RCC", "metal_sheet", "tile", "other"),
+    "system_type": ("storage", "recharge", "hybrid"),
+}
+SWEEP_FIELDS = NUMERIC_FIELDS + tuple(CATEGORICAL_FIELDS)
+
+
+def expand_grid(base: RooftopInput, vary: dict[str, list]) -> dict[str, np.ndarray]:
+    """Cartesian product of the varied values, one flat column per sweep field.
+
+    Fields that are not varied take the base input's value.
+    """
+    axes = []
+    for field in SWEEP_FIELDS:
+        values = vary.get(field) or [getattr(base, field)]
+        _validate(field, values)
+        if field in CATEGORICAL_FIELDS:
+            axes.append(np.asarray(values, dtype=object))
+        elif field == "num_occupants":
+            axes.append(np.asarray(values, dtype=np.int64))
+        else:
+            axes.append(np.asarray(values, dtype=np.float64))
+
+    size = int(np.prod([len(a) for a in axes]))
+    if size > MAX_SCENARIOS:
+        raise ValueError(f"Sweep has {size} scenarios; the limit is {MAX_SCENARIOS}")
+
+    grids = np.meshgrid(*axes, indexing="ij")
+    return {field: grid.ravel() for field, grid in zip(SWEEP_FIELDS, grids)}
+
+
+def range_values(start: float, stop: float, step: float) -> list[float]:
+    """Inclusive ``start..stop`` in ``step`` increments."""
+    count = int(np.floor((stop - start) / step + 1e-9)) + 1
+    if count < 1:
+        raise ValueError("Sweep range stop must not be below start")
+    if count > MAX_SCENARIOS:
+        raise ValueError(f"Sweep range has more than {MAX_SCENARIOS} values")
+    return (start + step * np.arange(count)).tolist()
+
+
+def _validate(field: str, values: list) -> None:
+    if field in CATEGORICAL_FIELDS:
+        bad = [v for v in values if v not in CATEGORICAL_FIELDS[field]]
+        if bad:
+            raise ValueError(f"Invalid {field} values: {bad}")
+    elif any(isinstance(v, str) for v in values):
+        raise ValueError(f"{field} values must be numbers")
+    elif any(v <= 0 for v in values):
+        raise ValueError(f"{field} values must be greater than 0")
+    elif field == "num_occupants" and any(int(v) != v for v in values):
+        raise ValueError("num_occupants values must be whole numbers")
+
+
+def evaluate(grid: dict[str, np.ndarray]) -> dict[str, np.ndarray]:
+    """Run the harvest engine over an expanded grid."""
+    system = grid["system_type"]
+    return harvest_columns(
+        grid["roof_area_m2"].astype(np.float64),
+        grid["annual_rainfall_mm"].astype(np.float64),
+        np.array(
+            [ROOF_RUNOFF_COEFF.get(r, 0.7) for r in grid["roof_type"]], dtype=np.float64
+        ),
+        grid["num_occupants"].astype(np.int64),
+        (system == "storage") | (system == "hybrid"),
+        (system == "recharge") | (system == "hybrid"),
+    )
+
+
+def pareto_front(volume: np.ndarray, cost: np.ndarray) -> np.ndarray:
+    """Indices of scenarios no other scenario beats on both cost and volume,
+    ordered by cost (cheapest first)."""
+    # cheapest first, larger volume first among equal cost
+    order = np.lexsort((-volume, cost))
+    best_volume = np.maximum.accumulate(volume[order])
+    keep = np.empty(order.size, dtype=bool)
+    keep[:1] = True
+    keep[1:] = volume[order][1:] > best_volume[:-1]
+    return order[keep]
+
+
+def run_sweep(base: RooftopInput, vary: dict[str, list], pareto: bool = False) -> dict:
+    """Evaluate a sweep and return it as a compact columnar table.
+
+    With ``pareto=True`` only the cost-vs-volume Pareto front is returned.
+    """
+    grid = expand_grid(base, vary)
+    cols = evaluate(grid)
+    index = (
+        pareto_front(cols["harvestable_volume_m3"], cols["estimated_cost"])
+        if pareto
+        else np.arange(cols["feasible"].size)
+    )
+
+    columns = {field: grid[field][index].tolist() for field in vary}
+    for name in ("harvestable_volume_m3", "estimated_cost"):
+        columns[name] = [round(v, 2) for v in cols[name][index].tolist()]
+    columns["recommended_tank_volume_m3"] = [
+        round(v, 2) if v else None
+        for v in cols["recommended_tank_volume_m3"][index].tolist()
+    ]
+    columns["feasible"] = cols["feasible"][index].tolist()
+    return {
+        "scenarios": int(cols["feasible"].size),
+        "rows": int(index.size),
+        "columns": columns,
+    }
@@ -0,0 +1,126 @@
+"""Daily water-balance (reservoir) simulation for tank sizing.
+
+Each day the tank receives the roof runoff left after first-flush diversion,
+spills anything above its capacity, and then supplies the occupants' demand
+from what it holds (yield-after-spillage rule). All candidate tank sizes are
+simulated together: the loop runs over days, and every step is one NumPy
+operation across the candidate sizes.
+"""
+
+import numpy as np
+
+# Rain diverted by the first-flush device on each rainy day (mm)
+FIRST_FLUSH_MM = 2.0
+# Share of days on which demand should be fully met
+TARGET_RELIABILITY = 0.9
+# Sizes within this much of the best achievable reliability count as optimal
+RELIABILITY_TOLERANCE = 0.01
+DEFAULT_CANDIDATES = 40
+SIMULATION_YEARS = 10
+
+
+def daily_inflow(
+    daily_rain_mm: np.ndarray,
+    roof_area_m2: float,
+    runoff_coeff: float,
+    first_flush_mm: float = FIRST_FLUSH_MM,
+) -> np.ndarray:
+    """Runoff reaching the tank each day (m3); missing days count as dry."""
+    rain = np.nan_to_num(daily_rain_mm, nan=0.0)
+    effective_mm = np.maximum(rain - first_flush_mm, 0.0)
+    return effective_mm / 1000.0 * roof_area_m2 * runoff_coeff
+
+
+def candidate_sizes(
+    inflow: np.ndarray, daily_demand_m3: float, n: int = DEFAULT_CANDIDATES
+) -> np.ndarray:
+    """Evenly spaced tank sizes from small up to roughly a quarter of a year's demand
+    or half a year's runoff, whichever is larger."""
+    years = max(inflow.size / 365.25, 1.0)
+    upper = max(0.5 * inflow.sum() / years, daily_demand_m3 * 90, 1.0)
+    return np.linspace(upper / n, upper, n)
+
+
+def simulate(
+    inflow: np.ndarray, daily_demand_m3: float, tank_sizes_m3: np.ndarray
+) -> dict[str, np.ndarray]:
+    """Run the water balance for every tank size at once.
+
+    Returns per-size arrays:
+        reliability: share of days demand was fully met
+        volumetric_reliability: share of total demand supplied
+        spill_fraction: share of inflow lost to overflow
+    """
+    capacity = np.asarray(tank_sizes_m3, dtype=np.float64)
+    storage = np.zeros_like(capacity)
+    supply = np.empty_like(capacity)
+    supplied = np.zeros_like(capacity)
+    met_days = np.zeros(capacity.shape, dtype=np.int64)
+    met = np.empty(capacity.shape, dtype=bool)
+
+    for q in inflow.tolist():
+        np.add(storage, q, out=storage)
+        np.minimum(storage, capacity, out=storage)
+        np.minimum(storage, daily_demand_m3, out=supply)
+        np.subtract(storage, supply, out=storage)
+        np.add(supplied, supply, out=supplied)
+        # a tank that supplied the full demand counts as a met day
+        np.greater_equal(supply, daily_demand_m3, out=met)
+        np.add(met_days, met, out=met_days)
+
+    n_days = inflow.size
+    total_inflow = inflow.sum()
+    # whatever came in and was neither used nor left in the tank overflowed
+    spilled = total_inflow - supplied - storage
+    return {
+        "reliability": met_days / n_days if n_days else np.zeros_like(capacity),
+        "volumetric_reliability": (
+            supplied / (daily_demand_m3 * n_days) if n_days else np.zeros_like(capacity)
+        ),
+        "spill_fraction": (
+            spilled / total_inflow if total_inflow > 0 else np.zeros_like(capacity)
+        ),
+    }
+
+
+def choose_size(tank_sizes_m3: np.ndarray, reliability: np.ndarray) -> int:
+    """Index of the smallest tank that reaches the target reliability.
+
+    When the target is out of reach, take the smallest tank within
+    ``RELIABILITY_TOLERANCE`` of the best size, since larger tanks then buy
+    almost nothing.
+    """
+    target = min(TARGET_RELIABILITY, reliability.max() - RELIABILITY_TOLERANCE)
+    return int(np.argmax(reliability >= target))
+
+
+def size_tank(
+    daily_rain_mm: np.ndarray,
+    roof_area_m2: float,
+    runoff_coeff: float,
+    daily_demand_m3: float,
+    tank_sizes_m3: np.ndarray | None = None,
+) -> dict:
+    """Simulate candidate tanks and pick the optimal one.
+
+    Returns a JSON-ready dict with the chosen size, its reliability and the
+    reliability / spill curves over all candidates.
+    """
+    inflow = daily_inflow(daily_rain_mm, roof_area_m2, runoff_coeff)
+    if tank_sizes_m3 is None:
+        tank_sizes_m3 = candidate_sizes(inflow, daily_demand_m3)
+    curves = simulate(inflow, daily_demand_m3, tank_sizes_m3)
+    best = choose_size(tank_sizes_m3, curves["reliability"])
+    return {
+        "optimal_tank_volume_m3": float(tank_sizes_m3[best]),
+        "reliability": float(curves["reliability"][best]),
+        "curves": {
+            "tank_volume_m3": [round(v, 2) for v in tank_sizes_m3.tolist()],
+            "reliability": [round(v, 4) for v in curves["reliability"].tolist()],
+            "volumetric_reliability": [
+                round(v, 4) for v in curves["volumetric_reliability"].tolist()
+            ],
+            "spill_fraction": [round(v, 4) for v in curves["spill_fraction"].tolist()],
+        },
+        "simulated_days": int(inflow.size),
+    }
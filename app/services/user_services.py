@@ -1,15 +1,28 @@
+from datetime import datetime, timezone
 from fastapi import  HTTPException, Depends
 from bson import ObjectId
 from bson.errors import InvalidId
+from app.config import settings
 from app.models.userModel import userOut
 from app.db.dbConnect import get_user_collection
 from app.utils.authUtils import decode_access_token, oauth2_scheme
+from app.utils.ttl_cache import TTLCache
+
+# token signature -> (decoded claims, userOut); entries never outlive the token
+token_cache = TTLCache(
+    maxsize=settings.token_cache_max_entries, ttl=settings.token_cache_ttl_seconds
+)
+
 
 async def get_current_user(token: str = Depends(oauth2_scheme))->userOut:
+    signature = token.rsplit(".", 1)[-1]
+    cached = token_cache.get(signature)
+    if cached is not None:
+        return cached[1]
+
     user_col = await get_user_collection()
     decoded = decode_access_token(token)
     user_id = decoded.get("sub")
-    print("Decoded user ID:", user_id)
     try:
         object_id = ObjectId(user_id)
     except InvalidId:
@@ -24,4 +37,18 @@ async def get_current_user(token: str = Depends(oauth2_scheme))->userOut:
         user = None
     if not user:
         raise HTTPException(404, "User not found")
-    return user
\ No newline at end of file
+
+    ttl = settings.token_cache_ttl_seconds
+    if "exp" in decoded:
+        ttl = min(ttl, decoded["exp"] - datetime.now(timezone.utc).timestamp())
+    token_cache.set(signature, (decoded, user), ttl=ttl)
+    return user
+
+
+def invalidate_user_cache(user_id: str) -> None:
+    """Drop cached tokens for a user after logout, refresh or a profile change."""
+    token_cache.discard_where(lambda _, entry: entry[1].id == user_id)
+
+
+def get_token_cache_stats() -> dict:
+    return token_cache.stats()
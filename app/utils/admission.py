@@ -0,0 +1,99 @@
+"""Concurrency limits for expensive dependencies.
+
+Each limiter lets ``limit`` callers use its dependency at once and up to
+``queue_depth`` more wait for a slot. Callers beyond that are turned away
+straight away with ``Overloaded``, which the app answers with 503 and
+``Retry-After``, so a saturated dependency sheds load instead of building
+an ever longer queue of requests that will time out anyway:
+
+    async with upstream_http:
+        resp = await http.request(...)
+
+Limits are per process; with several workers the dependency sees up to
+``workers * limit`` concurrent calls.
+"""
+
+import asyncio
+
+from fastapi import status
+
+from ..config import settings
+from .json_response import FastJSONResponse
+from . import metrics
+
+
+class Overloaded(Exception):
+    """A limiter's dependency is saturated and its wait queue is full."""
+
+    def __init__(self, name: str, retry_after: int = 1):
+        super().__init__(f"{name} is overloaded")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class ConcurrencyLimiter:
+    def __init__(self, name: str, limit: int, queue_depth: int, retry_after: int = 1):
+        self.name = name
+        self.limit = limit
+        self.queue_depth = queue_depth
+        self.retry_after = retry_after
+        self.pending = 0
+        self.rejected = 0
+        self._slots = asyncio.Semaphore(limit)
+
+    @property
+    def full(self) -> bool:
+        """True when a new caller would be rejected."""
+        return self.pending >= self.limit + self.queue_depth
+
+    def check(self) -> None:
+        """Raise ``Overloaded`` if a new caller would be rejected right now."""
+        if self.full:
+            self.rejected += 1
+            metrics.admission_rejected.inc(self.name)
+            raise Overloaded(self.name, self.retry_after)
+
+    async def __aenter__(self):
+        self.check()
+        self.pending += 1
+        try:
+            await self._slots.acquire()
+        except BaseException:
+            self.pending -= 1
+            raise
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self._slots.release()
+        self.pending -= 1
+        return False
+
+    def stats(self) -> dict:
+        return {
+            "limit": self.limit,
+            "queue_depth": self.queue_depth,
+            "pending": self.pending,
+            "rejected": self.rejected,
+        }
+
+
+upstream_http = ConcurrencyLimiter(
+    "upstream_http", settings.upstream_max_concurrency, settings.upstream_queue_depth
+)
+# the argon2 pool has password_hash_workers threads, so more slots would only queue there
+password_hashing = ConcurrencyLimiter(
+    "password_hashing", settings.password_hash_workers, settings.password_hash_queue_depth
+)
+mongo_writes = ConcurrencyLimiter(
+    "mongo_writes", settings.mongo_write_max_concurrency, settings.mongo_write_queue_depth
+)
+
+LIMITERS = {limiter.name: limiter for limiter in (upstream_http, password_hashing, mongo_writes)}
+
+
+def overloaded_response(exc: Overloaded) -> FastJSONResponse:
+    return FastJSONResponse(
+        {"detail": "Server is busy, please retry shortly"},
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        headers={"Retry-After": str(exc.retry_after)},
+    )
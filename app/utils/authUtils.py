@@ -1,8 +1,13 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import timedelta
 from pwdlib import PasswordHash
 from datetime import datetime, timezone
 import jwt
 from fastapi.security import OAuth2PasswordBearer
+from ..config import settings
+from . import metrics
+from .admission import password_hashing
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/v1/auth/login")
 
@@ -21,6 +26,35 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return password_hash.verify(plain_password, hashed_password)
 
 
+# argon2 releases the GIL, so a small thread pool keeps hashing off the event loop
+hash_executor = ThreadPoolExecutor(
+    max_workers=settings.password_hash_workers, thread_name_prefix="argon2"
+)
+
+
+async def _run_hashing(fn, *args):
+    """Run argon2 work in the pool, failing fast with 503 when it is backed up."""
+    async with password_hashing:
+        return await asyncio.get_running_loop().run_in_executor(hash_executor, _timed, fn, *args)
+
+
+def _timed(fn, *args):
+    # measured in the worker so queueing time is not counted as argon2 work
+    with metrics.span("argon2", fn.__name__):
+        return fn(*args)
+
+
+async def hash_password_async(plain_password: str) -> str:
+    return await _run_hashing(password_hash.hash, plain_password)
+
+
+async def verify_and_update_password(
+    plain_password: str, hashed_password: str
+) -> tuple[bool, str | None]:
+    """Verify a password; also return a new hash if its parameters are outdated."""
+    return await _run_hashing(password_hash.verify_and_update, plain_password, hashed_password)
+
+
 def create_access_token(data: dict, expires_delta: timedelta | None = None):
     to_encode = data.copy()
     if expires_delta:
@@ -0,0 +1,45 @@
+"""ETags and conditional GETs.
+
+Handlers compute a strong ETag from what determines the response (ids,
+versions, the query window) before doing the expensive part, and answer a
+matching ``If-None-Match`` with an empty 304:
+
+    etag = make_etag("project", project_id, version)
+    if etag_matches(request, etag):
+        return not_modified(etag, cache_control)
+    ...
+    return FastJSONResponse(body, headers=cache_headers(etag, cache_control))
+"""
+
+import hashlib
+
+from fastapi import Request, Response, status
+
+
+def make_etag(*parts) -> str:
+    digest = hashlib.sha256("\x1f".join(str(p) for p in parts).encode()).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # If-None-Match uses weak comparison, so W/"x" matches "x"
+    tags = (tag.strip().removeprefix("W/") for tag in header.split(","))
+    return etag in tags
+
+
+def cache_headers(etag: str, cache_control: str, vary: str | None = None) -> dict:
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if vary:
+        headers["Vary"] = vary
+    return headers
+
+
+def not_modified(etag: str, cache_control: str, vary: str | None = None) -> Response:
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED, headers=cache_headers(etag, cache_control, vary)
+    )
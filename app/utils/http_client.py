@@ -0,0 +1,109 @@
+"""Shared outbound HTTP client.
+
+One pooled ``httpx.AsyncClient`` is created in the app lifespan and reused
+by every service that talks to upstream APIs, so keep-alive connections,
+DNS results and TLS sessions survive between requests.
+"""
+
+import asyncio
+import importlib.util
+import random
+
+import httpx
+
+from ..config import settings
+from . import metrics
+from .admission import upstream_http
+
+client: httpx.AsyncClient | None = None
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+def create_http_client(
+    transport: httpx.AsyncBaseTransport | None = None,
+) -> httpx.AsyncClient:
+    """Build a client from settings; pass ``transport`` to stub upstreams."""
+    limits = httpx.Limits(
+        max_connections=settings.http_max_connections,
+        max_keepalive_connections=settings.http_max_keepalive_connections,
+        keepalive_expiry=settings.http_keepalive_expiry_seconds,
+    )
+    timeout = httpx.Timeout(
+        connect=settings.http_connect_timeout_seconds,
+        read=settings.http_read_timeout_seconds,
+        write=settings.http_write_timeout_seconds,
+        pool=settings.http_pool_timeout_seconds,
+    )
+    # HTTP/2 needs the optional ``h2`` package
+    http2 = settings.http2_enabled and importlib.util.find_spec("h2") is not None
+    return httpx.AsyncClient(
+        limits=limits, timeout=timeout, http2=http2, transport=transport
+    )
+
+
+async def start_http_client(transport: httpx.AsyncBaseTransport | None = None):
+    global client
+    if client is None:
+        client = create_http_client(transport)
+    return client
+
+
+async def close_http_client():
+    global client
+    if client is not None:
+        await client.aclose()
+        client = None
+
+
+def set_http_client(new_client: httpx.AsyncClient | None):
+    """Swap the shared client, e.g. for one backed by ``httpx.MockTransport``."""
+    global client
+    client = new_client
+
+
+async def get_http_client() -> httpx.AsyncClient:
+    if client is None:
+        # allow use outside the app lifespan (scripts, workers)
+        return await start_http_client()
+    return client
+
+
+def _retry_delay(attempt: int, resp: httpx.Response | None) -> float:
+    if resp is not None:
+        retry_after = resp.headers.get("Retry-After")
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), settings.http_retry_max_delay_seconds)
+    # full jitter exponential backoff
+    cap = min(
+        settings.http_retry_max_delay_seconds,
+        settings.http_retry_base_delay_seconds * 2**attempt,
+    )
+    return random.uniform(0, cap)
+
+
+async def request_with_retry(method: str, url: str, **kwargs) -> httpx.Response:
+    """Send a request on the shared client, retrying 429/5xx and transport errors.
+
+    The final response is returned with ``raise_for_status`` already applied.
+    Raises ``admission.Overloaded`` when too many upstream calls are in flight.
+    """
+    http = await get_http_client()
+    host = httpx.URL(url).host
+    attempts = settings.http_max_retries + 1
+    for attempt in range(attempts):
+        resp = None
+        try:
+            # a slot is held per attempt, not across backoff sleeps
+            async with upstream_http:
+                with metrics.span("upstream", host):
+                    resp = await http.request(method, url, **kwargs)
+        except httpx.TransportError:
+            if attempt == attempts - 1:
+                raise
+        else:
+            if resp.status_code not in RETRY_STATUS_CODES or attempt == attempts - 1:
+                resp.raise_for_status()
+                return resp
+        await asyncio.sleep(_retry_delay(attempt, resp))
+    raise RuntimeError("unreachable")
@@ -0,0 +1,29 @@
+"""Fast JSON responses.
+
+``FastJSONResponse`` renders with pydantic-core's Rust serializer: datetimes,
+pydantic models (through their compiled serializers) and plain containers
+are handled natively, and ``ObjectId`` is converted through a fallback. It is
+the default response class of the routers; handlers on hot paths return it
+directly, which also skips FastAPI's ``jsonable_encoder`` pass.
+"""
+
+from typing import Any
+
+from bson import ObjectId
+from fastapi.responses import JSONResponse
+from pydantic_core import to_json
+
+
+def _fallback(value: Any) -> Any:
+    if isinstance(value, ObjectId):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    return to_json(content, fallback=_fallback, by_alias=True)
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
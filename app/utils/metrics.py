@@ -0,0 +1,201 @@
+"""In-process metrics rendered in the Prometheus text format.
+
+A deliberately small registry: counters, gauges and histograms keyed by a
+tuple of label values, cheap enough to update on every request and span.
+``render()`` produces the body served at ``/metrics``.
+"""
+
+import functools
+import threading
+import time
+from bisect import bisect_left
+
+from pymongo import monitoring
+
+# Seconds; covers sub-millisecond cache hits up to slow upstream fetches
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: tuple[str, ...], values: tuple, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(str(v))}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = labels
+        self._lock = threading.Lock()
+
+    def header(self) -> list[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name, help, labels=()):
+        super().__init__(name, help, labels)
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, *labels, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> list[str]:
+        lines = self.header()
+        for labels, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_labels(self.label_names, labels)} {_number(value)}")
+        return lines
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, *labels, value: float) -> None:
+        with self._lock:
+            self._values[labels] = value
+
+    def dec(self, *labels, amount: float = 1) -> None:
+        self.inc(*labels, amount=-amount)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+        # per label set: [bucket counts..., +Inf count, sum]
+        self._values: dict[tuple, list] = {}
+
+    def observe(self, value: float, *labels) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(labels)
+            if series is None:
+                series = self._values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def count(self, *labels) -> int:
+        series = self._values.get(labels)
+        return sum(series[:-1]) if series else 0
+
+    def render(self) -> list[str]:
+        lines = self.header()
+        for labels, series in sorted(self._values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series):
+                cumulative += count
+                le = 'le="' + _number(bound) + '"'
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, labels, le)} {cumulative}")
+            label_text = _labels(self.label_names, labels)
+            lines.append(f"{self.name}_sum{label_text} {_number(series[-1])}")
+            lines.append(f"{self.name}_count{label_text} {cumulative}")
+        return lines
+
+
+_registry: list[_Metric] = []
+
+
+def _register(metric):
+    _registry.append(metric)
+    return metric
+
+
+def render() -> str:
+    lines: list[str] = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+http_requests = _register(Counter(
+    "http_requests_total", "HTTP requests by route and status code.", ("method", "route", "status")))
+http_request_duration = _register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route.", ("method", "route")))
+http_in_flight = _register(Gauge(
+    "http_requests_in_flight", "HTTP requests currently being served."))
+span_duration = _register(Histogram(
+    "app_span_duration_seconds", "Time spent in internal operations.", ("span", "op")))
+span_errors = _register(Counter(
+    "app_span_errors_total", "Internal operations that raised.", ("span", "op")))
+slow_requests = _register(Counter(
+    "http_slow_requests_total", "Requests slower than the profiling threshold.", ("method", "route")))
+rate_limited = _register(Counter(
+    "http_rate_limited_total", "Requests rejected by a rate limit, by route class.", ("route_class",)))
+admission_rejected = _register(Counter(
+    "admission_rejected_total", "Calls turned away by a saturated dependency limiter.", ("limiter",)))
+
+
+class span:
+    """Time a block as ``app_span_duration_seconds{span, op}``.
+
+    Works as a context manager (sync or async code) and as a decorator for
+    plain functions.
+    """
+
+    __slots__ = ("name", "op", "_start")
+
+    def __init__(self, name: str, op: str = ""):
+        self.name = name
+        self.op = op
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        span_duration.observe(time.perf_counter() - self._start, self.name, self.op)
+        if exc_type is not None:
+            span_errors.inc(self.name, self.op)
+        return False
+
+    def __call__(self, fn):
+        name, op = self.name, self.op
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name, op):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+
+def observe_span(name: str, op: str, seconds: float, failed: bool = False) -> None:
+    """Record a span measured elsewhere, e.g. inside a worker thread."""
+    span_duration.observe(seconds, name, op)
+    if failed:
+        span_errors.inc(name, op)
+
+
+class MongoCommandListener(monitoring.CommandListener):
+    """Feed driver command timings into the ``mongo`` span."""
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        span_duration.observe(event.duration_micros / 1e6, "mongo", event.command_name)
+
+    def failed(self, event):
+        observe_span("mongo", event.command_name, event.duration_micros / 1e6, failed=True)
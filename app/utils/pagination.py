@@ -0,0 +1,55 @@
+"""Keyset (cursor) pagination over ``(created_at, _id)``, newest first."""
+
+import base64
+import json
+from datetime import datetime
+
+from bson import ObjectId
+from bson.errors import InvalidId
+
+SORT = [("created_at", -1), ("_id", -1)]
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(doc: dict) -> str:
+    """Opaque cursor pointing just after ``doc``."""
+    raw = json.dumps({"t": doc["created_at"].isoformat(), "id": str(doc["_id"])})
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, ObjectId]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(data["t"]), ObjectId(data["id"])
+    except (ValueError, KeyError, TypeError, InvalidId) as e:
+        raise InvalidCursor("Invalid cursor") from e
+
+
+def after_cursor(query: dict, cursor: str | None) -> dict:
+    """Extend ``query`` to only match documents after ``cursor``."""
+    if not cursor:
+        return query
+    created_at, _id = decode_cursor(cursor)
+    return {
+        **query,
+        "$or": [
+            {"created_at": {"$lt": created_at}},
+            {"created_at": created_at, "_id": {"$lt": _id}},
+        ],
+    }
+
+
+async def fetch_page(collection, query: dict, cursor: str | None, limit: int, projection: dict):
+    """Return ``(docs, next_cursor)`` for one page; ``next_cursor`` is None on the last page."""
+    docs = await (
+        collection.find(after_cursor(query, cursor), projection)
+        .sort(SORT)
+        .limit(limit + 1)
+        .to_list(length=limit + 1)
+    )
+    next_cursor = encode_cursor(docs[limit - 1]) if len(docs) > limit else None
+    return docs[:limit], next_cursor
@@ -0,0 +1,208 @@
+"""Per-client rate limiting for the API.
+
+``RateLimitMiddleware`` sorts each ``/api/`` request into a route class
+(login and registration, rainfall lookups, writes, everything else) and
+takes one token from the client's bucket for that class. Clients are keyed
+by the ``sub`` of a valid bearer token, falling back to the IP address, so
+users behind one NAT do not share a budget while anonymous callers still
+get one. An empty bucket is answered with 429 and ``Retry-After``.
+
+Requests whose class depends on a saturated limiter from ``admission`` are
+shed with 503 before any work is done.
+
+Buckets live in process memory by default; ``MongoBucketStore`` keeps them
+in the ``rate_limits`` collection so every worker process and host draws
+from the same budget, at the cost of one round trip per request.
+"""
+
+import math
+import time
+from collections import OrderedDict
+
+import jwt
+from fastapi import status
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError, PyMongoError
+
+from ..config import settings
+from ..db.dbConnect import get_rate_limit_collection
+from . import admission, metrics
+from .authUtils import decode_access_token
+from .json_response import FastJSONResponse
+
+API_PREFIX = "/api/"
+
+# (method or None for any, path prefix, route class); first match wins
+ROUTE_CLASSES = [
+    ("POST", "/api/v1/auth/login", "auth"),
+    ("POST", "/api/v1/auth/register", "auth"),
+    (None, "/api/v1/rainfall/", "rainfall"),
+    ("POST", "/api/v1/projects/", "write"),
+    ("POST", "/api/v1/jobs/", "write"),
+]
+
+# route classes that cannot be served while their dependency is saturated
+SHED_WHEN_SATURATED = {
+    "auth": admission.password_hashing,
+    "rainfall": admission.upstream_http,
+    "write": admission.mongo_writes,
+}
+
+
+def route_class(method: str, path: str) -> str:
+    for route_method, prefix, name in ROUTE_CLASSES:
+        if (route_method is None or route_method == method) and path.startswith(prefix):
+            return name
+    return "default"
+
+
+def client_ip(scope) -> str:
+    if settings.rate_limit_trust_forwarded_for:
+        for name, value in scope["headers"]:
+            if name == b"x-forwarded-for":
+                return value.decode("latin-1").split(",")[0].strip()
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+def client_key(scope, route_class: str) -> str:
+    # logins are anonymous by nature; key them by address
+    if route_class != "auth":
+        for name, value in scope["headers"]:
+            if name == b"authorization":
+                scheme, _, token = value.decode("latin-1").partition(" ")
+                if scheme.lower() == "bearer" and token:
+                    try:
+                        return f"user:{decode_access_token(token)['sub']}"
+                    except (jwt.PyJWTError, KeyError):
+                        pass
+                break
+    return f"ip:{client_ip(scope)}"
+
+
+class MemoryBucketStore:
+    """Token buckets in a bounded LRU map; the least recently seen client is dropped first."""
+
+    def __init__(self, max_clients: int = 100000):
+        self.max_clients = max_clients
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+
+    async def take(self, key: str, rate: float, burst: int) -> float:
+        """Take a token; return 0 if granted, else seconds until one is available."""
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            tokens = float(burst)
+        else:
+            tokens = min(burst, bucket[0] + (now - bucket[1]) * rate)
+            self._buckets.move_to_end(key)
+        wait = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            wait = (1 - tokens) / rate
+        self._buckets[key] = (tokens, now)
+        if len(self._buckets) > self.max_clients:
+            self._buckets.popitem(last=False)
+        return wait
+
+
+class MongoBucketStore:
+    """Token buckets shared through MongoDB.
+
+    Refill and take happen in one pipeline update on the server clock, so
+    concurrent requests from different processes cannot overspend a bucket.
+    Idle buckets expire through a TTL index. If the database cannot be
+    reached, requests are let through rather than failing the API.
+    """
+
+    async def take(self, key: str, rate: float, burst: int) -> float:
+        elapsed = {
+            "$divide": [{"$subtract": ["$$NOW", {"$ifNull": ["$updated_at", "$$NOW"]}]}, 1000]
+        }
+        refilled = {
+            "$min": [burst, {"$add": [{"$ifNull": ["$tokens", burst]}, {"$multiply": [elapsed, rate]}]}]
+        }
+        # a bucket left alone this long is full again and can be dropped
+        idle_ms = math.ceil(burst / rate * 1000) + 60_000
+        pipeline = [
+            {"$set": {"tokens": refilled, "updated_at": "$$NOW"}},
+            {"$set": {"granted": {"$gte": ["$tokens", 1]}}},
+            {
+                "$set": {
+                    "tokens": {"$cond": ["$granted", {"$subtract": ["$tokens", 1]}, "$tokens"]},
+                    "expires_at": {"$add": ["$$NOW", idle_ms]},
+                }
+            },
+        ]
+        try:
+            col = await get_rate_limit_collection()
+            for attempt in range(2):
+                try:
+                    bucket = await col.find_one_and_update(
+                        {"_id": key},
+                        pipeline,
+                        upsert=True,
+                        return_document=ReturnDocument.AFTER,
+                        projection={"tokens": 1, "granted": 1},
+                    )
+                    break
+                except DuplicateKeyError:
+                    # two requests created the bucket at once; the retry updates it
+                    if attempt:
+                        raise
+        except PyMongoError as e:
+            print(f"Rate limit store unavailable, allowing request: {e}")
+            return 0.0
+        if bucket["granted"]:
+            return 0.0
+        return (1 - bucket["tokens"]) / rate
+
+
+def create_bucket_store():
+    if settings.rate_limit_store == "mongo":
+        return MongoBucketStore()
+    return MemoryBucketStore(settings.rate_limit_max_clients)
+
+
+def too_many_requests(retry_after: float) -> FastJSONResponse:
+    seconds = max(1, math.ceil(retry_after))
+    return FastJSONResponse(
+        {"detail": f"Too many requests, retry in {seconds} s"},
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        headers={"Retry-After": str(seconds)},
+    )
+
+
+class RateLimitMiddleware:
+    """Pure ASGI middleware applying ``settings.rate_limits`` to API requests."""
+
+    def __init__(self, app, store=None, limits: dict[str, tuple[float, int]] | None = None):
+        self.app = app
+        self.store = store if store is not None else create_bucket_store()
+        self.limits = limits if limits is not None else settings.rate_limits
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith(API_PREFIX):
+            await self.app(scope, receive, send)
+            return
+
+        name = route_class(scope["method"], scope["path"])
+        limiter = SHED_WHEN_SATURATED.get(name)
+        if limiter is not None:
+            try:
+                limiter.check()
+            except admission.Overloaded as exc:
+                await admission.overloaded_response(exc)(scope, receive, send)
+                return
+
+        limit = self.limits.get(name) or self.limits.get("default")
+        if limit is not None:
+            per_minute, burst = limit
+            wait = await self.store.take(f"{name}:{client_key(scope, name)}", per_minute / 60, burst)
+            if wait > 0:
+                metrics.rate_limited.inc(name)
+                await too_many_requests(wait)(scope, receive, send)
+                return
+
+        await self.app(scope, receive, send)
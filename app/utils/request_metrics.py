@@ -0,0 +1,149 @@
+"""Request timing middleware and the slow-request sampling profiler."""
+
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Callable
+
+from . import metrics
+
+UNMATCHED_ROUTE = "unmatched"
+
+
+def _route_path(scope) -> str:
+    # Label by route template, not raw path, to keep label cardinality bounded.
+    # Newer FastAPI keeps router prefixes out of ``route.path`` and records the
+    # full template on the matched route context instead.
+    context = (scope.get("fastapi") or {}).get("effective_route_context")
+    path = getattr(context, "path", None) or getattr(scope.get("route"), "path", None)
+    return path or UNMATCHED_ROUTE
+
+
+def _collapse(frame, max_depth: int) -> str:
+    names = []
+    while frame is not None and len(names) < max_depth:
+        code = frame.f_code
+        names.append(f"{frame.f_globals.get('__name__', '?')}:{code.co_name}:{frame.f_lineno}")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+def print_slow_request(report: dict) -> None:
+    print(
+        f"Slow request {report['method']} {report['route']} took "
+        f"{report['duration_ms']:.1f} ms ({report['samples']} samples)"
+    )
+    for stack, count in report["stacks"]:
+        print(f"  {count:5d} {stack}")
+
+
+class SlowRequestProfiler:
+    """Sample the event-loop thread's stack while requests are in flight.
+
+    A daemon thread wakes every ``interval`` seconds and, if any request is
+    running, records the loop thread's current stack against each of them.
+    When a request finishes above ``threshold`` seconds, ``hook`` receives a
+    report with the most frequent stacks in collapsed (flamegraph) form.
+    Stacks are shared by every concurrent request, so under load a report
+    shows what the loop was busy with rather than strictly that request.
+    """
+
+    def __init__(
+        self,
+        threshold: float,
+        interval: float = 0.01,
+        hook: Callable[[dict], None] = print_slow_request,
+        top: int = 10,
+        max_depth: int = 40,
+    ):
+        self.threshold = threshold
+        self.interval = interval
+        self.hook = hook
+        self.top = top
+        self.max_depth = max_depth
+        self._active: dict[int, Counter] = {}
+        self._lock = threading.Lock()
+        self._loop_thread: int | None = None
+        self._sampler: threading.Thread | None = None
+        self._next_token = 0
+
+    def begin(self) -> int:
+        if self._sampler is None:
+            self._loop_thread = threading.get_ident()
+            self._sampler = threading.Thread(target=self._run, name="slow-request-profiler", daemon=True)
+            self._sampler.start()
+        self._next_token += 1
+        with self._lock:
+            self._active[self._next_token] = Counter()
+        return self._next_token
+
+    def end(self, token: int, method: str, route: str, duration: float) -> None:
+        with self._lock:
+            stacks = self._active.pop(token, None)
+        if stacks is None or duration < self.threshold:
+            return
+        metrics.slow_requests.inc(method, route)
+        report = {
+            "method": method,
+            "route": route,
+            "duration_ms": duration * 1000,
+            "samples": sum(stacks.values()),
+            "stacks": stacks.most_common(self.top),
+        }
+        try:
+            self.hook(report)
+        except Exception as e:
+            print(f"Slow request hook failed: {e}")
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                active = list(self._active.values())
+            if not active:
+                continue
+            frame = sys._current_frames().get(self._loop_thread)
+            if frame is None:
+                continue
+            stack = _collapse(frame, self.max_depth)
+            del frame
+            for stacks in active:
+                stacks[stack] += 1
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording latency, status codes and in-flight requests."""
+
+    def __init__(self, app, profiler: SlowRequestProfiler | None = None):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        profiler = self.profiler
+        token = profiler.begin() if profiler is not None else None
+        metrics.http_in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            duration = time.perf_counter() - start
+            metrics.http_in_flight.dec()
+            method = scope["method"]
+            route = _route_path(scope)
+            metrics.http_request_duration.observe(duration, method, route)
+            metrics.http_requests.inc(method, route, str(status_code))
+            if token is not None:
+                profiler.end(token, method, route, duration)
@@ -0,0 +1,82 @@
+"""Compare FastAPI's default JSON rendering with FastJSONResponse on a list page.
+
+Run from the project root:
+
+    uv run python -m benchmarks.bench_json_response --docs 100
+"""
+
+import argparse
+import random
+import timeit
+from datetime import datetime, timedelta, timezone
+
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.models.project_model import RooftopInput
+from app.services.calculations import calculate_harvest
+from app.services.project_geo import geo_fields
+from app.services.result_memo import result_key
+from app.utils.json_response import FastJSONResponse
+
+
+ENCODERS = {ObjectId: str}
+
+
+def synthetic_page(docs: int, seed: int = 0) -> dict:
+    """A list page shaped like ``GET /projects/?fields=input,result``.
+
+    Inputs are random but valid ``RooftopInput``s and results come from
+    ``calculate_harvest``, so keys, nesting and value types match what the
+    API serializes for stored projects.
+    """
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    items = []
+    for i in range(docs):
+        rooftop = RooftopInput(
+            location=rng.choice(["Guwahati", "Pune", "Chennai", "Jaipur"]),
+            roof_area_m2=round(rng.uniform(15, 500), 1),
+            roof_type=rng.choice(["RCC", "metal_sheet", "tile", "other"]),
+            annual_rainfall_mm=round(rng.uniform(250, 2500), 1),
+            use_type=rng.choice(["domestic", "institutional", "industrial"]),
+            num_occupants=rng.randint(1, 12),
+            system_type=rng.choice(["storage", "recharge", "hybrid"]),
+            soil_type=rng.choice([None, "sand", "loam", "clay"]),
+            latitude=round(rng.uniform(8, 35), 4),
+            longitude=round(rng.uniform(68, 97), 4),
+        )
+        items.append({
+            "_id": ObjectId(),
+            "user_id": str(ObjectId()),
+            "input": rooftop.model_dump(),
+            "result_id": result_key(rooftop),
+            "created_at": now - timedelta(minutes=i),
+            **geo_fields(rooftop),
+            "result": calculate_harvest(rooftop).model_dump(),
+        })
+    return {"items": items, "next_cursor": "eyJ0IjoxLCJpZCI6IngifQ"}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--docs", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=500)
+    args = parser.parse_args()
+
+    page = synthetic_page(args.docs)
+    default = lambda: JSONResponse(content=jsonable_encoder(page, custom_encoder=ENCODERS)).body
+    fast = lambda: FastJSONResponse(content=page).body
+
+    t_default = timeit.timeit(default, number=args.repeat) / args.repeat
+    t_fast = timeit.timeit(fast, number=args.repeat) / args.repeat
+
+    print(f"{args.docs} documents, {len(fast())} bytes")
+    print(f"jsonable_encoder + JSONResponse: {t_default * 1e3:8.3f} ms")
+    print(f"FastJSONResponse:                {t_fast * 1e3:8.3f} ms")
+    print(f"speedup: {t_default / t_fast:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
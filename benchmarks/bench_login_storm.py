@@ -0,0 +1,62 @@
+"""Event-loop latency during a burst of argon2 work, inline vs thread pool.
+
+A ticker coroutine sleeps 1 ms in a loop and records how late it wakes up
+while N concurrent "logins" hash passwords. Run from the project root:
+
+    uv run python -m benchmarks.bench_login_storm --logins 50
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from app.utils import admission, authUtils
+
+
+async def _ticker(stop: asyncio.Event, lags: list[float]):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(0.001)
+        lags.append((time.perf_counter() - start - 0.001) * 1000)
+
+
+async def _inline_login(hashed: str):
+    authUtils.verify_password("correct horse", hashed)
+
+
+async def _pooled_login(hashed: str):
+    await authUtils.verify_and_update_password("correct horse", hashed)
+
+
+async def _storm(login, logins: int, hashed: str) -> dict:
+    stop = asyncio.Event()
+    lags: list[float] = []
+    ticker = asyncio.create_task(_ticker(stop, lags))
+    await asyncio.sleep(0.01)
+    start = time.perf_counter()
+    await asyncio.gather(*(login(hashed) for _ in range(logins)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await ticker
+    lags.sort()
+    return {
+        "elapsed_s": round(elapsed, 3),
+        "loop_lag_p50_ms": round(statistics.median(lags), 2),
+        "loop_lag_p99_ms": round(lags[min(len(lags) - 1, int(len(lags) * 0.99))], 2),
+        "loop_lag_max_ms": round(lags[-1], 2),
+    }
+
+
+async def main(logins: int):
+    hashed = authUtils.hash_password("correct horse")
+    # keep the pool from shedding load during the benchmark
+    admission.password_hashing.queue_depth = max(admission.password_hashing.queue_depth, logins)
+    for name, login in (("inline", _inline_login), ("pool", _pooled_login)):
+        print(f"{name:>6}: {await _storm(login, logins, hashed)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--logins", type=int, default=50)
+    asyncio.run(main(parser.parse_args().logins))
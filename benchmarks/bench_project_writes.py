@@ -0,0 +1,93 @@
+"""Project insert throughput: insert_one per request vs the buffered writer.
+
+The collection is a stand-in for a server that works on ``--server-slots``
+writes at a time, each costing a fixed round trip (network plus journal
+commit) and a small amount per document, so the run shows how batching
+amortizes round trips at the same server capacity. Run from the project root:
+
+    uv run python -m benchmarks.bench_project_writes --requests 5000 --concurrency 200 --rtt-ms 2 --server-slots 4
+"""
+
+import argparse
+import asyncio
+import time
+
+from bson import ObjectId
+
+from app.db.buffered_writer import BufferedWriter
+
+
+class LatencyCollection:
+    def __init__(self, rtt: float, per_doc: float, slots: int):
+        self.rtt = rtt
+        self.per_doc = per_doc
+        self.slots = asyncio.Semaphore(slots)
+        self.round_trips = 0
+        self.docs = 0
+
+    async def _write(self, count: int):
+        self.round_trips += 1
+        self.docs += count
+        async with self.slots:
+            await asyncio.sleep(self.rtt + self.per_doc * count)
+
+    async def insert_one(self, doc):
+        doc.setdefault("_id", ObjectId())
+        await self._write(1)
+
+    async def insert_many(self, docs, ordered=True):
+        await self._write(len(docs))
+
+
+async def _run(mode: str, args) -> dict:
+    collection = LatencyCollection(args.rtt_ms / 1000, args.per_doc_us / 1e6, args.server_slots)
+    writer = None
+    if mode != "direct":
+        async def get_collection():
+            return collection
+
+        writer = BufferedWriter(get_collection, batch_size=args.batch_size, flush_interval=args.flush_ms / 1000)
+        writer.start()
+
+    async def request(i: int):
+        doc = {"user_id": "bench", "input": {"roof_area_m2": i}, "created_at": i}
+        if writer is None:
+            await collection.insert_one(doc)
+        else:
+            await writer.add(doc, wait=mode == "batched")
+
+    queue = iter(range(args.requests))
+
+    async def client():
+        for i in queue:
+            await request(i)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(args.concurrency)))
+    answered = time.perf_counter() - start
+    if writer is not None:
+        await writer.close()
+    stored = time.perf_counter() - start
+    return {
+        "requests_per_s": round(args.requests / answered),
+        "all_stored_s": round(stored, 3),
+        "round_trips": collection.round_trips,
+        "docs": collection.docs,
+    }
+
+
+async def main(args):
+    for mode in ("direct", "batched", "write_behind"):
+        print(f"{mode:>12}: {await _run(mode, args)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--rtt-ms", type=float, default=2.0)
+    parser.add_argument("--per-doc-us", type=float, default=20.0)
+    parser.add_argument("--server-slots", type=int, default=4)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--flush-ms", type=float, default=5.0)
+    asyncio.run(main(parser.parse_args()))
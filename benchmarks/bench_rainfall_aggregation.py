@@ -0,0 +1,50 @@
+"""Compare the NumPy and pure-Python rainfall aggregation paths.
+
+Run from the project root:
+
+    uv run python -m benchmarks.bench_rainfall_aggregation --years 30
+"""
+
+import argparse
+import random
+import timeit
+from datetime import date, timedelta
+
+from app.services.rainfall_aggregation import summarize_daily, summarize_daily_loop
+
+
+def synthetic_daily(years: int, seed: int = 0) -> dict:
+    rng = random.Random(seed)
+    start = date(2024 - years + 1, 1, 1)
+    end = date(2024, 12, 31)
+    times, precip = [], []
+    day = start
+    while day <= end:
+        times.append(day.isoformat())
+        if rng.random() < 0.01:
+            precip.append(None)
+        elif rng.random() < 0.6:
+            precip.append(0.0)
+        else:
+            precip.append(round(rng.expovariate(1 / 8), 1))
+        day += timedelta(days=1)
+    return {"time": times, "precipitation_sum": precip}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--years", type=int, default=30)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    daily = synthetic_daily(args.years)
+    assert summarize_daily(daily) == summarize_daily_loop(daily), "paths disagree"
+
+    for name, fn in (("loop", summarize_daily_loop), ("numpy", summarize_daily)):
+        best = min(timeit.repeat(lambda: fn(daily), number=args.repeat, repeat=5))
+        print(f"{name:>6}: {best / args.repeat * 1e6:9.1f} us per series "
+              f"({len(daily['time'])} days)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,272 @@
+"""Local stand-ins for MongoDB and the Open-Meteo archive.
+
+``install()`` points ``dbConnect.db`` at an in-memory mongomock database
+behind an async adapter and swaps the shared HTTP client for one whose
+transport replays recorded archive responses, so the app can be driven
+without a database or network access.
+
+Recordings are the raw JSON bodies returned by the archive API for one
+coordinate, saved as ``<lat>_<lon>.json``. Capture them once with network
+access:
+
+    uv run python -m benchmarks.standins record benchmarks/recordings 26.1,91.7 19.1,72.9
+
+Requests for coordinates without a recording get a deterministic synthetic
+series, so a run works out of the box; the replay counters say which was used.
+"""
+
+import argparse
+import json
+import zlib
+from datetime import date, timedelta
+from pathlib import Path
+
+import httpx
+import mongomock
+import numpy as np
+from pymongo import DeleteMany, DeleteOne, InsertOne, ReplaceOne, UpdateMany, UpdateOne
+from pymongo.results import BulkWriteResult
+
+from app.db import dbConnect
+from app.services.rainfallService import ARCHIVE_URL
+from app.utils import http_client
+
+SYNTHETIC_START = date(1940, 1, 1)
+
+
+class AsyncCursor:
+    """Async facade over a mongomock cursor or an iterator of documents."""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def __getattr__(self, name):
+        attr = getattr(self._cursor, name)
+        if not callable(attr):
+            return attr
+
+        def chained(*args, **kwargs):
+            result = attr(*args, **kwargs)
+            return self if result is self._cursor else result
+
+        return chained
+
+    def batch_size(self, size):
+        return self
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._cursor)
+        except StopIteration:
+            raise StopAsyncIteration
+
+    async def to_list(self, length=None):
+        docs = []
+        for doc in self._cursor:
+            docs.append(doc)
+            if length is not None and len(docs) >= length:
+                break
+        return docs
+
+    async def close(self):
+        pass
+
+
+class AsyncCollection:
+    """The subset of ``AsyncCollection`` the app uses, over mongomock."""
+
+    def __init__(self, collection: mongomock.Collection):
+        self._collection = collection
+
+    @property
+    def name(self) -> str:
+        return self._collection.name
+
+    def find(self, *args, **kwargs):
+        return AsyncCursor(self._collection.find(*args, **kwargs))
+
+    async def aggregate(self, pipeline, **kwargs):
+        kwargs.pop("batchSize", None)
+        return AsyncCursor(iter(list(self._collection.aggregate(pipeline, **kwargs))))
+
+    async def bulk_write(self, requests, ordered=True, **kwargs):
+        # mongomock's own bulk_write predates the current pymongo operation classes
+        counts = {"nInserted": 0, "nMatched": 0, "nModified": 0, "nRemoved": 0, "nUpserted": 0, "upserted": []}
+        coll = self._collection
+        for index, op in enumerate(requests):
+            if isinstance(op, InsertOne):
+                coll.insert_one(op._doc)
+                counts["nInserted"] += 1
+                continue
+            if isinstance(op, (DeleteOne, DeleteMany)):
+                delete = coll.delete_one if isinstance(op, DeleteOne) else coll.delete_many
+                counts["nRemoved"] += delete(op._filter).deleted_count
+                continue
+            if isinstance(op, ReplaceOne):
+                result = coll.replace_one(op._filter, op._doc, upsert=op._upsert)
+            elif isinstance(op, (UpdateOne, UpdateMany)):
+                update = coll.update_one if isinstance(op, UpdateOne) else coll.update_many
+                result = update(op._filter, op._doc, upsert=bool(op._upsert))
+            else:
+                raise TypeError(f"Unsupported bulk operation {op!r}")
+            counts["nMatched"] += result.matched_count
+            counts["nModified"] += result.modified_count
+            if result.upserted_id is not None:
+                counts["nUpserted"] += 1
+                counts["upserted"].append({"index": index, "_id": result.upserted_id})
+        return BulkWriteResult(counts, True)
+
+    async def create_index(self, keys, **kwargs):
+        kwargs.pop("expireAfterSeconds", None)
+        return self._collection.create_index(keys, **kwargs)
+
+    def __getattr__(self, name):
+        method = getattr(self._collection, name)
+
+        async def call(*args, **kwargs):
+            kwargs.pop("session", None)
+            return method(*args, **kwargs)
+
+        return call
+
+
+class AsyncDatabase:
+    def __init__(self, name: str = "rainwater-harvesting"):
+        self._db = mongomock.MongoClient()[name]
+
+    def get_collection(self, name: str) -> AsyncCollection:
+        return AsyncCollection(self._db[name])
+
+    def __getitem__(self, name: str) -> AsyncCollection:
+        return self.get_collection(name)
+
+    async def command(self, *args, **kwargs):
+        return self._db.command(*args, **kwargs)
+
+
+def _coord_key(latitude: float, longitude: float) -> str:
+    return f"{float(latitude):.4f}_{float(longitude):.4f}"
+
+
+def _synthetic_series(key: str) -> list:
+    """Deterministic daily precipitation from 1940 to the end of next year."""
+    rng = np.random.default_rng(zlib.crc32(key.encode()))
+    days = (date(date.today().year + 1, 12, 31) - SYNTHETIC_START).days + 1
+    # a wet season of roughly four months, drier otherwise
+    wet_start = rng.integers(120, 180)
+    day_of_year = np.arange(days) % 365
+    wet = (day_of_year >= wet_start) & (day_of_year < wet_start + 120)
+    rainy = rng.random(days) < np.where(wet, 0.6, 0.15)
+    amounts = np.round(rng.exponential(np.where(wet, 14.0, 4.0)), 1)
+    values = np.where(rainy, amounts, 0.0).tolist()
+    for i in np.flatnonzero(rng.random(days) < 0.005):
+        values[i] = None
+    return values
+
+
+class ArchiveReplay:
+    """``httpx.MockTransport`` handler serving archive requests from recordings."""
+
+    def __init__(self, recordings: str | Path | None = None):
+        self.recordings: dict[str, dict] = {}
+        self.replayed = 0
+        self.synthesized = 0
+        self._synthetic: dict[str, list] = {}
+        self._bodies: dict[str, bytes] = {}
+        if recordings is not None and Path(recordings).is_dir():
+            for path in Path(recordings).glob("*.json"):
+                body = json.loads(path.read_text())
+                self.recordings[_coord_key(body["latitude"], body["longitude"])] = body["daily"]
+
+    def _daily(self, key: str, start: date, end: date) -> dict:
+        recorded = self.recordings.get(key)
+        if recorded is not None:
+            self.replayed += 1
+            lo, hi = start.isoformat(), end.isoformat()
+            pairs = [(t, p) for t, p in zip(recorded["time"], recorded["precipitation_sum"]) if lo <= t <= hi]
+            return {"time": [t for t, _ in pairs], "precipitation_sum": [p for _, p in pairs]}
+        self.synthesized += 1
+        series = self._synthetic.get(key)
+        if series is None:
+            series = self._synthetic[key] = _synthetic_series(key)
+        first = (start - SYNTHETIC_START).days
+        count = (end - start).days + 1
+        return {
+            "time": [(start + timedelta(days=i)).isoformat() for i in range(count)],
+            "precipitation_sum": series[first:first + count],
+        }
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        if request.url.copy_with(query=None) != httpx.URL(ARCHIVE_URL):
+            return httpx.Response(404, json={"error": True, "reason": "not recorded"})
+        params = request.url.params
+        body = self._bodies.get(str(request.url))
+        if body is None:
+            start = date.fromisoformat(params["start_date"])
+            end = date.fromisoformat(params["end_date"])
+            points = []
+            for lat, lon in zip(params["latitude"].split(","), params["longitude"].split(",")):
+                points.append({
+                    "latitude": float(lat),
+                    "longitude": float(lon),
+                    "daily": self._daily(_coord_key(lat, lon), start, end),
+                })
+            body = json.dumps(points if len(points) > 1 else points[0]).encode()
+            self._bodies[str(request.url)] = body
+        return httpx.Response(200, content=body, headers={"content-type": "application/json"})
+
+    def stats(self) -> dict:
+        # counts distinct coordinate windows built, not responses served
+        return {
+            "recordings": len(self.recordings),
+            "replayed": self.replayed,
+            "synthesized": self.synthesized,
+        }
+
+
+def install(recordings: str | Path | None = None) -> ArchiveReplay:
+    """Swap the database and upstream HTTP client for local stand-ins."""
+    dbConnect.db = AsyncDatabase()
+    replay = ArchiveReplay(recordings)
+    http_client.set_http_client(http_client.create_http_client(httpx.MockTransport(replay)))
+    return replay
+
+
+def record(out_dir: str, coordinates: list[str], years: int) -> None:
+    """Fetch and save archive responses for later replay (needs network access)."""
+    out = Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    end = date.today() - timedelta(days=7)
+    start = date(end.year - years, 1, 1)
+    with httpx.Client(timeout=60) as client:
+        for coord in coordinates:
+            lat, lon = (float(v) for v in coord.split(","))
+            resp = client.get(ARCHIVE_URL, params={
+                "latitude": lat,
+                "longitude": lon,
+                "start_date": start.isoformat(),
+                "end_date": end.isoformat(),
+                "daily": "precipitation_sum",
+                "timezone": "auto",
+            })
+            resp.raise_for_status()
+            body = resp.json()
+            # key by the requested coordinate, which is what the app asks for
+            body["latitude"], body["longitude"] = lat, lon
+            path = out / f"{_coord_key(lat, lon)}.json"
+            path.write_text(json.dumps(body))
+            print(f"Recorded {path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Record Open-Meteo archive responses for replay.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    rec = sub.add_parser("record")
+    rec.add_argument("out_dir")
+    rec.add_argument("coordinates", nargs="+", help="lat,lon pairs")
+    rec.add_argument("--years", type=int, default=50)
+    args = parser.parse_args()
+    record(args.out_dir, args.coordinates, args.years)
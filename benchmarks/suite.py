@@ -0,0 +1,284 @@
+"""Endpoint load test and micro-benchmarks, reported as JSON.
+
+Drives the app against the local stand-ins in ``benchmarks.standins``, either
+in-process through ``httpx.ASGITransport`` or over real sockets with uvicorn
+running in the same process. Run from the project root:
+
+    uv run --extra bench python -m benchmarks.suite --out bench.json
+    uv run --extra bench python -m benchmarks.suite --server uvicorn --baseline bench.json
+
+Each endpoint reports throughput and p50/p95/p99 latency; micro-benchmarks
+report the best time per call. With ``--baseline`` the run is compared to an
+earlier JSON report and the relative change of every figure is printed.
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import subprocess
+import sys
+import time
+import timeit
+from datetime import datetime, timezone
+
+import httpx
+import numpy as np
+
+from benchmarks import standins
+from benchmarks.bench_rainfall_aggregation import synthetic_daily
+
+# A spread of Indian cities, several grid cells apart
+LOCATIONS = [
+    (26.14, 91.74), (19.08, 72.88), (28.61, 77.21), (13.08, 80.27), (22.57, 88.36),
+    (12.97, 77.59), (17.39, 78.49), (18.52, 73.86), (23.02, 72.57), (26.91, 75.79),
+    (25.59, 85.14), (21.15, 79.09), (11.02, 76.96), (30.73, 76.78), (9.93, 76.27),
+    (15.30, 74.12), (20.30, 85.82), (31.10, 77.17), (25.32, 82.97), (23.26, 77.41),
+]
+EMAIL = "bench@example.com"
+PASSWORD = "bench-password"
+
+
+def _rooftop(i: int) -> dict:
+    # vary the roof so every request misses the result memo
+    return {
+        "location": "bench",
+        "roof_area_m2": 50 + i * 0.5,
+        "roof_type": ("RCC", "metal_sheet", "tile", "other")[i % 4],
+        "annual_rainfall_mm": 800 + (i % 40) * 25,
+        "num_occupants": 1 + i % 8,
+        "system_type": ("storage", "recharge", "hybrid")[i % 3],
+    }
+
+
+async def _calculate(client: httpx.AsyncClient, token: str, i: int) -> httpx.Response:
+    return await client.post(
+        "/api/v1/projects/calculate",
+        json={"name": f"bench {i}", "input": _rooftop(i)},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+
+
+async def _login(client: httpx.AsyncClient, token: str, i: int) -> httpx.Response:
+    return await client.post("/api/v1/auth/login", data={"username": EMAIL, "password": PASSWORD})
+
+
+async def _rainfall(client: httpx.AsyncClient, token: str, i: int) -> httpx.Response:
+    lat, lon = LOCATIONS[i % len(LOCATIONS)]
+    return await client.get(
+        "/api/v1/rainfall/average", params={"latitude": lat, "longitude": lon, "years": 10}
+    )
+
+
+ENDPOINTS = {
+    "calculate": ("POST /api/v1/projects/calculate", _calculate),
+    "login": ("POST /api/v1/auth/login", _login),
+    "rainfall": ("GET /api/v1/rainfall/average", _rainfall),
+}
+
+
+def _latency_summary(latencies: list[float], errors: int, elapsed: float) -> dict:
+    ms = np.asarray(latencies) * 1000
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "mean_ms": round(float(ms.mean()), 3),
+        "p50_ms": round(float(p50), 3),
+        "p95_ms": round(float(p95), 3),
+        "p99_ms": round(float(p99), 3),
+        "max_ms": round(float(ms.max()), 3),
+    }
+
+
+async def _load(client, token, send, requests: int, concurrency: int, offset: int = 0) -> dict:
+    latencies: list[float] = []
+    errors = 0
+    counter = iter(range(offset, offset + requests))
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            start = time.perf_counter()
+            resp = await send(client, token, i)
+            latencies.append(time.perf_counter() - start)
+            if resp.status_code >= 400:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return _latency_summary(latencies, errors, time.perf_counter() - start)
+
+
+async def _authenticate(client: httpx.AsyncClient) -> str:
+    resp = await client.post(
+        "/api/v1/auth/register", json={"email": EMAIL, "password": PASSWORD, "username": "bench"}
+    )
+    if resp.status_code not in (201, 409):
+        raise RuntimeError(f"Could not register the benchmark user: {resp.status_code} {resp.text}")
+    resp = await client.post("/api/v1/auth/login", data={"username": EMAIL, "password": PASSWORD})
+    resp.raise_for_status()
+    return resp.json()["access_token"]
+
+
+async def _start_uvicorn(app):
+    import uvicorn
+
+    # lifespan off: it would connect to a real MongoDB and replace the stand-ins
+    config = uvicorn.Config(app, host="127.0.0.1", port=0, lifespan="off", log_level="warning")
+    server = uvicorn.Server(config)
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        if task.done():
+            task.result()
+        await asyncio.sleep(0.01)
+    port = server.servers[0].sockets[0].getsockname()[1]
+    return server, task, f"http://127.0.0.1:{port}"
+
+
+async def run_endpoints(args) -> dict:
+    from app.config import settings
+    from app.utils import admission
+
+    # measure the endpoints, not the per-client rate limits (read when app.main is imported)
+    settings.rate_limit_enabled = False
+    from app.main import app
+
+    # a load test must measure the dependencies, not their load shedding
+    for limiter in admission.LIMITERS.values():
+        limiter.queue_depth = max(limiter.queue_depth, args.concurrency)
+    server = task = None
+    if args.server == "uvicorn":
+        server, task, base_url = await _start_uvicorn(app)
+        client = httpx.AsyncClient(base_url=base_url, limits=httpx.Limits(max_connections=args.concurrency))
+    else:
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench")
+    results = {}
+    try:
+        token = await _authenticate(client)
+        for name in args.endpoints:
+            label, send = ENDPOINTS[name]
+            await _load(client, token, send, args.warmup, min(args.concurrency, args.warmup) or 1)
+            summary = await _load(client, token, send, args.requests, args.concurrency, offset=args.warmup)
+            results[name] = {"route": label, **summary}
+            print(f"{name:>10}: {summary['throughput_rps']:8.1f} req/s  p50 {summary['p50_ms']:8.2f} ms  "
+                  f"p95 {summary['p95_ms']:8.2f} ms  p99 {summary['p99_ms']:8.2f} ms  errors {summary['errors']}",
+                  file=sys.stderr)
+    finally:
+        await client.aclose()
+        if server is not None:
+            server.should_exit = True
+            await task
+    return results
+
+
+def _best_us(fn, number: int, repeat: int = 5) -> float:
+    return round(min(timeit.repeat(fn, number=number, repeat=repeat)) / number * 1e6, 2)
+
+
+def run_micro(args) -> dict:
+    from app.models.project_model import RooftopInput
+    from app.services.calculations import calculate_harvest, calculate_harvest_batch
+    from app.services.rainfall_aggregation import summarize_daily, summarize_daily_loop, to_arrays
+    from app.services.tank_simulation import SIMULATION_YEARS
+
+    rooftop = RooftopInput(**_rooftop(0))
+    simulated = RooftopInput(**_rooftop(0), sizing_method="simulation", latitude=26.14, longitude=91.74)
+    batch = [RooftopInput(**_rooftop(i)) for i in range(1000)]
+    daily = synthetic_daily(30)
+    _, precip = to_arrays(synthetic_daily(SIMULATION_YEARS))
+
+    results = {
+        "calculate_harvest_us": _best_us(lambda: calculate_harvest(rooftop), 2000),
+        "calculate_harvest_simulation_us": _best_us(lambda: calculate_harvest(simulated, precip), 20),
+        "calculate_harvest_batch_1000_us": _best_us(lambda: calculate_harvest_batch(batch), 20),
+        "summarize_daily_30y_us": _best_us(lambda: summarize_daily(daily), 200),
+        "summarize_daily_loop_30y_us": _best_us(lambda: summarize_daily_loop(daily), 20),
+    }
+    for name, value in results.items():
+        print(f"{name:>34}: {value:12.2f} us", file=sys.stderr)
+    return results
+
+
+def _git_commit() -> str | None:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True)
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(baseline: dict, current: dict) -> list[str]:
+    """Relative change of every shared figure; lower is better except throughput."""
+    lines = []
+    for section in ("endpoints", "micro"):
+        old, new = baseline.get(section, {}), current.get(section, {})
+        for name in sorted(old.keys() & new.keys()):
+            if section == "micro":
+                pairs = [(name, old[name], new[name])]
+            else:
+                pairs = [
+                    (f"{name}.{field}", old[name][field], new[name][field])
+                    for field in ("throughput_rps", "p50_ms", "p95_ms", "p99_ms")
+                ]
+            for label, before, after in pairs:
+                if not before:
+                    continue
+                change = (after - before) / before * 100
+                lines.append(f"{label:>40}: {before:12.2f} -> {after:12.2f}  ({change:+.1f}%)")
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--server", choices=("inprocess", "uvicorn"), default="inprocess")
+    parser.add_argument("--endpoints", type=lambda v: v.split(","), default=list(ENDPOINTS))
+    parser.add_argument("--requests", type=int, default=500, help="measured requests per endpoint")
+    parser.add_argument("--warmup", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--recordings", default="benchmarks/recordings",
+                        help="directory of recorded archive responses")
+    parser.add_argument("--skip-endpoints", action="store_true")
+    parser.add_argument("--skip-micro", action="store_true")
+    parser.add_argument("--out", help="write the JSON report here instead of stdout")
+    parser.add_argument("--baseline", help="earlier JSON report to compare against")
+    args = parser.parse_args()
+    unknown = set(args.endpoints) - ENDPOINTS.keys()
+    if unknown:
+        parser.error(f"unknown endpoints: {', '.join(sorted(unknown))}")
+
+    replay = standins.install(args.recordings)
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "numpy": np.__version__,
+            "args": vars(args),
+        },
+    }
+    if not args.skip_endpoints:
+        report["endpoints"] = asyncio.run(run_endpoints(args))
+        report["meta"]["archive"] = replay.stats()
+    if not args.skip_micro:
+        report["micro"] = run_micro(args)
+
+    body = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(body + "\n")
+    else:
+        print(body)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        print(f"Compared with {baseline['meta'].get('commit')}:", file=sys.stderr)
+        for line in compare(baseline, report):
+            print(line, file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""BufferedWriter must store every document once and report what it could not store."""
+
+import asyncio
+
+import pytest
+from pymongo.errors import AutoReconnect, BulkWriteError, PyMongoError
+
+from app.db.buffered_writer import DUPLICATE_KEY, BufferedWriter
+
+
+class FakeCollection:
+    """Records inserted documents; ``failures`` are raised by the next calls, in order."""
+
+    def __init__(self, failures=()):
+        self.failures = list(failures)
+        self.calls = 0
+        self.docs = {}
+
+    async def insert_many(self, docs, ordered=True):
+        self.calls += 1
+        if self.failures:
+            failure = self.failures.pop(0)
+            if callable(failure):
+                failure = failure(self, docs)
+            raise failure
+        for doc in docs:
+            self.docs[doc["_id"]] = doc
+
+
+def writer_for(collection, **options):
+    async def get_collection():
+        return collection
+
+    return BufferedWriter(get_collection, **options)
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    real_sleep = asyncio.sleep
+
+    async def sleep(delay, *args):
+        await real_sleep(0)
+
+    monkeypatch.setattr("app.db.buffered_writer.asyncio.sleep", sleep)
+
+
+def test_failed_flush_is_retried():
+    collection = FakeCollection([AutoReconnect("primary stepped down")] * 2)
+
+    async def run():
+        writer = writer_for(collection)
+        writer.start()
+        ids = await asyncio.gather(*(writer.add({"n": n}) for n in range(3)))
+        await writer.close()
+        return writer, ids
+
+    writer, ids = asyncio.run(run())
+    assert collection.calls == 3
+    assert sorted(collection.docs) == sorted(ids)
+    assert writer.stats() == {"pending": 0, "batches": 1, "inserted": 3, "failed": 0}
+
+
+def test_exhausted_retries_fail_every_waiter():
+    collection = FakeCollection([AutoReconnect("no primary")] * 3)
+
+    async def run():
+        writer = writer_for(collection, max_retries=2)
+        writer.start()
+        results = await asyncio.gather(
+            *(writer.add({"n": n}) for n in range(2)), return_exceptions=True
+        )
+        await writer.close()
+        return writer, results
+
+    writer, results = asyncio.run(run())
+    assert all(isinstance(r, AutoReconnect) for r in results)
+    assert collection.docs == {}
+    assert writer.stats()["failed"] == 2
+    assert len(writer) == 0
+
+
+def test_partial_bulk_write_error_keeps_duplicates_and_fails_the_rest():
+    def partial(collection, docs):
+        # an earlier attempt stored docs[0]; docs[1] is rejected; docs[2] goes in
+        collection.docs[docs[0]["_id"]] = docs[0]
+        collection.docs[docs[2]["_id"]] = docs[2]
+        return BulkWriteError(
+            {
+                "writeErrors": [
+                    {"index": 0, "code": DUPLICATE_KEY, "errmsg": "duplicate key"},
+                    {"index": 1, "code": 121, "errmsg": "document failed validation"},
+                ]
+            }
+        )
+
+    collection = FakeCollection([partial])
+    flushed = []
+
+    async def on_flush(stored):
+        flushed.extend(context for _, context in stored)
+
+    async def run():
+        writer = writer_for(collection, on_flush=on_flush)
+        writer.start()
+        results = await asyncio.gather(
+            *(writer.add({"n": n}, context=n) for n in range(3)), return_exceptions=True
+        )
+        await writer.close()
+        return writer, results
+
+    writer, results = asyncio.run(run())
+    assert collection.calls == 1
+    assert not isinstance(results[0], Exception)
+    assert isinstance(results[1], PyMongoError)
+    assert not isinstance(results[2], Exception)
+    assert sorted(flushed) == [0, 2]
+    assert writer.stats() == {"pending": 0, "batches": 1, "inserted": 2, "failed": 1}
+
+
+def test_close_flushes_write_behind_documents():
+    collection = FakeCollection()
+
+    async def run():
+        # a batch that would otherwise wait an hour to fill up
+        writer = writer_for(collection, batch_size=100, flush_interval=3600)
+        writer.start()
+        ids = [await writer.add({"n": n}, wait=False) for n in range(5)]
+        assert all(writer.get(_id) is not None for _id in ids)
+        await writer.close()
+        return writer, ids
+
+    writer, ids = asyncio.run(run())
+    assert sorted(collection.docs) == sorted(ids)
+    assert len(writer) == 0
+
+
+def test_add_after_close_is_refused():
+    async def run():
+        writer = writer_for(FakeCollection())
+        writer.start()
+        await writer.close()
+        with pytest.raises(RuntimeError):
+            await writer.add({"n": 1})
+
+    asyncio.run(run())
@@ -0,0 +1,51 @@
+"""The vectorized batch path must give exactly what the scalar path gives."""
+
+from hypothesis import given, settings, strategies as st
+from hypothesis.strategies import composite
+
+from app.models.project_model import RooftopInput
+from app.services.calculations import calculate_harvest, calculate_harvest_batch
+
+# Values around the feasibility thresholds (20 m², 300 mm) are drawn often
+positive_floats = st.one_of(
+    st.floats(min_value=1e-3, max_value=1e6, allow_nan=False, allow_infinity=False),
+    st.sampled_from([19.99, 20.0, 20.01, 299.99, 300.0, 300.01]),
+)
+
+
+@composite
+def rooftops(draw) -> RooftopInput:
+    return RooftopInput(
+        location=draw(st.text(max_size=20)),
+        roof_area_m2=draw(positive_floats),
+        roof_type=draw(st.sampled_from(["RCC", "metal_sheet", "tile", "other"])),
+        annual_rainfall_mm=draw(positive_floats),
+        use_type=draw(st.sampled_from(["domestic", "institutional", "industrial"])),
+        num_occupants=draw(st.integers(min_value=1, max_value=100_000)),
+        system_type=draw(st.sampled_from(["storage", "recharge", "hybrid"])),
+        soil_type=draw(st.sampled_from([None, "sand", "loam", "clay"])),
+    )
+
+
+@settings(max_examples=300)
+@given(st.lists(rooftops(), min_size=1, max_size=20))
+def test_batch_matches_scalar(inputs):
+    batch = calculate_harvest_batch(inputs)
+    assert len(batch) == len(inputs)
+    for rooftop, row in zip(inputs, batch):
+        expected = calculate_harvest(rooftop).model_dump()
+        assert row.keys() == expected.keys()
+        for field, value in expected.items():
+            assert row[field] == value, field
+            assert type(row[field]) is type(value), field
+
+
+@given(rooftops())
+def test_simulation_inputs_fall_back_to_the_rule_of_thumb(rooftop):
+    # batches never simulate; without a series the scalar path does not either
+    rooftop = rooftop.model_copy(update={"sizing_method": "simulation", "latitude": 12.97, "longitude": 77.59})
+    assert calculate_harvest_batch([rooftop])[0] == calculate_harvest(rooftop).model_dump()
+
+
+def test_empty_batch():
+    assert calculate_harvest_batch([]) == []
@@ -0,0 +1,89 @@
+"""Leases must hand a job to exactly one worker at a time."""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.config import settings
+from app.db import dbConnect
+from app.jobs import queue
+from benchmarks.standins import AsyncDatabase
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """In-memory jobs collection and a clock the test moves forward by hand."""
+    monkeypatch.setattr(dbConnect, "db", AsyncDatabase())
+    now = [datetime(2026, 1, 1, tzinfo=timezone.utc)]
+    monkeypatch.setattr(queue, "_now", lambda: now[0])
+
+    def advance(seconds: float) -> None:
+        now[0] += timedelta(seconds=seconds)
+
+    return advance
+
+
+def test_expired_lease_is_claimed_again(clock):
+    async def run():
+        job_id = await queue.submit("calculate", {}, "user-1")
+        first = await queue.claim("worker-a")
+        assert str(first["_id"]) == job_id
+        assert await queue.claim("worker-b") is None
+
+        # worker-a dies and stops renewing its lease
+        clock(settings.job_lease_seconds + 1)
+        assert await queue.requeue_expired() == 1
+        second = await queue.claim("worker-b")
+        assert second["_id"] == first["_id"]
+        assert second["worker"] == "worker-b"
+        assert second["attempts"] == 2
+
+        # the old holder can no longer touch the job; the new one can finish it
+        with pytest.raises(queue.LeaseLost):
+            await queue.heartbeat(first["_id"], "worker-a")
+        await queue.complete(second["_id"], "worker-b", {"ok": True})
+        job = await queue.get_job(job_id, "user-1")
+        assert job["status"] == queue.SUCCEEDED
+        assert job["result"] == {"ok": True}
+
+    asyncio.run(run())
+
+
+def test_live_lease_is_not_requeued(clock):
+    async def run():
+        await queue.submit("calculate", {}, "user-1")
+        job = await queue.claim("worker-a")
+        clock(settings.job_lease_seconds / 2)
+        await queue.heartbeat(job["_id"], "worker-a")
+        clock(settings.job_lease_seconds / 2 + 1)
+        assert await queue.requeue_expired() == 0
+        assert await queue.claim("worker-b") is None
+
+    asyncio.run(run())
+
+
+def test_expired_lease_without_attempts_left_fails(clock):
+    async def run():
+        job_id = await queue.submit("calculate", {}, "user-1", max_attempts=1)
+        await queue.claim("worker-a")
+        clock(settings.job_lease_seconds + 1)
+        assert await queue.requeue_expired() == 1
+        assert await queue.claim("worker-b") is None
+        job = await queue.get_job(job_id, "user-1")
+        assert job["status"] == queue.FAILED
+        assert job["error"] == "Worker lease expired"
+
+    asyncio.run(run())
+
+
+def test_completing_twice_raises_lease_lost(clock):
+    async def run():
+        job_id = await queue.submit("calculate", {}, "user-1")
+        job = await queue.claim("worker-a")
+        await queue.complete(job["_id"], "worker-a", {"ok": 1})
+        with pytest.raises(queue.LeaseLost):
+            await queue.complete(job["_id"], "worker-a", {"ok": 2})
+        assert (await queue.get_job(job_id, "user-1"))["result"] == {"ok": 1}
+
+    asyncio.run(run())
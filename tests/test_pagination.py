@@ -0,0 +1,72 @@
+"""Keyset cursors must walk a listing without gaps or repeats, and reject garbage."""
+
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+from fastapi.testclient import TestClient
+
+from app.db import dbConnect
+from app.utils.pagination import InvalidCursor, decode_cursor, encode_cursor, fetch_page
+from benchmarks.standins import AsyncDatabase
+
+
+@pytest.fixture
+def projects(monkeypatch):
+    """25 projects, with created_at ties so the _id tiebreak is exercised."""
+    monkeypatch.setattr(dbConnect, "db", AsyncDatabase())
+    start = datetime(2026, 1, 1)
+    docs = [
+        {"_id": ObjectId(), "user_id": "user-1", "created_at": start + timedelta(minutes=n // 3)}
+        for n in range(25)
+    ]
+    asyncio.run(_insert(docs))
+    return docs
+
+
+async def _insert(docs):
+    collection = await dbConnect.get_project_collection()
+    await collection.insert_many(docs)
+
+
+def test_cursor_round_trip():
+    doc = {"_id": ObjectId(), "created_at": datetime(2026, 3, 4, 5, 6, 7, 890000)}
+    assert decode_cursor(encode_cursor(doc)) == (doc["created_at"], doc["_id"])
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        "not a cursor",
+        "e30",  # {}
+        encode_cursor({"_id": ObjectId(), "created_at": datetime(2026, 1, 1)})[:-4],
+        "eyJ0IjogIjIwMjYtMDEtMDEiLCAiaWQiOiAibm9wZSJ9",  # {"t": "2026-01-01", "id": "nope"}
+    ],
+)
+def test_malformed_cursor_is_rejected(cursor):
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor)
+
+
+def test_pages_cover_every_project_once_newest_first(projects):
+    async def walk():
+        collection = await dbConnect.get_project_collection()
+        seen, cursor = [], None
+        while True:
+            docs, cursor = await fetch_page(collection, {"user_id": "user-1"}, cursor, 10, {"created_at": 1})
+            seen.extend(docs)
+            if cursor is None:
+                return seen
+
+    seen = asyncio.run(walk())
+    expected = sorted(projects, key=lambda d: (d["created_at"], d["_id"]), reverse=True)
+    assert [d["_id"] for d in seen] == [d["_id"] for d in expected]
+
+
+def test_list_route_answers_400_for_a_malformed_cursor(projects):
+    from app.main import app
+
+    response = TestClient(app).get("/api/v1/projects/", params={"cursor": "not a cursor"})
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Invalid cursor."}
@@ -0,0 +1,127 @@
+"""Concurrent calls for one key must share a single call, its result and its failure."""
+
+import asyncio
+
+import pytest
+
+from app.utils.single_flight import SingleFlight
+
+
+class Upstream:
+    """A call that runs until ``release`` is set, counting how often it was made."""
+
+    def __init__(self, result="series", error: Exception | None = None):
+        self.result = result
+        self.error = error
+        self.calls = 0
+        self.release = asyncio.Event()
+
+    async def __call__(self):
+        self.calls += 1
+        await self.release.wait()
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+async def _start(flight: SingleFlight, key, fn, count: int) -> list[asyncio.Task]:
+    tasks = [asyncio.ensure_future(flight.do(key, fn)) for _ in range(count)]
+    # let every caller reach the shared call
+    await asyncio.sleep(0)
+    return tasks
+
+
+def test_concurrent_callers_share_one_call():
+    async def run():
+        flight, upstream = SingleFlight(), Upstream()
+        tasks = await _start(flight, "cell", upstream, 5)
+        assert len(flight) == 1
+        upstream.release.set()
+        results = await asyncio.gather(*tasks)
+        return flight, upstream, results
+
+    flight, upstream, results = asyncio.run(run())
+    assert results == ["series"] * 5
+    assert upstream.calls == 1
+    assert flight.stats() == {"in_flight": 0, "calls": 1, "coalesced": 4}
+
+
+def test_different_keys_do_not_share():
+    async def run():
+        flight, upstream = SingleFlight(), Upstream()
+        tasks = [asyncio.ensure_future(flight.do(key, upstream)) for key in ("a", "b")]
+        await asyncio.sleep(0)
+        upstream.release.set()
+        await asyncio.gather(*tasks)
+        return upstream
+
+    assert asyncio.run(run()).calls == 2
+
+
+def test_exception_reaches_every_waiter():
+    async def run():
+        flight, upstream = SingleFlight(), Upstream(error=ValueError("archive down"))
+        tasks = await _start(flight, "cell", upstream, 3)
+        upstream.release.set()
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+
+        # the failure is not cached; the next caller tries again
+        retry = Upstream()
+        retry.release.set()
+        return flight, upstream, results, await flight.do("cell", retry)
+
+    flight, upstream, results, retried = asyncio.run(run())
+    assert upstream.calls == 1
+    assert len(results) == 3
+    assert all(isinstance(r, ValueError) and str(r) == "archive down" for r in results)
+    assert retried == "series"
+    assert len(flight) == 0
+
+
+def test_cancelling_the_leader_does_not_strand_followers():
+    async def run():
+        flight, upstream = SingleFlight(), Upstream()
+        leader, *followers = await _start(flight, "cell", upstream, 3)
+        leader.cancel()
+        await asyncio.sleep(0)
+        assert leader.cancelled()
+        assert len(flight) == 1
+
+        upstream.release.set()
+        results = await asyncio.wait_for(asyncio.gather(*followers), timeout=1)
+        return flight, upstream, results
+
+    flight, upstream, results = asyncio.run(run())
+    assert results == ["series", "series"]
+    assert upstream.calls == 1
+    assert len(flight) == 0
+
+
+def test_cancelling_every_caller_still_finishes_the_call():
+    async def run():
+        flight, upstream = SingleFlight(), Upstream()
+        tasks = await _start(flight, "cell", upstream, 2)
+        for task in tasks:
+            task.cancel()
+        await asyncio.sleep(0)
+        upstream.release.set()
+        # the shared call runs to completion and is then forgotten
+        while len(flight):
+            await asyncio.sleep(0)
+        return upstream, tasks
+
+    upstream, tasks = asyncio.run(run())
+    assert upstream.calls == 1
+    assert all(task.cancelled() for task in tasks)
+
+
+@pytest.mark.parametrize("count", [1, 50])
+def test_calls_after_completion_run_again(count):
+    async def run():
+        flight, upstream = SingleFlight(), Upstream()
+        upstream.release.set()
+        for _ in range(count):
+            assert await flight.do("cell", upstream) == "series"
+        return upstream
+
+    assert asyncio.run(run()).calls == count